@@ -0,0 +1,289 @@
+"""End-to-end pipeline benchmark on synthetic fixtures of a given scale.
+
+Fixtures are built with the sharded synthetic driver at multiples of the
+1,470 employees of the reference dataset and cached under data/synthetic/bench.
+Each scale runs the pipeline stages in a scratch working directory and records
+wall time, peak RSS and rows/s per stage. Runs are appended to a JSON-lines
+history and compared with the stored baseline; a stage that got slower or
+bigger than the tolerance allows is reported as a regression and the command
+exits non-zero.
+
+    python -m benchmarks.pipeline_benchmark --scales 1x 10x
+    python -m benchmarks.pipeline_benchmark --scales 1x --update-baseline
+"""
+import os
+import gc
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from etl import catalog
+from etl.extract.extract import extract_file
+from etl.instrumentation import peak_rss_mb, reset_peak_rss
+from etl.staging import write_staging
+from etl.transform.transform_attendance import clean_attendance
+from etl.transform.transform_employee import clean_employee
+from etl.transform.transform_engagement import clean_engagement
+from etl.transform.transform_performance import clean_performance
+from etl.transform.transform_master import run_master_transform
+from etl.load.load_dimensions import load_dimensions
+from etl.load.load_facts import load_facts
+from synthetic_generators.driver import generate_all
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BASE_EMPLOYEES = 1470
+SCALES = {"1x": 1, "10x": 10, "100x": 100}
+
+FIXTURE_ROOT = os.path.join(REPO_ROOT, "data/synthetic/bench")
+HISTORY_PATH = os.path.join(REPO_ROOT, "benchmarks/results/history.jsonl")
+BASELINE_PATH = os.path.join(REPO_ROOT, "benchmarks/baseline.json")
+
+# a stage regresses when it is this much slower or bigger than the baseline;
+# stages under MIN_SECONDS are timer noise and only checked for memory
+TIME_TOLERANCE = 0.25
+RSS_TOLERANCE = 0.25
+MIN_SECONDS = 0.05
+
+# staging dataset -> (generator dataset, raw landing dir, source system, clean function)
+SOURCES = {
+    "employee": ("ibm_hr", "data/raw/ibm_hr", "hr_core_system", clean_employee),
+    "attendance": ("attendance", "data/raw/attendance", "attendance_system", clean_attendance),
+    "engagement": ("engagement", "data/raw/engagement", "engagement_system", clean_engagement),
+    "performance": ("performance", "data/raw/performance", "performance_system", clean_performance),
+}
+
+
+@contextmanager
+def measure(stages: list, stage: str, rows: int):
+    gc.collect()
+    reset_peak_rss()
+    started = time.perf_counter()
+    yield
+    seconds = time.perf_counter() - started
+
+    stages.append({
+        "stage": stage,
+        "seconds": round(seconds, 4),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "rows": rows,
+        "rows_per_s": round(rows / seconds) if seconds else None,
+    })
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def concat_parts(part_paths: list, output_path: str):
+    # every part file carries the header; keep only the first one
+    with open(output_path, "wb") as out:
+        for i, path in enumerate(sorted(part_paths)):
+            with open(path, "rb") as fh:
+                if i:
+                    fh.readline()
+                shutil.copyfileobj(fh, out)
+
+
+def build_fixture(employees: int, seed: int) -> dict:
+    """One raw CSV per source for the given headcount, generated once and cached."""
+    fixture_dir = os.path.join(FIXTURE_ROOT, f"{employees}-{seed}")
+    meta_path = os.path.join(fixture_dir, "fixture.json")
+    if os.path.exists(meta_path):
+        with open(meta_path) as fh:
+            return json.load(fh)
+
+    parts_dir = os.path.join(fixture_dir, "parts")
+    results = generate_all(employees, output_dir=parts_dir, seed=seed)
+
+    fixture = {"employees": employees, "seed": seed, "files": {}, "rows": {}}
+    for dataset, (generated, _, _, _) in SOURCES.items():
+        parts = [r for r in results if r["dataset"] == generated]
+        path = os.path.join(fixture_dir, f"{generated}.csv")
+        concat_parts([r["path"] for r in parts], path)
+        fixture["files"][dataset] = path
+        fixture["rows"][dataset] = sum(r["rows"] for r in parts)
+
+    shutil.rmtree(parts_dir)
+    with open(meta_path, "w") as fh:
+        json.dump(fixture, fh, indent=2)
+    return fixture
+
+
+def run_stages(fixture: dict) -> list:
+    """Run the pipeline over fixture in the current directory; returns stage records."""
+    stages = []
+    rows = fixture["rows"]
+    total_rows = sum(rows.values())
+
+    landed = {}
+    with measure(stages, "extract_file", total_rows):
+        for dataset, (_, raw_dir, system, _) in SOURCES.items():
+            landed[dataset] = extract_file(fixture["files"][dataset], raw_dir, system)["path"]
+
+    for dataset, (_, _, _, clean) in SOURCES.items():
+        df = pd.read_csv(landed[dataset])
+        with measure(stages, clean.__name__, rows[dataset]):
+            cleaned = clean(df)
+
+        batch = os.path.basename(os.path.dirname(landed[dataset]))
+        write_staging(cleaned, dataset, os.path.join("data/staging", dataset, batch))
+        del df, cleaned
+
+    with measure(stages, "run_master_transform", rows["employee"]):
+        run_master_transform()
+
+    with measure(stages, "load_dimensions", rows["employee"]):
+        load_dimensions()
+
+    with measure(stages, "load_facts", total_rows):
+        load_facts()
+
+    return stages
+
+
+def run_scale(scale: str, seed: int, keep_workdir: bool = False) -> dict:
+    employees = BASE_EMPLOYEES * SCALES[scale]
+    fixture = build_fixture(employees, seed)
+
+    workdir = tempfile.mkdtemp(prefix=f"pipeline_bench_{scale}_")
+    previous = os.getcwd()
+    os.chdir(workdir)
+    # the loads read the warehouse DDL relative to the working directory
+    os.symlink(os.path.join(REPO_ROOT, "warehouse"), "warehouse")
+    catalog.invalidate()
+
+    try:
+        started_at = datetime.now(timezone.utc).isoformat()
+        stages = run_stages(fixture)
+    finally:
+        os.chdir(previous)
+        catalog.invalidate()
+        if keep_workdir:
+            print(f"Kept benchmark working directory: {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "started_at": started_at,
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "scale": scale,
+        "employees": employees,
+        "seed": seed,
+        "stages": stages,
+    }
+
+
+def append_history(run: dict, path: str = HISTORY_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a") as fh:
+        fh.write(json.dumps(run) + "\n")
+
+
+def load_baseline(path: str = BASELINE_PATH) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as fh:
+        return json.load(fh)
+
+
+def update_baseline(runs: list, path: str = BASELINE_PATH):
+    baseline = load_baseline(path)
+    for run in runs:
+        baseline[run["scale"]] = {
+            "commit": run["commit"],
+            "recorded_at": run["started_at"],
+            "stages": {
+                s["stage"]: {"seconds": s["seconds"], "peak_rss_mb": s["peak_rss_mb"]}
+                for s in run["stages"]
+            },
+        }
+
+    with open(path, "w") as fh:
+        json.dump(baseline, fh, indent=2, sort_keys=True)
+        fh.write("\n")
+
+
+def regressions(run: dict, baseline: dict, time_tolerance: float = TIME_TOLERANCE,
+                rss_tolerance: float = RSS_TOLERANCE) -> list:
+    """Human-readable regressions of run against the baseline of its scale."""
+    reference = baseline.get(run["scale"], {}).get("stages", {})
+    found = []
+    for stage in run["stages"]:
+        base = reference.get(stage["stage"])
+        if base is None:
+            continue
+
+        slower = stage["seconds"] - base["seconds"]
+        if slower > MIN_SECONDS and stage["seconds"] > base["seconds"] * (1 + time_tolerance):
+            found.append(f"{run['scale']} {stage['stage']}: {stage['seconds']:.2f}s vs {base['seconds']:.2f}s baseline")
+
+        if stage["peak_rss_mb"] > base["peak_rss_mb"] * (1 + rss_tolerance):
+            found.append(
+                f"{run['scale']} {stage['stage']}: peak RSS {stage['peak_rss_mb']:.0f} MB "
+                f"vs {base['peak_rss_mb']:.0f} MB baseline"
+            )
+    return found
+
+
+def print_run(run: dict):
+    print(f"\n{run['scale']} ({run['employees']} employees)")
+    print(f"{'stage':<24}{'seconds':>10}{'peak MB':>10}{'rows/s':>14}")
+    for s in run["stages"]:
+        print(f"{s['stage']:<24}{s['seconds']:>10.2f}{s['peak_rss_mb']:>10.0f}{s['rows_per_s'] or 0:>14,}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline stages on synthetic fixtures.")
+    parser.add_argument("--scales", nargs="+", choices=SCALES, default=["1x"])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="store this run as the baseline of its scales")
+    parser.add_argument("--time-tolerance", type=float, default=TIME_TOLERANCE)
+    parser.add_argument("--rss-tolerance", type=float, default=RSS_TOLERANCE)
+    parser.add_argument("--keep-workdir", action="store_true")
+    args = parser.parse_args()
+
+    baseline = load_baseline()
+    runs, found = [], []
+    for scale in args.scales:
+        run = run_scale(scale, args.seed, keep_workdir=args.keep_workdir)
+        append_history(run)
+        print_run(run)
+        runs.append(run)
+        found += regressions(run, baseline, args.time_tolerance, args.rss_tolerance)
+
+    if args.update_baseline:
+        update_baseline(runs)
+        print(f"\nBaseline updated: {BASELINE_PATH}")
+        return
+
+    if found:
+        print("\nRegressions against the baseline:")
+        for line in found:
+            print(f"  {line}")
+        sys.exit(1)
+
+    print(f"\nNo regressions. History: {HISTORY_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,42 @@
+import os
 from airflow import DAG
-from airflow.operators.bash import BashOperator
+from airflow.operators.python import PythonOperator
 from datetime import datetime
+from importlib import import_module
+
+PROJECT_ROOT = os.environ.get("PEOPLE_ANALYTICS_HOME", "/opt/airflow")
+
+# Created by airflow-init in docker-compose.yaml. Transforms share the CPU pool
+# and weigh it by pool_slots; the BigQuery upload only needs network.
+CPU_POOL = "people_analytics_cpu"
+IO_POOL = "people_analytics_io"
 
 default_args = {
     "owner": "airflow",
     "depends_on_past": False,
 }
 
+
+def run_entry_point(module: str, function: str, **kwargs):
+    # Imported in the task, not at parse time, so the scheduler never pays for
+    # pandas/pyarrow. Tasks fork from the worker instead of starting a fresh
+    # interpreter per step; the ETL uses paths relative to the project root.
+    os.chdir(PROJECT_ROOT)
+    getattr(import_module(module), function)(**kwargs)
+
+
+def etl_task(task_id: str, module: str, function: str, pool: str, pool_slots: int = 1,
+             priority_weight: int = 1, **kwargs) -> PythonOperator:
+    return PythonOperator(
+        task_id=task_id,
+        python_callable=run_entry_point,
+        op_kwargs={"module": module, "function": function, **kwargs},
+        pool=pool,
+        pool_slots=pool_slots,
+        priority_weight=priority_weight,
+    )
+
+
 with DAG(
     dag_id="people_analytics_etl",
     default_args=default_args,
@@ -16,22 +46,47 @@ with DAG(
     tags=["people", "etl"],
 ) as dag:
 
-    transform_employee = BashOperator(
-        task_id="transform_employee",
-        bash_command="python etl/transform/transform_employee.py",
-        cwd="/opt/airflow"
+    # attendance is by far the largest feed and sits on the critical path,
+    # so it gets more slots and is scheduled first
+    transform_attendance = etl_task(
+        "transform_attendance",
+        "etl.transform.transform_attendance", "run_attendance_transform",
+        pool=CPU_POOL, pool_slots=2, priority_weight=10,
+    )
+
+    transform_employee = etl_task(
+        "transform_employee",
+        "etl.transform.transform_employee", "run_employee_transform",
+        pool=CPU_POOL,
+    )
+
+    transform_engagement = etl_task(
+        "transform_engagement",
+        "etl.transform.transform_engagement", "run_engagement_transform",
+        pool=CPU_POOL,
+    )
+
+    transform_performance = etl_task(
+        "transform_performance",
+        "etl.transform.transform_performance", "run_performance_transform",
+        pool=CPU_POOL,
     )
 
-    transform_master = BashOperator(
-        task_id="transform_master",
-        bash_command="python etl/transform/transform_master.py",
-        cwd="/opt/airflow"
+    transform_master = etl_task(
+        "transform_master",
+        "etl.transform.transform_master", "run_master_transform",
+        pool=CPU_POOL, pool_slots=2,
     )
 
-    load_bigquery = BashOperator(
-        task_id="load_bigquery",
-        bash_command="python etl/load/load_to_bigquery.py",
-        cwd="/opt/airflow"
+    load_bigquery = etl_task(
+        "load_bigquery",
+        "etl.load.load_to_bigquery", "run_load_bigquery",
+        pool=IO_POOL,
     )
 
-    transform_employee >> transform_master >> load_bigquery
+    [
+        transform_attendance,
+        transform_employee,
+        transform_engagement,
+        transform_performance,
+    ] >> transform_master >> load_bigquery
@@ -0,0 +1,100 @@
+"""Discovery of the dated batch folders under data/raw and data/staging.
+
+Each directory is listed once with os.scandir and cached until its mtime
+changes, so resolving the latest batch of every feed costs one stat per
+directory on later calls. Batch folders are ordered by the date parsed from
+their name; anything that is not a date (scratch or state folders) is ignored.
+"""
+import os
+import threading
+from datetime import datetime
+
+RAW_ROOT = "data/raw"
+STAGING_ROOT = "data/staging"
+
+BATCH_DATE_FORMAT = "%Y-%m-%d"
+
+# path -> (st_mtime_ns, [(name, is_dir)])
+_listing_cache = {}
+_cache_lock = threading.Lock()
+
+
+def ensure_dir(path: str):
+    if not os.path.isdir(path):
+        os.makedirs(path, exist_ok=True)
+        # coarse mtimes on network filesystems may not move within a second
+        invalidate(os.path.dirname(os.path.normpath(path)))
+
+
+def invalidate(path: str = None):
+    """Forget the cached listing of path, or of every directory."""
+    with _cache_lock:
+        if path is None:
+            _listing_cache.clear()
+        else:
+            _listing_cache.pop(os.path.normpath(path), None)
+
+
+def list_dir(path: str) -> list:
+    """[(name, is_dir)] of path, rescanned only when its mtime changes."""
+    path = os.path.normpath(path)
+    mtime = os.stat(path).st_mtime_ns
+
+    with _cache_lock:
+        cached = _listing_cache.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+    with os.scandir(path) as it:
+        entries = [(entry.name, entry.is_dir()) for entry in it]
+
+    with _cache_lock:
+        _listing_cache[path] = (mtime, entries)
+    return entries
+
+
+def parse_batch_date(name: str):
+    try:
+        return datetime.strptime(name, BATCH_DATE_FORMAT).date()
+    except ValueError:
+        return None
+
+
+def batch_folders(base_path: str) -> list:
+    """Dated batch folders under base_path, oldest first."""
+    if not os.path.isdir(base_path):
+        raise FileNotFoundError(f"Batch path does not exist: {base_path}")
+
+    dated = []
+    for name, is_dir in list_dir(base_path):
+        batch_date = parse_batch_date(name) if is_dir else None
+        if batch_date is not None:
+            dated.append((batch_date, os.path.join(base_path, name)))
+
+    return [path for _, path in sorted(dated)]
+
+
+def latest_batch_folder(base_path: str) -> str:
+    folders = batch_folders(base_path)
+    if not folders:
+        raise FileNotFoundError(f"No dated folder found in: {base_path}")
+    return folders[-1]
+
+
+def latest_batch_file(folder: str, suffix: str = ".csv") -> str:
+    files = sorted(name for name, is_dir in list_dir(folder) if not is_dir and name.endswith(suffix))
+    if not files:
+        raise FileNotFoundError(f"No {suffix} files inside: {folder}")
+    return os.path.join(folder, files[-1])
+
+
+def staging_root(dataset: str) -> str:
+    return os.path.join(STAGING_ROOT, dataset)
+
+
+def latest_staging_folder(dataset: str) -> str:
+    return latest_batch_folder(staging_root(dataset))
+
+
+def latest_staging_folders(datasets=("employee", "attendance", "engagement", "performance")) -> dict:
+    return {dataset: latest_staging_folder(dataset) for dataset in datasets}
@@ -1,56 +1,249 @@
 import os
+import glob
+import json
+import time
 import shutil
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 import uuid
 
-def ensure_dir(path: str):
-    if not os.path.exists(path):
-        os.makedirs(path)
+from etl.catalog import ensure_dir, latest_batch_file, latest_batch_folder
+from etl.instrumentation import add_step, count, instrumented
 
-def extract_file(source_path: str, raw_target_dir: str, source_system: str):
+HASH_CHUNK_BYTES = 1024 * 1024
+COPY_BUFFER_BYTES = 8 * 1024 * 1024
+MANIFEST_FILE = "manifest.jsonl"
+
+# copies are I/O bound; a small pool overlaps them without thrashing the disk
+EXTRACT_WORKERS = int(os.environ.get("EXTRACT_WORKERS", 4))
+
+# (source file, raw landing dir, source system)
+SOURCES = [
+    ("data/raw/attendance/attendance_logs.csv", "data/raw/attendance", "attendance_system"),
+    ("data/raw/engagement/engagement_surveys.csv", "data/raw/engagement", "engagement_system"),
+    ("data/raw/performance/performance_reviews.csv", "data/raw/performance", "performance_system"),
+    ("data/raw/ibm_hr/employee_data.csv", "data/raw/ibm_hr", "hr_core_system"),
+]
+
+_manifest_lock = threading.Lock()
+
+# Linux FICLONE ioctl: copy-on-write clone on btrfs/xfs/overlayfs, no data copied
+FICLONE = 0x40049409
+
+def hash_file(path: str) -> dict:
+    """Stream the file once and return its sha256, size and data row count."""
+    digest = hashlib.sha256()
+    size = 0
+    newlines = 0
+    last_byte = b""
+
+    with open(path, "rb") as fh:
+        while True:
+            chunk = fh.read(HASH_CHUNK_BYTES)
+            if not chunk:
+                break
+            digest.update(chunk)
+            size += len(chunk)
+            newlines += chunk.count(b"\n")
+            last_byte = chunk[-1:]
+
+    lines = newlines + (1 if last_byte not in (b"", b"\n") else 0)
+    return {
+        "sha256": digest.hexdigest(),
+        "size_bytes": size,
+        "row_count": max(lines - 1, 0),
+    }
+
+def read_manifest(folder: str) -> list:
+    manifest_path = os.path.join(folder, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return []
+
+    with open(manifest_path) as mf:
+        return [json.loads(line) for line in mf if line.strip()]
+
+def append_manifest(folder: str, entry: dict) -> str:
+    manifest_path = os.path.join(folder, MANIFEST_FILE)
+    with _manifest_lock:
+        with open(manifest_path, "a") as mf:
+            mf.write(json.dumps(entry) + "\n")
+    return manifest_path
+
+def latest_landed_batch(raw_target_dir: str):
+    """The batch downstream transforms read now, or None before the first landing."""
+    try:
+        return latest_batch_file(latest_batch_folder(raw_target_dir))
+    except FileNotFoundError:
+        return None
+
+def find_landed_copy(raw_target_dir: str, fingerprint: dict):
+    """Return the path of any landed batch with the same content, if any."""
+    recorded = set()
+    for manifest_path in glob.glob(os.path.join(raw_target_dir, "*", MANIFEST_FILE)):
+        for entry in read_manifest(os.path.dirname(manifest_path)):
+            recorded.add(entry["path"])
+            if entry["sha256"] == fingerprint["sha256"] and os.path.exists(entry["path"]):
+                return entry["path"]
+
+    # batches landed before manifest.jsonl existed; only same-sized files can match
+    for path in glob.glob(os.path.join(raw_target_dir, "*", "*.csv")):
+        if path in recorded or os.path.getsize(path) != fingerprint["size_bytes"]:
+            continue
+        if hash_file(path)["sha256"] == fingerprint["sha256"]:
+            return path
+
+    return None
+
+def _reflink(source_path: str, target_path: str) -> bool:
+    try:
+        import fcntl
+        with open(source_path, "rb") as src, open(target_path, "wb") as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        return True
+    except (ImportError, OSError):
+        if os.path.exists(target_path):
+            os.remove(target_path)
+        return False
+
+def copy_file(source_path: str, target_path: str):
+    """Kernel-side copy with sendfile, or large-buffer copy where it is unavailable."""
+    with open(source_path, "rb") as src, open(target_path, "wb") as dst:
+        if hasattr(os, "sendfile"):
+            try:
+                offset = 0
+                size = os.fstat(src.fileno()).st_size
+                while offset < size:
+                    sent = os.sendfile(dst.fileno(), src.fileno(), offset, size - offset)
+                    if sent == 0:
+                        break
+                    offset += sent
+                return
+            except OSError:
+                src.seek(0)
+                dst.seek(0)
+                dst.truncate()
+
+        shutil.copyfileobj(src, dst, COPY_BUFFER_BYTES)
+
+def land_file(source_path: str, target_path: str, link_mode: str = "auto") -> str:
+    """Materialise source at target; returns the method used.
+
+    "auto" tries a reflink and falls back to a copy. "hardlink" shares the
+    source inode instead of copying, which is only safe when sources are
+    replaced atomically rather than rewritten in place.
+    """
+    if link_mode in ("auto", "reflink") and _reflink(source_path, target_path):
+        return "reflink"
+
+    if link_mode == "hardlink":
+        try:
+            os.link(source_path, target_path)
+            return "hardlink"
+        except OSError:
+            pass
+
+    copy_file(source_path, target_path)
+    return "copy"
+
+def content_hash(batch_path: str) -> str:
+    """sha256 of a landed batch, from its manifest entry or hashed for legacy batches."""
+    for entry in read_manifest(os.path.dirname(batch_path)):
+        if os.path.abspath(entry["path"]) == os.path.abspath(batch_path):
+            return entry["sha256"]
+    return hash_file(batch_path)["sha256"]
+
+def extract_file(source_path: str, raw_target_dir: str, source_system: str, link_mode: str = "auto") -> dict:
     if not os.path.exists(source_path):
         raise FileNotFoundError(f"Source file doesnt exist: {source_path}")
-    
-    extract_date = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+    started = time.perf_counter()
+    extracted_at = datetime.now(timezone.utc)
+    extract_date = extracted_at.strftime("%Y-%m-%d")
     batch_id = str(uuid.uuid4())[:8]
 
     target_folder = os.path.join(raw_target_dir, extract_date)
-    ensure_dir(target_folder)
 
     filename = os.path.basename(source_path)
-    target_filename = f"{source_system}_batch_{batch_id}.csv"
-    target_path = os.path.join(target_folder, target_filename)
+    fingerprint = hash_file(source_path)
 
-    shutil.copy(source_path, target_path)
+    entry = {
+        "extracted_at": str(extracted_at),
+        "source_system": source_system,
+        "source_file": filename,
+        "batch_id": batch_id,
+        **fingerprint,
+    }
 
-    print(f"Data extracted from {source_system}: {target_path}")
+    # only the batch downstream reads counts: content reverting to an older
+    # batch (A -> B -> A) must land again so the latest folder serves it
+    latest_path = latest_landed_batch(raw_target_dir)
+    if latest_path and content_hash(latest_path) == fingerprint["sha256"]:
+        target_folder = os.path.dirname(latest_path)
+        entry.update(path=latest_path, status="unchanged", method=None)
+        print(f"No changes from {source_system}, content already landed at: {latest_path}")
+    else:
+        ensure_dir(target_folder)
+        # the time of day keeps batches landed on one date in landing order for latest_batch_file
+        target_filename = f"{source_system}_batch_{extracted_at:%H%M%S%f}_{batch_id}.csv"
+        target_path = os.path.join(target_folder, target_filename)
 
-    manifest_path = os.path.join(target_folder, "manifest.txt")
-    with open(manifest_path, "a") as mf:
-        mf.write(f"{datetime.now(timezone.utc)} | {source_system} | {filename} | batch = {batch_id}\n")
-        print(f"Manifest updated: {manifest_path}")
+        earlier_copy = find_landed_copy(raw_target_dir, fingerprint)
+        if earlier_copy:
+            # landed batches are never rewritten, so the new one can share the earlier inode
+            method = land_file(earlier_copy, target_path, "hardlink")
+            entry.update(reused=earlier_copy)
+        else:
+            method = land_file(source_path, target_path, link_mode)
+        entry.update(path=target_path, status="landed", method=method)
+        print(f"Data extracted from {source_system} ({method}): {target_path}")
 
-def run_extract():
-    print("Starting extract process...\n")
+    elapsed = time.perf_counter() - started
+    entry.update(
+        elapsed_s=round(elapsed, 3),
+        mb_per_s=round(fingerprint["size_bytes"] / 1e6 / elapsed, 1) if elapsed > 0 else None,
+    )
 
-    attendance_src = "data/raw/attendance/attendance_logs.csv"
-    engagement_src = "data/raw/engagement/engagement_surveys.csv"
-    performance_src = "data/raw/performance/performance_reviews.csv"
-    ibm_hr_src = "data/raw/ibm_hr/employee_data.csv"
+    manifest_path = append_manifest(target_folder, entry)
+    print(f"Manifest updated: {manifest_path}")
 
-    attendance_target = "data/raw/attendance"
-    engagement_target = "data/raw/engagement"
-    performance_target = "data/raw/performance"
-    ibm_hr_target = "data/raw/ibm_hr"
+    return entry
 
-    extract_file(attendance_src, attendance_target, source_system="attendance_system")
-    extract_file(engagement_src, engagement_target, source_system="engagement_system")
-    extract_file(performance_src, performance_target, source_system="performance_system")
-    extract_file(ibm_hr_src, ibm_hr_target, source_system="hr_core_system")
+@instrumented("extract")
+def run_extract(concurrent: bool = True, max_workers: int = EXTRACT_WORKERS, sources=SOURCES) -> list:
+    print("Starting extract process...\n")
+    started = time.perf_counter()
 
-    print("\nExtract process done.")
+    if concurrent:
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="extract") as pool:
+            futures = [
+                pool.submit(extract_file, src, target, source_system=system)
+                for src, target, system in sources
+            ]
+            results = [f.result() for f in futures]
+    else:
+        results = [
+            extract_file(src, target, source_system=system)
+            for src, target, system in sources
+        ]
 
-if __name__ == "__main__":
-    run_extract()
+    print("")
+    for entry in results:
+        landed = entry["status"] == "landed"
+        count(
+            rows_in=entry["row_count"], bytes_read=entry["size_bytes"],
+            rows_out=entry["row_count"] if landed else 0, bytes_written=entry["size_bytes"] if landed else 0,
+        )
+        add_step(entry["source_system"], entry["elapsed_s"])
+        print(
+            f"{entry['source_system']}: {entry['status']}, "
+            f"{entry['size_bytes'] / 1e6:.1f} MB in {entry['elapsed_s']:.2f}s "
+            f"({entry['mb_per_s']} MB/s)"
+        )
 
+    print(f"\nExtract process done in {time.perf_counter() - started:.2f}s.")
+    return results
 
+if __name__ == "__main__":
+    run_extract()
@@ -0,0 +1,323 @@
+"""Stage-level metrics and opt-in profiling for the ETL entry points.
+
+Every extract, transform and load entry point runs inside stage(), which
+records rows in/out, bytes read/written, wall and CPU time, peak RSS and the
+timings of named sub-steps (read, clean, sort, write, ...). Code called from a
+stage can add to it through the module-level count() and step() without being
+handed the stage; outside a stage both do nothing.
+
+Finished stages are appended as one JSON object per line to ETL_METRICS_LOG
+("-" for stderr, empty to disable). With ETL_PROMETHEUS_TEXTFILE set, the
+latest value of every stage is also written there in the Prometheus text
+format, for node_exporter's textfile collector.
+
+ETL_PROFILE=cprofile (or pyinstrument, if installed) profiles the stages
+listed in ETL_PROFILE_STAGES (all by default) and writes the report to
+data/state/profiles. Profilers only see the thread that opened the stage.
+
+    ETL_PROFILE=cprofile ETL_PROFILE_STAGES=transform_attendance python -m etl.pipeline
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import threading
+import resource
+import functools
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from etl.catalog import ensure_dir
+
+METRICS_LOG = os.environ.get("ETL_METRICS_LOG", "data/state/metrics/stages.jsonl")
+PROMETHEUS_TEXTFILE = os.environ.get("ETL_PROMETHEUS_TEXTFILE")
+
+PROFILER = os.environ.get("ETL_PROFILE", "")
+PROFILE_STAGES = {s for s in os.environ.get("ETL_PROFILE_STAGES", "").split(",") if s}
+PROFILE_DIR = "data/state/profiles"
+PROFILE_TOP_FUNCTIONS = 25
+
+COUNTERS = ("rows_in", "rows_out", "bytes_read", "bytes_written")
+
+# one id per process, so the stages of one pipeline run can be grouped
+RUN_ID = uuid.uuid4().hex[:12]
+
+_local = threading.local()
+_lock = threading.Lock()
+# number of stages open in any thread; the RSS peak is only reset by the outermost
+_open_stages = 0
+_profiling = False
+# stage -> last finished record, for the textfile dump
+_latest = {}
+
+
+def reset_peak_rss() -> bool:
+    # Linux resets VmHWM on this write; elsewhere the peak only ever grows
+    try:
+        with open("/proc/self/clear_refs", "w") as fh:
+            fh.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as fh:
+            for line in fh:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class Stage:
+    """Counters and sub-step timings of one running stage."""
+
+    def __init__(self, name: str, labels: dict):
+        self.name = name
+        self.labels = labels
+        self.status = "ok"
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.steps = {}
+
+    def count(self, **counters):
+        for key, value in counters.items():
+            self.counters[key] += int(value)
+
+    def add_step(self, name: str, seconds: float):
+        self.steps[name] = self.steps.get(name, 0.0) + seconds
+
+    @contextmanager
+    def step(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.add_step(name, time.perf_counter() - started)
+
+
+def current_stage():
+    stack = getattr(_local, "stack", None)
+    return stack[-1] if stack else None
+
+
+def count(**counters):
+    """Add to the counters of the innermost stage of this thread, if any."""
+    stage_ = current_stage()
+    if stage_ is not None:
+        stage_.count(**counters)
+
+
+def add_step(name: str, seconds: float):
+    """Record a sub-step timed elsewhere, e.g. by a worker thread."""
+    stage_ = current_stage()
+    if stage_ is not None:
+        stage_.add_step(name, seconds)
+
+
+@contextmanager
+def step(name: str):
+    """Time a sub-step of the innermost stage of this thread, if any."""
+    stage_ = current_stage()
+    if stage_ is None:
+        yield None
+        return
+    with stage_.step(name):
+        yield stage_
+
+
+def set_status(status: str):
+    """Mark the innermost stage of this thread, e.g. "skipped" for unchanged input."""
+    stage_ = current_stage()
+    if stage_ is not None:
+        stage_.status = status
+
+
+def should_profile(name: str) -> bool:
+    return bool(PROFILER) and (not PROFILE_STAGES or name in PROFILE_STAGES)
+
+
+@contextmanager
+def profiled(name: str):
+    """Run the block under the configured profiler and save its report."""
+    global _profiling
+    with _lock:
+        # one profiler at a time; nested or concurrent stages run unprofiled
+        if _profiling or not should_profile(name):
+            active = False
+        else:
+            _profiling = active = True
+
+    if not active:
+        yield
+        return
+
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+    ensure_dir(PROFILE_DIR)
+    try:
+        if PROFILER == "cprofile":
+            import cProfile
+            import pstats
+
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+                path = os.path.join(PROFILE_DIR, f"{name}-{stamp}.prof")
+                profiler.dump_stats(path)
+                pstats.Stats(profiler, stream=sys.stderr).sort_stats("cumulative").print_stats(PROFILE_TOP_FUNCTIONS)
+        elif PROFILER == "pyinstrument":
+            try:
+                from pyinstrument import Profiler
+            except ImportError as exc:
+                raise RuntimeError("ETL_PROFILE=pyinstrument needs the pyinstrument package") from exc
+
+            profiler = Profiler()
+            profiler.start()
+            try:
+                yield
+            finally:
+                profiler.stop()
+                path = os.path.join(PROFILE_DIR, f"{name}-{stamp}.html")
+                with open(path, "w") as fh:
+                    fh.write(profiler.output_html())
+        else:
+            raise ValueError(f"Unknown ETL_PROFILE: {PROFILER}")
+    finally:
+        with _lock:
+            _profiling = False
+
+    print(f"Profile of {name} saved to: {path}")
+
+
+@contextmanager
+def stage(name: str, **labels):
+    """Measure one ETL stage and emit its metrics when it ends."""
+    global _open_stages
+    with _lock:
+        if _open_stages == 0:
+            reset_peak_rss()
+        _open_stages += 1
+
+    stage_ = Stage(name, labels)
+    stack = _local.__dict__.setdefault("stack", [])
+    stack.append(stage_)
+
+    started_at = datetime.now(timezone.utc).isoformat()
+    wall_started = time.perf_counter()
+    cpu_started = time.process_time()
+    error = None
+    try:
+        with profiled(name):
+            yield stage_
+    except BaseException as exc:
+        stage_.status = "error"
+        error = f"{type(exc).__name__}: {exc}"
+        raise
+    finally:
+        stack.pop()
+        with _lock:
+            _open_stages -= 1
+
+        record = {
+            "run_id": RUN_ID,
+            "stage": name,
+            "status": stage_.status,
+            "started_at": started_at,
+            "wall_s": round(time.perf_counter() - wall_started, 4),
+            # process-wide, so worker threads of the stage are included
+            "cpu_s": round(time.process_time() - cpu_started, 4),
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+            **stage_.counters,
+            "steps": {k: round(v, 4) for k, v in stage_.steps.items()},
+            **({"labels": labels} if labels else {}),
+            **({"error": error} if error else {}),
+        }
+        emit(record)
+
+
+def instrumented(name: str):
+    """Decorator running the whole function as one stage."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def emit(record: dict):
+    line = json.dumps(record, default=str)
+    with _lock:
+        _latest[record["stage"]] = record
+        if METRICS_LOG == "-":
+            print(line, file=sys.stderr)
+        elif METRICS_LOG:
+            ensure_dir(os.path.dirname(METRICS_LOG) or ".")
+            with open(METRICS_LOG, "a") as fh:
+                fh.write(line + "\n")
+
+        if PROMETHEUS_TEXTFILE:
+            write_textfile(PROMETHEUS_TEXTFILE, list(_latest.values()))
+
+
+def _label_value(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{key}="{_label_value(value)}"' for key, value in labels.items()) + "}"
+
+
+# metric -> (record field, help text)
+PROMETHEUS_METRICS = {
+    "etl_stage_wall_seconds": ("wall_s", "Wall time of the last run of the stage."),
+    "etl_stage_cpu_seconds": ("cpu_s", "Process CPU time during the last run of the stage."),
+    "etl_stage_peak_rss_bytes": ("peak_rss_mb", "Peak resident memory during the last run of the stage."),
+    "etl_stage_rows_in": ("rows_in", "Rows read by the last run of the stage."),
+    "etl_stage_rows_out": ("rows_out", "Rows written by the last run of the stage."),
+    "etl_stage_bytes_read": ("bytes_read", "Bytes read by the last run of the stage."),
+    "etl_stage_bytes_written": ("bytes_written", "Bytes written by the last run of the stage."),
+}
+
+
+def write_textfile(path: str, records: list):
+    """Write the records as Prometheus gauges, atomically for the collector."""
+    lines = []
+    for metric, (field, help_text) in PROMETHEUS_METRICS.items():
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} gauge"]
+        for record in records:
+            value = int(record[field] * 1024 * 1024) if field == "peak_rss_mb" else record[field]
+            lines.append(f"{metric}{_labels(stage=record['stage'])} {value}")
+
+    lines += ["# HELP etl_stage_step_seconds Wall time of each sub-step of the stage.",
+              "# TYPE etl_stage_step_seconds gauge"]
+    for record in records:
+        for step_name, seconds in record["steps"].items():
+            lines.append(f"etl_stage_step_seconds{_labels(stage=record['stage'], step=step_name)} {seconds}")
+
+    lines += ["# HELP etl_stage_success Whether the last run of the stage finished without error.",
+              "# TYPE etl_stage_success gauge"]
+    for record in records:
+        lines.append(f"etl_stage_success{_labels(stage=record['stage'])} {int(record['status'] != 'error')}")
+
+    lines += ["# HELP etl_stage_last_run_timestamp_seconds Start of the last run of the stage.",
+              "# TYPE etl_stage_last_run_timestamp_seconds gauge"]
+    for record in records:
+        started = datetime.fromisoformat(record["started_at"]).timestamp()
+        lines.append(f"etl_stage_last_run_timestamp_seconds{_labels(stage=record['stage'])} {started:.3f}")
+
+    ensure_dir(os.path.dirname(path) or ".")
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as fh:
+        fh.write("\n".join(lines) + "\n")
+    os.replace(tmp_path, path)
@@ -1,36 +1,42 @@
-import os
-import duckdb
-import pandas as pd
-
-def get_latest_staging_folder(path:str) -> str:
-    folders = [
-        f for f in os.listdir(path)
-        if os.path.isdir(os.path.join(path, f))
-    ]
-
-    if not folders:
-        raise FileNotFoundError(f"No staging folder exists in: {path}")
-    
-    folders.sort(reverse=True)
-    return os.path.join(path, folders[0])
-
-def load_dimensions():
+from etl.catalog import latest_staging_folder
+from etl.instrumentation import count, instrumented, step
+from etl.load.load_facts import load_full, load_incremental
+from etl.load.warehouse_schema import connect_warehouse
+from etl.staging import to_arrow
+from etl.transform.transform_master_duckdb import staging_scan
+
+@instrumented("load_dimensions")
+def load_dimensions(frames: dict = None, incremental: bool = False, batch_dates: dict = None):
+    """Load dim_employee (and dim_department through it) and master_dataset.
+
+    By default dim_employee is replaced, keeping every employee's surrogate
+    key; frames maps dataset -> DataFrame to skip the staging read, with
+    batch_dates mapping dataset -> its extract date.
+    incremental upserts dim_employee by employee_id from new staging batches.
+    master_dataset is derived from the whole history, so it is always replaced.
+    """
     print("Loading dimension tables...")
-    
-    con = duckdb.connect("data/warehouse/people_analytics.duckdb")
-
-    emp_folder = get_latest_staging_folder("data/staging/employee")
-    emp_path = os.path.join(emp_folder, "employee_cleaned.csv")
-
-    df_emp = pd.read_csv(emp_path)
-    con.execute("CREATE OR REPLACE TABLE dim_employee AS SELECT * FROM df_emp")
-
-    master_folder = get_latest_staging_folder("data/staging/master")
-    master_path = os.path.join(master_folder, "master_dataset.csv")
 
-    df_master = pd.read_csv(master_path)
-    con.execute("CREATE OR REPLACE master_dataset AS SELECT * FROM df_master")
-    print(f"Loaded master_dataset from: {master_path}")
+    con = connect_warehouse()
+    frames = frames or {}
+
+    with step("dim_employee"):
+        if incremental:
+            load_incremental(con, "employee", "dim_employee")
+        else:
+            emp_source = load_full(con, "employee", "dim_employee", frames, batch_dates)
+            print(f"Loaded dim_employee from: {emp_source}")
+
+    with step("master_dataset"):
+        if "master" in frames:
+            master_table = to_arrow(frames["master"], "master")
+            master_source = "memory"
+            con.execute("CREATE OR REPLACE TABLE master_dataset AS SELECT * FROM master_table")
+        else:
+            master_source = latest_staging_folder("master")
+            con.execute(f"CREATE OR REPLACE TABLE master_dataset AS SELECT * FROM {staging_scan('master', master_source)}")
+    count(rows_out=con.execute("SELECT count(*) FROM master_dataset").fetchone()[0])
+    print(f"Loaded master_dataset from: {master_source}")
 
     con.close()
     print("Dimension load completed.")
@@ -1,44 +1,310 @@
-import os 
-import duckdb
-import pandas as pd 
-
-def get_latest_staging_folder(path:str) -> str:
-    folders = [
-        f for f in os.listdir(path)
-        if os.path.isdir(os.path.join(path, f))
-    ]
-
-    if not folders:
-        raise FileNotFoundError(f"No staging folder exists in: {path}")
-    
-    folders.sort(reverse=True)
-    return os.path.join(path, folders[0])
-
-def load_facts():
-    print("Loading fact tables...")
+import os
+
+from etl.catalog import batch_folders, latest_staging_folder, staging_root
+from etl.instrumentation import count, instrumented, step
+from etl.load.warehouse_schema import connect_warehouse
+from etl.sql import quote
+from etl.staging import batch_fingerprint, to_arrow
+from etl.transform.date_dimension import date_dimension
+from etl.transform.transform_attendance import UNKNOWN_STATUS
+from etl.transform.transform_master_duckdb import column_types, staging_scan
+
+# warehouse table -> staging dataset it is loaded from
+FACT_TABLES = {
+    "fact_attendance": "attendance",
+    "fact_engagement": "engagement",
+    "fact_performance": "performance",
+    "fact_attrition": "employee",
+}
+
+# Business keys for upserts. The last key is the one batches arrive ordered
+# by: rows are inserted sorted on it first, and its min/max bounds the rows
+# a batch can replace.
+TABLE_KEYS = {
+    "fact_attendance": ["employee_key", "date"],
+    "fact_engagement": ["employee_key", "survey_id"],
+    "fact_performance": ["employee_key", "review_date"],
+    "fact_attrition": ["employee_key", "snapshot_date"],
+    "dim_employee": ["employee_key"],
+}
+
+# etl_load_state fingerprint of full-replace loads
+REPLACE_FINGERPRINT = "replace"
+
+# date column of each fact; dim_date is kept covering their range
+FACT_DATE_COLUMNS = {
+    "fact_attendance": "date",
+    "fact_engagement": "survey_date",
+    "fact_performance": "review_date",
+    "fact_attrition": "snapshot_date",
+}
+
+# Attendance batches staged before status_label existed only hold the presence
+# code, which no longer tells remote from present or leave from absent.
+STATUS_LABELS = {0: "absent", 0.5: "late", 1: "present"}
+
+# staged columns that older batches lack, derived from what they do hold
+STAGED_FALLBACKS = {
+    "fact_attendance": {
+        "status_label": "CASE b.status " + " ".join(
+            f"WHEN {code} THEN '{label}'" for code, label in STATUS_LABELS.items()
+        ) + f" ELSE '{UNKNOWN_STATUS}' END",
+    },
+}
+
+def date_key_sql(expr: str) -> str:
+    return f"CAST(strftime({expr}, '%Y%m%d') AS INTEGER)"
+
+# Warehouse columns that are not a plain cast of the staged column with the
+# same name, as SQL over the staged batch (b), dim_employee (emp) and
+# dim_department (dep). {snapshot} is the batch date.
+COLUMN_EXPRESSIONS = {
+    "*": {
+        "employee_key": "emp.employee_key",
+        "department_key": "dep.department_key",
+        "snapshot_date": "{snapshot}",
+    },
+    "fact_attendance": {
+        "status": "b.status_label",
+        "date_key": date_key_sql("b.date"),
+    },
+    "fact_engagement": {
+        "date_key": date_key_sql("b.survey_date"),
+    },
+    "fact_performance": {
+        "promotion_recommendation": "b.promotion_recommendation = 'Yes'",
+        "date_key": date_key_sql("b.review_date"),
+    },
+    "fact_attrition": {
+        "is_terminated": "b.employmentstatus = 'Terminated'",
+        "tenure_days": "{snapshot} - CAST(b.hiredate AS DATE)",
+        "date_key": date_key_sql("{snapshot}"),
+    },
+    "dim_employee": {
+        "overtime": "b.overtime = 'Yes'",
+    },
+}
+
+def pending_batches(con, dataset: str, table: str) -> list:
+    """Staging folders of dataset not yet loaded into table, oldest first."""
+    loaded = set(con.execute(
+        "SELECT batch, fingerprint FROM etl_load_state WHERE table_name = ?", [table]
+    ).fetchall())
+
+    pending = []
+    for folder in batch_folders(staging_root(dataset)):
+        name = os.path.basename(folder)
+        fingerprint = batch_fingerprint(dataset, folder)
+        if (name, fingerprint) not in loaded:
+            pending.append((name, folder, fingerprint))
+
+    return pending
+
+def ensure_employee_keys(con):
+    # late-arriving ids get a key now; their dim_employee row is filled in
+    # when the employee batch that carries them is loaded
+    con.execute("""
+        INSERT INTO dim_employee (employee_key, employee_id)
+        SELECT nextval('employee_key_seq'), employee_id
+        FROM (SELECT DISTINCT employee_id FROM _batch WHERE employee_id IS NOT NULL) AS ids
+        WHERE employee_id NOT IN (SELECT employee_id FROM dim_employee)
+        ORDER BY employee_id
+    """)
+
+def ensure_department_keys(con):
+    con.execute("""
+        INSERT INTO dim_department
+        SELECT nextval('department_key_seq'), department
+        FROM (SELECT DISTINCT CAST(department AS VARCHAR) AS department FROM _batch WHERE department IS NOT NULL) AS names
+        WHERE department NOT IN (SELECT department_name FROM dim_department)
+        ORDER BY department
+    """)
+
+def typed_select(con, table: str, snapshot: str) -> str:
+    """SELECT producing table's declared columns and types from the staged batch."""
+    staged = {name for name, _ in column_types(con, "_batch")}
+    expressions = {**COLUMN_EXPRESSIONS["*"], **COLUMN_EXPRESSIONS.get(table, {})}
+
+    projections = []
+    for name, col_type in column_types(con, table):
+        if name in expressions:
+            expr = expressions[name].format(snapshot=f"DATE '{snapshot}'")
+        elif name in staged:
+            expr = f"b.{quote(name)}"
+        else:
+            expr = "NULL"
+        projections.append(f"CAST({expr} AS {col_type}) AS {quote(name)}")
+
+    department_join = (
+        "LEFT JOIN dim_department dep ON dep.department_name = CAST(b.department AS VARCHAR)"
+        if "department" in staged else
+        "LEFT JOIN (SELECT NULL AS department_key) dep ON true"
+    )
+
+    return f"""
+        SELECT {", ".join(projections)}
+        FROM _batch b
+        JOIN dim_employee emp ON emp.employee_id = b.employee_id
+        {department_join}
+    """
 
-    con = duckdb.connect("data/warehouse/people_analytics.duckdb")
+def load_batch(con, table: str, source: str, snapshot: str, replace: bool = False) -> tuple:
+    """Upsert one staged batch into a typed warehouse table.
 
-    att_folder = get_latest_staging_folder("data/staging/attendance")
-    att_path = os.path.join(att_folder, "attendance_cleaned.csv")
+    Returns (rows, low, high): the row count and the batch's range on its
+    last key.
 
-    df_att = pd.read_csv(att_path)
-    con.execute("CREATE OR REPLACE TABLE fact_attendance AS SELECT * FROM df_att")
-    print(f"Loaded fact_attendance from: {att_path}")
+    source is any relation DuckDB can scan: a staging file scanner or a
+    registered DataFrame. Rows whose keys appear in the batch are replaced;
+    with replace=True the whole table is. The delete is bounded by the batch's
+    range on its last key, so zone maps skip the row groups of older history.
+    """
+    keys = TABLE_KEYS[table]
+    range_key = quote(keys[-1])
+    order = ", ".join(quote(k) for k in [keys[-1]] + keys[:-1])
 
-    eng_folder = get_latest_staging_folder("data/staging/engagement")
-    enp_path = os.path.join(eng_folder, "engagement_cleaned.csv")
+    con.execute(f"""
+        CREATE OR REPLACE TEMP TABLE _batch AS
+        SELECT * REPLACE (CAST(employee_id AS INTEGER) AS employee_id)
+        FROM {source}
+    """)
+    staged = {name for name, _ in column_types(con, "_batch")}
+    for name, expr in STAGED_FALLBACKS.get(table, {}).items():
+        if name not in staged:
+            con.execute(f"ALTER TABLE _batch ADD COLUMN {quote(name)} VARCHAR")
+            con.execute(f"UPDATE _batch AS b SET {quote(name)} = {expr}")
+    ensure_employee_keys(con)
+    if "department" in staged:
+        ensure_department_keys(con)
+
+    con.execute(f"CREATE OR REPLACE TEMP TABLE _rows AS {typed_select(con, table, snapshot)}")
+    low, high, rows = con.execute(f"SELECT min({range_key}), max({range_key}), count(*) FROM _rows").fetchone()
+
+    if replace:
+        con.execute(f"DELETE FROM {table}")
+    elif rows:
+        matches = " AND ".join(f"{table}.{quote(k)} = _rows.{quote(k)}" for k in keys)
+        con.execute(
+            f"DELETE FROM {table} USING _rows WHERE {table}.{range_key} BETWEEN ? AND ? AND {matches}",
+            [low, high],
+        )
+    con.execute(f"INSERT INTO {table} BY NAME SELECT * FROM _rows ORDER BY {order}")
+
+    con.execute("DROP TABLE _rows")
+    con.execute("DROP TABLE _batch")
+    return rows, low, high
+
+def record_load(con, table: str, batch: str, fingerprint: str, rows: int, low, high):
+    count(rows_out=rows)
+    con.execute(
+        "INSERT INTO etl_load_state BY NAME "
+        "SELECT ? AS table_name, ? AS batch, ? AS fingerprint, ? AS row_count, now() AS loaded_at, "
+        "CAST(? AS VARCHAR) AS range_low, CAST(? AS VARCHAR) AS range_high",
+        [table, batch, fingerprint, rows, low, high],
+    )
+
+def load_incremental(con, dataset: str, table: str) -> int:
+    """Apply every pending staging batch of dataset to table; returns batches applied."""
+    applied = 0
+    for name, folder, fingerprint in pending_batches(con, dataset, table):
+        con.execute("BEGIN TRANSACTION")
+        try:
+            rows, low, high = load_batch(con, table, staging_scan(dataset, folder), snapshot=name)
+            record_load(con, table, name, fingerprint, rows, low, high)
+            con.execute("COMMIT")
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+
+        applied += 1
+        print(f"Upserted {rows} rows into {table} from: {folder}")
+
+    if not applied:
+        print(f"{table} is up to date.")
+
+    return applied
+
+def load_full(con, dataset: str, table: str, frames: dict, batch_dates: dict = None) -> str:
+    """Replace table from the latest staging batch, or from frames[dataset].
+
+    An in-memory frame needs its extract date in batch_dates: it stamps the
+    rows as the staging folder's name does for the file-based load.
+    """
+    if dataset in frames:
+        if not (batch_dates or {}).get(dataset):
+            raise ValueError(f"No batch date given for the in-memory {dataset} frame")
+        con.register("_frame", to_arrow(frames[dataset], dataset))
+        label, source, snapshot = "memory", "_frame", batch_dates[dataset]
+    else:
+        label = latest_staging_folder(dataset)
+        source, snapshot = staging_scan(dataset, label), os.path.basename(label)
+
+    con.execute("BEGIN TRANSACTION")
+    try:
+        rows, low, high = load_batch(con, table, source, snapshot, replace=True)
+        # recorded so summaries see the reload; the fingerprint never matches a staged batch
+        record_load(con, table, label, REPLACE_FINGERPRINT, rows, low, high)
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+    finally:
+        if dataset in frames:
+            con.unregister("_frame")
+
+    return label
+
+def extend_date_dimension(con) -> int:
+    """Add the dim_date rows the loaded facts reach beyond; returns rows added."""
+    bounds = " UNION ALL ".join(
+        f"SELECT min({quote(col)}) AS low, max({quote(col)}) AS high FROM {table}"
+        for table, col in FACT_DATE_COLUMNS.items()
+    )
+    low, high = con.execute(f"SELECT min(low), max(high) FROM ({bounds})").fetchone()
+    if low is None:
+        return 0
+
+    covered = con.execute("SELECT min(date), max(date) FROM dim_date").fetchone()
+    if covered[0] is not None and covered[0] <= low and high <= covered[1]:
+        return 0
+
+    con.register("_dates", to_arrow(date_dimension(low, high), "dim_date"))
+    try:
+        added = con.execute("""
+            INSERT INTO dim_date BY NAME
+            SELECT * FROM _dates WHERE date_key NOT IN (SELECT date_key FROM dim_date)
+        """).fetchone()[0]
+    finally:
+        con.unregister("_dates")
+
+    return added
+
+@instrumented("load_facts")
+def load_facts(frames: dict = None, incremental: bool = False, batch_dates: dict = None):
+    """Load the fact tables into the typed warehouse schema.
+
+    By default each table is replaced; frames maps dataset -> DataFrame to skip
+    the staging read, with batch_dates mapping dataset -> its extract date. incremental upserts only staging batches that are not in
+    etl_load_state yet, scanning the staging files with DuckDB directly.
+    Load dimensions first so facts find their employee keys.
+    """
+    print("Loading fact tables...")
 
-    df_eng = pd.read_csv(eng_path)
-    con.execute("CREATE OR REPLACE TABLE fact_engagement AS SELECT * FROM df_eng")
-    print(f"Loaded fact_engagement from: {eng_path}")
+    con = connect_warehouse()
+    frames = frames or {}
 
-    perf_folder = get_latest_staging_folder("data/staging/performance")
-    perf_path = os.path.join(perf_folder, "performance_cleaned.csv")
+    for table, dataset in FACT_TABLES.items():
+        with step(table):
+            if incremental:
+                load_incremental(con, dataset, table)
+            else:
+                source = load_full(con, dataset, table, frames, batch_dates)
+                print(f"Loaded {table} from: {source}")
 
-    df_perf = pd.read_csv(perf_path)
-    con.execute("CREATE OR REPLACE TABLE fact_performance AS SELECT * FROM df_perf")
-    print(f"Loaded fact_performance from: {perf_path}")
+    with step("dim_date"):
+        added = extend_date_dimension(con)
+    if added:
+        print(f"Added {added} days to dim_date")
 
     con.close()
-    print("Facts load complete.\n")
\ No newline at end of file
+    print("Facts load complete.\n")
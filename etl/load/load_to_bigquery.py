@@ -1,51 +1,193 @@
 from google.cloud import bigquery
-import pandas as pd
-import os   
-
-def get_latest_staging_folder(path:str) -> str:
-    folders = [
-        f for f in os.listdir(path)
-        if os.path.isdir(os.path.join(path, f))
-    ]
-    folders.sort(reverse=True)
-    return os.path.join(path, folders[0])
-
-def upload_csv_to_bigquery(df: pd.DataFrame, table_id: str):
-    client = bigquery.Client(project="people-analytics-etl")
-    job = client.load_table_from_dataframe(df, table_id)
-    job.result()
-    print(f"Uploaded to bigquery: {table_id}")
-
-def run_load_bigquery():
-    project = "people-analytics-etl"
-    dataset = "people_analytics"
-
-    emp_folder = get_latest_staging_folder("data/staging/employee")
-    emp_path = os.path.join(emp_folder, "employee_cleaned.csv")
-    df_emp = pd.read_csv(emp_path)
-    upload_csv_to_bigquery(df_emp, f"{project}.{dataset}.dim_employee")
-
-    att_folder = get_latest_staging_folder("data/staging/attendance")
-    att_path = os.path.join(att_folder, "attendance_cleaned.csv")
-    df_att = pd.read_csv(att_path)
-    upload_csv_to_bigquery(df_att, f"{project}.{dataset}.fact_attendance")
-
-    eng_folder = get_latest_staging_folder("data/staging/engagement")
-    eng_path = os.path.join(eng_folder, "engagement_cleaned.csv")
-    df_eng = pd.read_csv(eng_path)
-    upload_csv_to_bigquery(df_eng, f"{project}.{dataset}.fact_engagement")
-
-    perf_folder = get_latest_staging_folder("data/staging/performance")
-    perf_path = os.path.join(perf_folder, "performance_cleaned.csv")
-    df_perf = pd.read_csv(perf_path)
-    upload_csv_to_bigquery(df_perf, f"{project}.{dataset}.fact_performance")
-
-    master_folder = get_latest_staging_folder("data/staging/master")
-    master_path = os.path.join(master_folder, "master_dataset.csv")
-    df_master = pd.read_csv(master_path)
-    upload_csv_to_bigquery(df_master, f"{project}.{dataset}.master_dataset")
-
-    print("\nAll tables uploaded to BigQuery successfully!")
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+import io
+import os
+import json
+import time
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from etl.catalog import ensure_dir, latest_staging_folder
+from etl.instrumentation import count, instrumented, step
+from etl.staging import STAGING_SCHEMAS, read_staging_table
+
+PROJECT = "people-analytics-etl"
+DATASET = "people_analytics"
+
+# BigQuery table -> staging dataset it is loaded from
+BIGQUERY_TABLES = {
+    "dim_employee": "employee",
+    "fact_attendance": "attendance",
+    "fact_engagement": "engagement",
+    "fact_performance": "performance",
+    "master_dataset": "master",
+}
+
+# Large facts are date-partitioned and clustered, and only rows past the last
+# loaded partition are appended. table -> (partition column, partition type, clustering fields)
+# BigQuery cannot cluster on FLOAT64, so the float-coded attendance status is left out.
+PARTITIONED_TABLES = {
+    "fact_attendance": ("date", bigquery.TimePartitioningType.DAY, ["employee_id"]),
+    "fact_performance": ("review_date", bigquery.TimePartitioningType.MONTH, ["employee_id"]),
+}
+
+# high watermark of the partition column per table, written after a job succeeds
+LOAD_STATE_PATH = "data/state/bigquery/load_state.json"
+
+# upload and job submission block on the network; BigQuery runs the jobs themselves
+LOAD_WORKERS = len(BIGQUERY_TABLES)
+
+# BigQuery reads snappy Parquet everywhere; zstd staging files are re-encoded
+PAYLOAD_COMPRESSION = "snappy"
+
+def bigquery_type(arrow_type: pa.DataType) -> str:
+    if pa.types.is_dictionary(arrow_type):
+        arrow_type = arrow_type.value_type
+
+    if pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type):
+        return "STRING"
+    if pa.types.is_boolean(arrow_type):
+        return "BOOL"
+    if pa.types.is_integer(arrow_type):
+        return "INT64"
+    if pa.types.is_floating(arrow_type):
+        return "FLOAT64"
+    if pa.types.is_date(arrow_type):
+        return "DATE"
+    if pa.types.is_timestamp(arrow_type):
+        return "TIMESTAMP"
+
+    raise ValueError(f"No BigQuery type for arrow type: {arrow_type}")
+
+def bigquery_schema(table: pa.Table) -> list:
+    return [bigquery.SchemaField(field.name, bigquery_type(field.type)) for field in table.schema]
+
+def parquet_payload(table: pa.Table) -> io.BytesIO:
+    buffer = io.BytesIO()
+    pq.write_table(table, buffer, compression=PAYLOAD_COMPRESSION)
+    buffer.seek(0)
+    return buffer
+
+def read_load_state(state_path: str = LOAD_STATE_PATH) -> dict:
+    if not os.path.exists(state_path):
+        return {}
+    with open(state_path) as fh:
+        return json.load(fh)
+
+def save_load_state(state: dict, state_path: str = LOAD_STATE_PATH):
+    ensure_dir(os.path.dirname(state_path))
+    with open(state_path, "w") as fh:
+        json.dump(state, fh, indent=2)
+
+def _watermark_value(arrow_type: pa.DataType, watermark: str):
+    if pa.types.is_date(arrow_type):
+        return date.fromisoformat(watermark)
+    return datetime.fromisoformat(watermark)
+
+def plan_load(table_name: str, folder: str, watermark: str = None) -> dict:
+    """Read the staged table and build the job config for one BigQuery load."""
+    dataset = BIGQUERY_TABLES[table_name]
+    job_config = bigquery.LoadJobConfig(
+        source_format=bigquery.SourceFormat.PARQUET,
+        write_disposition=bigquery.WriteDisposition.WRITE_TRUNCATE,
+    )
+
+    partitioning = PARTITIONED_TABLES.get(table_name)
+    if partitioning is None:
+        table = read_staging_table(dataset, folder)
+        job_config.schema = bigquery_schema(table)
+        return {"table": table_name, "arrow": table, "job_config": job_config, "watermark": None}
+
+    column, partition_type, clustering = partitioning
+    filters = None
+    if watermark:
+        filters = [(column, ">", _watermark_value(STAGING_SCHEMAS[dataset][column], watermark))]
+
+    table = read_staging_table(dataset, folder, filters=filters)
+    job_config.schema = bigquery_schema(table)
+    job_config.time_partitioning = bigquery.TimePartitioning(type_=partition_type, field=column)
+    job_config.clustering_fields = clustering
+    if watermark:
+        job_config.write_disposition = bigquery.WriteDisposition.WRITE_APPEND
+
+    latest = pc.max(table[column]).as_py() if table.num_rows else None
+    return {
+        "table": table_name,
+        "arrow": table,
+        "job_config": job_config,
+        "watermark": latest.isoformat() if latest else watermark,
+    }
+
+def submit_load(client, plan: dict, table_id: str):
+    """Upload the Parquet payload and return the running job without waiting on it."""
+    return client.load_table_from_file(
+        parquet_payload(plan["arrow"]),
+        table_id,
+        job_config=plan["job_config"],
+    )
+
+@instrumented("load_bigquery")
+def run_load_bigquery(client=None, project: str = PROJECT, dataset: str = DATASET,
+                      full_refresh: bool = False, state_path: str = LOAD_STATE_PATH) -> dict:
+    """Load every staged table into BigQuery with one client and concurrent jobs.
+
+    Any object with load_table_from_file(file_obj, table_id, job_config=...)
+    returning a job with result() can stand in for the client, e.g. a local
+    stub in tests. full_refresh ignores the watermarks and truncates the
+    partitioned facts too.
+    """
+    started = time.perf_counter()
+    client = client or bigquery.Client(project=project)
+    state = {} if full_refresh else read_load_state(state_path)
+
+    plans = []
+    with step("plan"):
+        for table_name, staging_dataset in BIGQUERY_TABLES.items():
+            folder = latest_staging_folder(staging_dataset)
+            plan = plan_load(table_name, folder, state.get(table_name))
+            if plan["watermark"] and plan["arrow"].num_rows == 0:
+                print(f"{table_name}: no rows past {plan['watermark']}, skipped")
+                continue
+            plans.append(plan)
+
+    with step("submit"), ThreadPoolExecutor(max_workers=LOAD_WORKERS, thread_name_prefix="bigquery") as pool:
+        jobs = list(pool.map(
+            lambda plan: submit_load(client, plan, f"{project}.{dataset}.{plan['table']}"),
+            plans,
+        ))
+
+    # every job is already running server-side; collect them together
+    errors = []
+    for plan, job in zip(plans, jobs):
+        try:
+            with step("wait"):
+                job.result()
+        except Exception as exc:
+            errors.append(f"{plan['table']}: {exc}")
+            continue
+
+        count(rows_out=plan["arrow"].num_rows)
+        mode = plan["job_config"].write_disposition
+        print(f"Uploaded to bigquery: {project}.{dataset}.{plan['table']} ({plan['arrow'].num_rows} rows, {mode})")
+        if plan["watermark"]:
+            state[plan["table"]] = plan["watermark"]
+
+    save_load_state(state, state_path)
+
+    if errors:
+        raise RuntimeError("BigQuery load failed for " + "; ".join(errors))
+
+    print(f"\nAll tables uploaded to BigQuery successfully in {time.perf_counter() - started:.1f}s!")
+    return state
 
 if __name__ == "__main__":
-    run_load_bigquery()
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Load staged tables into BigQuery.")
+    parser.add_argument("--full-refresh", action="store_true", help="truncate partitioned facts instead of appending")
+    args = parser.parse_args()
+
+    run_load_bigquery(full_refresh=args.full_refresh)
@@ -0,0 +1,252 @@
+"""Pre-aggregated summary tables for the dashboards, refreshed after each load.
+
+Every summary is keyed by period_start, the first day of its grain. A refresh
+only recomputes the periods touched by loads of its source fact recorded in
+etl_load_state since the summary was last built; a full-replace load rebuilds
+it, and so does a change to the dimension columns it joins on (a reload that
+leaves them as they were does not). summary_freshness records when each
+summary was built, which loads it includes and a hash of those dimension
+columns.
+"""
+import time
+import argparse
+
+from etl.instrumentation import instrumented, step
+from etl.load.load_facts import REPLACE_FINGERPRINT, TABLE_KEYS
+from etl.load.warehouse_schema import connect_warehouse
+from etl.transform.transform_attendance import STATUS_CODES
+
+TENURE_BANDS = [(365, "<1y"), (2 * 365, "1-2y"), (5 * 365, "2-5y"), (10 * 365, "5-10y")]
+
+TENURE_BAND_SQL = "CASE " + " ".join(
+    f"WHEN f.tenure_days < {days} THEN '{band}'" for days, band in TENURE_BANDS
+) + " ELSE '10y+' END"
+
+def status_filter(code) -> str:
+    labels = ", ".join(f"'{label}'" for label, label_code in STATUS_CODES.items() if label_code == code)
+    return f"f.status IN ({labels})"
+
+# attendance labels counted as present and absent days, as the master dataset counts them
+PRESENT_SQL = status_filter(STATUS_CODES["present"])
+ABSENT_SQL = status_filter(STATUS_CODES["absent"])
+
+# the dim_employee columns summaries joining it read: only a change to these
+# rebuilds them, not every reload of the dimension
+EMPLOYEE_DEPARTMENTS = {"dim_employee": ["employee_key", "department_key"]}
+
+# summary -> source fact, date column of the fact, period grain, the
+# dimension columns it joins on and the aggregate; {where} restricts the
+# fact rows to the periods being refreshed
+SUMMARIES = {
+    "agg_attendance_daily_department": {
+        "source": "fact_attendance",
+        "period": "date",
+        "grain": "day",
+        "dimensions": EMPLOYEE_DEPARTMENTS,
+        "query": f"""
+            SELECT
+                f.date AS period_start,
+                emp.department_key,
+                count(*) AS employee_days,
+                count(*) FILTER (WHERE {PRESENT_SQL}) AS present_days,
+                count(*) FILTER (WHERE {ABSENT_SQL}) AS absent_days,
+                count(*) FILTER (WHERE f.is_late) AS late_count,
+                count(*) FILTER (WHERE f.is_overtime) AS overtime_count,
+                sum(f.hours_worked) AS hours_worked,
+                count(*) FILTER (WHERE {PRESENT_SQL}) / count(*) AS attendance_rate
+            FROM fact_attendance f
+            JOIN dim_employee emp USING (employee_key)
+            WHERE {{where}}
+            GROUP BY ALL
+        """,
+    },
+    "agg_attendance_monthly_department": {
+        "source": "fact_attendance",
+        "period": "date",
+        "grain": "month",
+        "dimensions": EMPLOYEE_DEPARTMENTS,
+        "query": f"""
+            SELECT
+                CAST(date_trunc('month', f.date) AS DATE) AS period_start,
+                emp.department_key,
+                count(DISTINCT f.employee_key) AS employees,
+                count(*) AS employee_days,
+                count(*) FILTER (WHERE {PRESENT_SQL}) AS present_days,
+                count(*) FILTER (WHERE {ABSENT_SQL}) AS absent_days,
+                count(*) FILTER (WHERE f.is_late) AS late_count,
+                count(*) FILTER (WHERE f.is_overtime) AS overtime_count,
+                sum(f.hours_worked) AS hours_worked,
+                count(*) FILTER (WHERE {PRESENT_SQL}) / count(*) AS attendance_rate
+            FROM fact_attendance f
+            JOIN dim_employee emp USING (employee_key)
+            WHERE {{where}}
+            GROUP BY ALL
+        """,
+    },
+    "agg_engagement_department_month": {
+        "source": "fact_engagement",
+        "period": "survey_date",
+        "grain": "month",
+        "dimensions": EMPLOYEE_DEPARTMENTS,
+        "query": """
+            SELECT
+                CAST(date_trunc('month', f.survey_date) AS DATE) AS period_start,
+                emp.department_key,
+                count(*) AS responses,
+                avg(f.q_work_life_balance) AS q_work_life_balance,
+                avg(f.q_manager_support) AS q_manager_support,
+                avg(f.q_growth_opportunity) AS q_growth_opportunity,
+                avg(f.q_recognition) AS q_recognition
+            FROM fact_engagement f
+            JOIN dim_employee emp USING (employee_key)
+            WHERE {where}
+            GROUP BY ALL
+        """,
+    },
+    "agg_rating_distribution": {
+        "source": "fact_performance",
+        "period": "review_date",
+        "grain": "day",
+        "query": """
+            SELECT
+                f.review_date AS period_start,
+                f.review_cycle,
+                f.overall_rating,
+                count(*) AS reviews,
+                count(*) / sum(count(*)) OVER (PARTITION BY f.review_date, f.review_cycle) AS share
+            FROM fact_performance f
+            WHERE {where}
+            GROUP BY f.review_date, f.review_cycle, f.overall_rating
+        """,
+    },
+    "agg_attrition_cohorts": {
+        "source": "fact_attrition",
+        "period": "snapshot_date",
+        "grain": "day",
+        "query": f"""
+            SELECT
+                f.snapshot_date AS period_start,
+                f.department_key,
+                {TENURE_BAND_SQL} AS tenure_band,
+                count(*) AS headcount,
+                count(*) FILTER (WHERE f.is_terminated) AS terminated,
+                count(*) FILTER (WHERE f.is_terminated) / count(*) AS attrition_rate
+            FROM fact_attrition f
+            WHERE {{where}}
+            GROUP BY ALL
+        """,
+    },
+}
+
+def summary_query(name: str, where: str = "true") -> str:
+    return SUMMARIES[name]["query"].format(where=where)
+
+def loads_since(con, tables: list, loaded_at) -> list:
+    placeholders = ", ".join("?" for _ in tables)
+    sql = (
+        "SELECT table_name, fingerprint, range_low, range_high, loaded_at FROM etl_load_state "
+        f"WHERE table_name IN ({placeholders})"
+    )
+    params = list(tables)
+    if loaded_at is not None:
+        sql += " AND loaded_at > ?"
+        params.append(loaded_at)
+    return con.execute(sql, params).fetchall()
+
+def dimension_fingerprint(con, name: str):
+    """Order-independent hash of the dimension columns the summary joins, or None."""
+    parts = [
+        f"SELECT bit_xor(hash({', '.join(columns)})) AS h FROM {table}"
+        for table, columns in SUMMARIES[name].get("dimensions", {}).items()
+    ]
+    if not parts:
+        return None
+    return str(con.execute(f"SELECT list(h) FROM ({' UNION ALL '.join(parts)})").fetchone()[0])
+
+def touched_periods(con, name: str, loads: list):
+    """First and last period_start covered by the rows of the given loads."""
+    spec = SUMMARIES[name]
+    range_key = TABLE_KEYS[spec["source"]][-1]
+    ranges = " OR ".join(f"{range_key} BETWEEN ? AND ?" for _ in loads)
+    params = [bound for load in loads for bound in (load[2], load[3])]
+
+    return con.execute(f"""
+        SELECT date_trunc('{spec["grain"]}', min({spec["period"]})),
+               date_trunc('{spec["grain"]}', max({spec["period"]}))
+        FROM {spec["source"]}
+        WHERE {ranges}
+    """, params).fetchone()
+
+def refresh_summary(con, name: str, full_refresh: bool = False) -> str:
+    """Bring one summary up to date; returns the refresh mode used."""
+    spec = SUMMARIES[name]
+
+    con.execute(f"CREATE TABLE IF NOT EXISTS {name} AS {summary_query(name, 'false')}")
+
+    freshness = con.execute(
+        "SELECT source_loaded_at, dimension_fingerprint FROM summary_freshness WHERE summary_name = ?", [name]
+    ).fetchone()
+    since = None if full_refresh or freshness is None else freshness[0]
+    dimensions = dimension_fingerprint(con, name)
+    # a department change moves rows between groups of every period
+    dimensions_changed = freshness is not None and freshness[1] != dimensions
+
+    loads = loads_since(con, [spec["source"]], since)
+    if since is not None and not loads and not dimensions_changed:
+        return "unchanged"
+
+    newest = max((load[4] for load in loads), default=since)
+    rebuild = since is None or dimensions_changed or any(
+        fingerprint == REPLACE_FINGERPRINT or low is None
+        for _, fingerprint, low, _, _ in loads
+    )
+
+    con.execute("BEGIN TRANSACTION")
+    try:
+        if rebuild:
+            mode = "full"
+            con.execute(f"DELETE FROM {name}")
+            con.execute(f"INSERT INTO {name} BY NAME {summary_query(name)}")
+        else:
+            mode = "incremental"
+            first, last = touched_periods(con, name, loads)
+            if first is not None:
+                period = f"date_trunc('{spec['grain']}', f.{spec['period']})"
+                con.execute(f"DELETE FROM {name} WHERE period_start BETWEEN ? AND ?", [first, last])
+                con.execute(
+                    f"INSERT INTO {name} BY NAME {summary_query(name, f'{period} BETWEEN ? AND ?')}",
+                    [first, last],
+                )
+
+        con.execute(f"""
+            INSERT OR REPLACE INTO summary_freshness
+                (summary_name, refresh_mode, refreshed_at, source_loaded_at, row_count, dimension_fingerprint)
+            SELECT ?, ?, now(), ?, (SELECT count(*) FROM {name}), ?
+        """, [name, mode, newest, dimensions])
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+
+    return mode
+
+@instrumented("materialize_summaries")
+def materialize_summaries(full_refresh: bool = False):
+    print("Materializing summary tables...")
+    started = time.perf_counter()
+
+    con = connect_warehouse()
+    for name in SUMMARIES:
+        with step(name):
+            mode = refresh_summary(con, name, full_refresh=full_refresh)
+        print(f"{name}: {mode}")
+
+    con.close()
+    print(f"Summary tables done in {time.perf_counter() - started:.2f}s.\n")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or refresh the dashboard summary tables.")
+    parser.add_argument("--full-refresh", action="store_true")
+    args = parser.parse_args()
+
+    materialize_summaries(full_refresh=args.full_refresh)
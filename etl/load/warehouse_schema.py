@@ -0,0 +1,83 @@
+import os
+import duckdb
+
+WAREHOUSE_PATH = "data/warehouse/people_analytics.duckdb"
+
+INIT_FILE = "warehouse/init_warehouse.sql"
+SCHEMA_DIR = "warehouse/schema"
+MIGRATIONS_DIR = "warehouse/migrations"
+
+# dimensions that have no employee_key to tell typed tables apart
+KEYLESS_TABLES = {"dim_department", "dim_date"}
+
+# table -> DDL file, in dependency order
+SCHEMA_FILES = {
+    "dim_date": "dim_date.sql",
+    "dim_department": "dim_department.sql",
+    "dim_employee": "dim_employee.sql",
+    "fact_attendance": "fact_attendance.sql",
+    "fact_attrition": "fact_attrition.sql",
+    "fact_engagement": "fact_engagement.sql",
+    "fact_performance": "fact_performance.sql",
+}
+
+def read_sql(path: str) -> str:
+    with open(path) as fh:
+        return fh.read()
+
+def table_columns(con, table: str) -> list:
+    return [row[0] for row in con.execute(
+        "SELECT column_name FROM information_schema.columns WHERE table_name = ? ORDER BY ordinal_position",
+        [table],
+    ).fetchall()]
+
+def drop_untyped_tables(con):
+    # Tables created by the old CREATE OR REPLACE loads carry pandas-inferred
+    # types and no surrogate keys. They are rebuilt from staging on the next load.
+    for table in SCHEMA_FILES:
+        columns = table_columns(con, table)
+        if not columns or "employee_key" in columns or table in KEYLESS_TABLES:
+            continue
+
+        con.execute(f"DROP TABLE {table}")
+        con.execute("DELETE FROM etl_load_state WHERE table_name = ?", [table])
+        print(f"Dropped untyped table {table}; it is reloaded from staging.")
+
+def pending_migrations(con) -> list:
+    if not os.path.isdir(MIGRATIONS_DIR):
+        return []
+
+    applied = {row[0] for row in con.execute("SELECT name FROM schema_migrations").fetchall()}
+    return sorted(
+        name for name in os.listdir(MIGRATIONS_DIR)
+        if name.endswith(".sql") and name not in applied
+    )
+
+def apply_schema(con):
+    """Create the typed star schema and apply new migrations; safe to run on every load."""
+    con.execute(read_sql(INIT_FILE))
+    drop_untyped_tables(con)
+
+    for filename in SCHEMA_FILES.values():
+        con.execute(read_sql(os.path.join(SCHEMA_DIR, filename)))
+
+    for name in pending_migrations(con):
+        con.execute("BEGIN TRANSACTION")
+        try:
+            con.execute(read_sql(os.path.join(MIGRATIONS_DIR, name)))
+            con.execute("INSERT INTO schema_migrations VALUES (?, now())", [name])
+            con.execute("COMMIT")
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+        print(f"Applied warehouse migration: {name}")
+
+def connect_warehouse(path: str = WAREHOUSE_PATH) -> duckdb.DuckDBPyConnection:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    con = duckdb.connect(path)
+    apply_schema(con)
+    return con
+
+if __name__ == "__main__":
+    connect_warehouse().close()
+    print(f"Warehouse schema is up to date: {WAREHOUSE_PATH}")
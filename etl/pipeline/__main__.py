@@ -0,0 +1,3 @@
+from etl.pipeline.dag_people_analytics import main
+
+main()
@@ -0,0 +1,155 @@
+"""Run the whole ETL in one process, handing data from stage to stage in memory.
+
+Each cleaned dataset is cast once to its declared staging schema as an Arrow
+table, so later stages see exactly the types they would read back from
+staging. Staging files are still written for audit, on a background thread
+and never read back, which saves the serialize/parse round trip per stage.
+
+With --partitions N the sources are cleaned and the master built per
+employee_id hash bucket in a process pool (see etl.pipeline.partitioned).
+
+    python -m etl.pipeline [--skip-extract] [--no-audit] [--no-load] [--partitions N]
+"""
+import os
+import time
+import argparse
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+
+from etl.catalog import latest_batch_file, latest_batch_folder
+from etl.extract.extract import content_hash, run_extract
+from etl.instrumentation import count, instrumented, stage, step
+from etl.load.load_dimensions import load_dimensions
+from etl.load.load_facts import load_facts
+from etl.load.materialize_summaries import materialize_summaries
+from etl.pipeline.partitioned import transform_partitioned
+from etl.staging import apply_dtypes, record_staged_source, to_arrow, to_pandas, write_staging
+from etl.transform.transform_attendance import clean_attendance
+from etl.transform.transform_employee import clean_employee
+from etl.transform.transform_engagement import clean_engagement
+from etl.transform.transform_master import (
+    ATTENDANCE_COLUMNS,
+    build_master,
+    latest_performance,
+    summarise_attendance,
+    summarise_engagement,
+)
+from etl.transform.transform_performance import clean_performance
+
+# dataset -> (raw landing dir, cleaning function)
+SOURCE_TRANSFORMS = {
+    "employee": ("data/raw/ibm_hr", clean_employee),
+    "attendance": ("data/raw/attendance", clean_attendance),
+    "engagement": ("data/raw/engagement", clean_engagement),
+    "performance": ("data/raw/performance", clean_performance),
+}
+
+AUDIT_WRITERS = 2
+
+# above 1, sources are cleaned and the master built in that many employee_id
+# hash buckets across a process pool; the output is the same either way
+PIPELINE_PARTITIONS = int(os.environ.get("PIPELINE_PARTITIONS", "1"))
+
+
+def transform_source(dataset: str) -> tuple:
+    raw_path, clean = SOURCE_TRANSFORMS[dataset]
+    latest_folder = latest_batch_folder(raw_path)
+    latest_file = latest_batch_file(latest_folder)
+
+    # same stage names as the standalone run_*_transform entry points
+    with stage(f"transform_{dataset}"):
+        with step("read"):
+            df = pd.read_csv(latest_file)
+        count(rows_in=len(df), bytes_read=os.path.getsize(latest_file))
+
+        with step("clean"):
+            cleaned = to_arrow(clean(df), dataset)
+        count(rows_out=cleaned.num_rows)
+
+    print(f"Cleaned {dataset}: {cleaned.num_rows} rows from {latest_file}")
+
+    return cleaned, latest_folder, latest_file
+
+
+def write_audit(data, dataset: str, staging_output: str, source_path: str = None):
+    write_staging(data, dataset, staging_output)
+    if source_path:
+        record_staged_source(staging_output, dataset, source_path, content_hash(source_path))
+
+
+@instrumented("pipeline")
+def run_pipeline(extract: bool = True, audit: bool = True, load: bool = True, partitions: int = None) -> dict:
+    partitions = partitions or PIPELINE_PARTITIONS
+    started = time.perf_counter()
+    print("\nRunning people analytics pipeline in-process\n")
+
+    if extract:
+        run_extract()
+
+    frames = {}
+    audit_jobs = []
+
+    with ThreadPoolExecutor(max_workers=AUDIT_WRITERS, thread_name_prefix="audit") as audit_pool:
+        extract_dates = {}
+        master = None
+        if partitions > 1:
+            with stage("transform_partitioned", partitions=partitions):
+                transformed, master = transform_partitioned(SOURCE_TRANSFORMS, partitions)
+            sources = transformed.items()
+        else:
+            # lazily, so each audit write overlaps the next source's cleaning
+            sources = ((dataset, transform_source(dataset)) for dataset in SOURCE_TRANSFORMS)
+
+        for dataset, (cleaned, latest_folder, latest_file) in sources:
+            frames[dataset] = apply_dtypes(to_pandas(cleaned), dataset)
+            extract_dates[dataset] = os.path.basename(latest_folder)
+
+            if audit:
+                staging_output = f"data/staging/{dataset}/{extract_dates[dataset]}"
+                audit_jobs.append(audit_pool.submit(write_audit, cleaned, dataset, staging_output, latest_file))
+
+        if master is None:
+            with stage("transform_master"), step("aggregate"):
+                master = to_arrow(build_master(
+                    frames["employee"],
+                    summarise_attendance(frames["attendance"][ATTENDANCE_COLUMNS]),
+                    summarise_engagement(frames["engagement"]),
+                    latest_performance(frames["performance"]),
+                ), "master")
+                count(rows_in=sum(len(frames[d]) for d in SOURCE_TRANSFORMS), rows_out=master.num_rows)
+        frames["master"] = apply_dtypes(to_pandas(master), "master")
+        print(f"Built master dataset: {master.num_rows} rows")
+
+        if audit:
+            staging_output = f"data/staging/master/{extract_dates['employee']}"
+            audit_jobs.append(audit_pool.submit(write_audit, master, "master", staging_output))
+
+        if load:
+            # dimensions first: facts resolve their employee keys against dim_employee
+            load_dimensions(frames, batch_dates=extract_dates)
+            load_facts(frames, batch_dates=extract_dates)
+            materialize_summaries()
+
+        # surface audit write failures instead of dropping them silently
+        for job in audit_jobs:
+            job.result()
+
+    print(f"\nPipeline done in {time.perf_counter() - started:.1f}s\n")
+    return frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run extract, transforms, master and load in one process.")
+    parser.add_argument("--skip-extract", action="store_true")
+    parser.add_argument("--no-audit", action="store_true", help="do not write staging files")
+    parser.add_argument("--no-load", action="store_true", help="stop after the master dataset")
+    parser.add_argument("--partitions", type=int, default=None,
+                        help="employee_id hash buckets to clean and aggregate in parallel (default: 1)")
+    args = parser.parse_args()
+
+    run_pipeline(extract=not args.skip_extract, audit=not args.no_audit, load=not args.no_load,
+                 partitions=args.partitions)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""Clean the sources and build the master dataset in a pool of worker processes.
+
+Every raw batch is hash-partitioned on employee_id into the same buckets, so
+one worker sees all rows of an employee across the four sources and can clean
+them and build their master rows alone: every master aggregate is per
+employee. The parent reads the raw files, splits them, and puts the worker
+results back in the order a serial run produces them.
+
+Anything a clean_* function infers from the first rows of a batch (datetime
+formats, answer-column classification) is settled once in the parent on the
+batch's leading rows before the split, so every bucket is cleaned with the
+decisions the serial run would take.
+"""
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+from etl.catalog import latest_batch_file, latest_batch_folder
+from etl.instrumentation import count, step
+from etl.staging import apply_dtypes, to_arrow, to_pandas
+from etl.transform.datetimes import INFER_SAMPLE_ROWS, inferred_formats, remember_inferred_formats
+from etl.transform.encoders import CLASSIFY_SAMPLE_ROWS
+from etl.transform.transform_employee import EMPLOYEE_ID_CANDIDATES
+from etl.transform.transform_master import (
+    ATTENDANCE_COLUMNS,
+    fill_numeric_gaps,
+    join_master,
+    latest_performance,
+    summarise_attendance,
+    summarise_engagement,
+)
+
+# datasets whose clean_* sorts rows by employee_id first; the others keep input order
+SORTED_BY_EMPLOYEE = {"attendance"}
+
+
+def normalized_name(column: str) -> str:
+    # the column name normalisation every clean_* function starts with
+    return column.strip().lower().replace(" ", "_").replace("-", "_")
+
+
+def raw_key_column(df: pd.DataFrame) -> str:
+    """The raw column clean_* turns into employee_id."""
+    names = {normalized_name(c): c for c in df.columns}
+    for candidate in ["employee_id", *EMPLOYEE_ID_CANDIDATES]:
+        if candidate in names:
+            return names[candidate]
+    raise ValueError(f"No employee id column to partition on among: {list(df.columns)}")
+
+
+def bucket_numbers(ids: pd.Series, partitions: int) -> np.ndarray:
+    # numeric ids hash the same whichever source they were read from
+    numeric = pd.to_numeric(ids, errors="coerce").fillna(-1).astype("int64")
+    return (pd.util.hash_array(numeric.to_numpy()) % partitions).astype(np.int64)
+
+
+def split_buckets(df: pd.DataFrame, partitions: int) -> list:
+    """partitions slices of df by employee_id hash, each in input order with its index."""
+    buckets = bucket_numbers(df[raw_key_column(df)], partitions)
+    order = np.argsort(buckets, kind="stable")
+    bounds = np.concatenate([[0], np.cumsum(np.bincount(buckets, minlength=partitions))])
+    return [df.take(order[bounds[i]:bounds[i + 1]]) for i in range(partitions)]
+
+
+def inference_rows(df: pd.DataFrame) -> int:
+    """Leading rows that hold the first non-null values every sample-based inference looks at."""
+    sample_rows = max(INFER_SAMPLE_ROWS, CLASSIFY_SAMPLE_ROWS)
+    needed = df.count().clip(upper=sample_rows)
+    rows = sample_rows
+    while rows < len(df) and (df.head(rows).count() < needed).any():
+        rows *= 2
+    return min(rows, len(df))
+
+
+def prime_inference(df: pd.DataFrame, clean):
+    # fills the datetime format cache and the persisted answer-column classification
+    clean(df.head(inference_rows(df)).copy())
+
+
+def combine_buckets(frames: list) -> pd.DataFrame:
+    """Concatenate bucket results, re-deriving categories the buckets disagreed on."""
+    combined = pd.concat(frames)
+    for col in combined.columns:
+        was_category = any(isinstance(f[col].dtype, pd.CategoricalDtype) for f in frames if col in f)
+        if was_category and not isinstance(combined[col].dtype, pd.CategoricalDtype):
+            combined[col] = combined[col].astype("category")
+    return combined
+
+
+def restore_order(df: pd.DataFrame, dataset: str) -> pd.DataFrame:
+    if dataset in SORTED_BY_EMPLOYEE:
+        # employees are never split across buckets, so a stable sort on the id
+        # alone interleaves the already sorted buckets into the serial order
+        ids = df["employee_id"].astype("float64").to_numpy()
+        return df.take(np.argsort(ids, kind="stable"))
+    return df.sort_index(kind="stable")
+
+
+def transform_bucket(raw: dict, cleaners: dict) -> tuple:
+    """Clean one bucket of every source and join its master rows, with gaps left unfilled.
+
+    Cleaned frames keep the raw row index; the master is indexed like the
+    employee rows it came from.
+    """
+    cleaned = {dataset: cleaners[dataset](df) for dataset, df in raw.items()}
+    # the types the serial pipeline builds the master from
+    frames = {dataset: apply_dtypes(to_pandas(to_arrow(df, dataset)), dataset) for dataset, df in cleaned.items()}
+
+    master = join_master(
+        frames["employee"],
+        summarise_attendance(frames["attendance"][ATTENDANCE_COLUMNS]),
+        summarise_engagement(frames["engagement"]),
+        latest_performance(frames["performance"]),
+    )
+    master.index = cleaned["employee"].index
+
+    return cleaned, master
+
+
+def transform_partitioned(sources: dict, partitions: int, workers: int = None) -> tuple:
+    """Clean every source and build the master across a process pool.
+
+    sources maps dataset -> (raw landing dir, clean function). Returns
+    {dataset: (cleaned Arrow table, latest raw folder, latest raw file)} and
+    the master as an Arrow table, equal to what the serial pipeline builds.
+    """
+    workers = workers or min(partitions, os.cpu_count() or 1)
+    cleaners = {dataset: clean for dataset, (_, clean) in sources.items()}
+
+    raw, batches = {}, {}
+    with step("read"):
+        for dataset, (raw_path, _) in sources.items():
+            latest_folder = latest_batch_folder(raw_path)
+            latest_file = latest_batch_file(latest_folder)
+            raw[dataset] = pd.read_csv(latest_file)
+            batches[dataset] = (latest_folder, latest_file)
+            count(rows_in=len(raw[dataset]), bytes_read=os.path.getsize(latest_file))
+
+    with step("partition"):
+        for dataset, df in raw.items():
+            prime_inference(df, cleaners[dataset])
+        buckets = {dataset: split_buckets(df, partitions) for dataset, df in raw.items()}
+        del raw
+
+    with step("clean_aggregate"):
+        with ProcessPoolExecutor(max_workers=workers, initializer=remember_inferred_formats,
+                                 initargs=(inferred_formats(),)) as pool:
+            jobs = [
+                pool.submit(transform_bucket, {dataset: b[i] for dataset, b in buckets.items()}, cleaners)
+                for i in range(partitions)
+            ]
+            del buckets
+            results = [job.result() for job in jobs]
+
+    with step("combine"):
+        cleaned = {}
+        for dataset in sources:
+            df = restore_order(combine_buckets([c[dataset] for c, _ in results]), dataset)
+            cleaned[dataset] = (to_arrow(df, dataset), *batches[dataset])
+            print(f"Cleaned {dataset}: {len(df)} rows from {batches[dataset][1]} in {partitions} buckets")
+
+        master = fill_numeric_gaps(restore_order(combine_buckets([m for _, m in results]), "master"))
+        master = to_arrow(master, "master")
+    count(rows_out=sum(t.num_rows for t, _, _ in cleaned.values()) + master.num_rows)
+
+    return cleaned, master
@@ -0,0 +1,6 @@
+"""SQL text helpers shared by the DuckDB transforms and the warehouse loads."""
+
+
+def quote(name: str) -> str:
+    """name as a double-quoted SQL identifier."""
+    return '"' + name.replace('"', '""') + '"'
@@ -0,0 +1,393 @@
+import os
+import json
+import hashlib
+import operator
+import functools
+import importlib.util
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from etl.catalog import ensure_dir
+
+STAGING_FORMAT = os.environ.get("STAGING_FORMAT", "parquet")
+PARQUET_COMPRESSION = "zstd"
+PARQUET_ROW_GROUP_SIZE = 256_000
+
+# per staging folder: which raw batch (and content hash) each dataset was built
+# from, and the version of the code that cleaned it
+SOURCES_FILE = "_sources.json"
+
+# staged dataset -> module holding its clean_* function
+TRANSFORM_MODULES = {
+    "attendance": "etl.transform.transform_attendance",
+    "employee": "etl.transform.transform_employee",
+    "engagement": "etl.transform.transform_engagement",
+    "performance": "etl.transform.transform_performance",
+}
+
+# modules every clean_* function shares: declared types, datetime formats,
+# answer encodings and date attributes
+SHARED_TRANSFORM_MODULES = (
+    "etl.staging",
+    "etl.transform.datetimes",
+    "etl.transform.encoders",
+    "etl.transform.date_dimension",
+)
+
+STAGING_FILES = {
+    "attendance": "attendance_cleaned",
+    "employee": "employee_cleaned",
+    "engagement": "engagement_cleaned",
+    "performance": "performance_cleaned",
+    "master": "master_dataset",
+    "features": "employee_features",
+    "master_snapshots": "master_snapshot",
+}
+
+CATEGORY = pa.dictionary(pa.int32(), pa.string())
+
+# Declared column types per staged dataset: integer ids, dictionary-encoded
+# low-cardinality strings and the narrowest numeric types the values fit.
+# clean_* functions apply them with apply_dtypes and read_staging restores
+# them. Columns not listed keep the type inferred from the DataFrame.
+STAGING_SCHEMAS = {
+    "attendance": {
+        "employee_id": pa.int32(),
+        "timestamp": pa.timestamp("us"),
+        "date": pa.date32(),
+        "date_key": pa.int32(),
+        "status": pa.float32(),
+        "status_label": CATEGORY,
+        "hours_worked": pa.float32(),
+        "is_late": pa.int8(),
+        "is_overtime": pa.int8(),
+        "year": pa.int16(),
+        "month": pa.int8(),
+        "weekday": CATEGORY,
+    },
+    "employee": {
+        "employee_id": pa.int32(),
+        "firstname": pa.string(),
+        "lastname": pa.string(),
+        "age": pa.int16(),
+        "department": CATEGORY,
+        "gender": CATEGORY,
+        "maritalstatus": CATEGORY,
+        "jobrole": CATEGORY,
+        "monthlyincome": pa.int32(),
+        "educationlevel": CATEGORY,
+        "employmentstatus": CATEGORY,
+        "managerid": pa.int32(),
+        "businesstravel": CATEGORY,
+        "overtime": CATEGORY,
+        "hiredate": pa.date32(),
+    },
+    "engagement": {
+        "survey_id": pa.int32(),
+        "employee_id": pa.int32(),
+        "survey_date": pa.timestamp("us"),
+        "date_key": pa.int32(),
+        "q_work_life_balance": pa.int8(),
+        "q_manager_support": pa.int8(),
+        "q_growth_opportunity": pa.int8(),
+        "q_recognition": pa.int8(),
+        "comment_text": pa.string(),
+        "year": pa.int16(),
+        "month": pa.int8(),
+    },
+    "performance": {
+        "employee_id": pa.int32(),
+        "review_date": pa.timestamp("us"),
+        "date_key": pa.int32(),
+        "review_cycle": CATEGORY,
+        "overall_rating": pa.int8(),
+        "goals_score": pa.float32(),
+        "manager_score": pa.float32(),
+        "potential_rating": CATEGORY,
+        "bonus_percentage": pa.int8(),
+        "promotion_recommendation": CATEGORY,
+        "year": pa.int16(),
+        "quarter": pa.int8(),
+    },
+    "master": {
+        "employee_id": pa.int32(),
+    },
+    "master_snapshots": {
+        "employee_id": pa.int32(),
+        "snapshot_date": pa.date32(),
+    },
+    "features": {
+        "employee_id": pa.int32(),
+        "as_of_date": pa.date32(),
+        "days_recorded_30d": pa.int16(),
+        "absence_rate_30d": pa.float32(),
+        "late_rate_30d": pa.float32(),
+        "days_recorded_90d": pa.int16(),
+        "absence_rate_90d": pa.float32(),
+        "late_rate_90d": pa.float32(),
+        "days_recorded_365d": pa.int16(),
+        "absence_rate_365d": pa.float32(),
+        "late_rate_365d": pa.float32(),
+        "late_streak_current": pa.int16(),
+        "late_streak_max_90d": pa.int16(),
+        "eng_score_last": pa.float32(),
+        "eng_score_previous": pa.float32(),
+        "eng_score_delta": pa.float32(),
+        "eng_days_since_survey": pa.int32(),
+        "eng_surveys_365d": pa.int16(),
+    },
+}
+
+# ids other rows are joined on: a value that does not parse as an integer is an
+# error, not a missing value
+KEY_COLUMNS = ("employee_id", "survey_id", "managerid")
+
+_FILTER_OPS = {
+    "=": operator.eq,
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+
+def staging_path(folder: str, dataset: str, fmt: str = None) -> str:
+    fmt = fmt or STAGING_FORMAT
+    return os.path.join(folder, f"{STAGING_FILES[dataset]}.{fmt}")
+
+
+def to_arrow(df: pd.DataFrame, dataset: str) -> pa.Table:
+    table = pa.Table.from_pandas(df, preserve_index=False)
+
+    declared = STAGING_SCHEMAS.get(dataset, {})
+    fields = [
+        pa.field(name, declared.get(name, field.type))
+        for name, field in zip(table.schema.names, table.schema)
+    ]
+    return table.cast(pa.schema(fields))
+
+
+def to_pandas(table: pa.Table) -> pd.DataFrame:
+    return table.to_pandas(date_as_object=False)
+
+
+def pandas_dtype(arrow_type: pa.DataType, has_nulls: bool = False):
+    """Compact pandas dtype for a declared column; None leaves the column as is."""
+    if pa.types.is_dictionary(arrow_type):
+        return "category"
+    if pa.types.is_string(arrow_type):
+        # free text: one contiguous Arrow buffer instead of a Python object per row
+        return pd.StringDtype("pyarrow")
+    if pa.types.is_integer(arrow_type):
+        # numpy ints cannot hold NaN; fall back to the nullable extension type
+        dtype = arrow_type.to_pandas_dtype()
+        return pd.api.types.pandas_dtype(dtype.__name__.capitalize()) if has_nulls else dtype
+    if pa.types.is_floating(arrow_type):
+        return arrow_type.to_pandas_dtype()
+    return None
+
+
+def check_integer_values(column: pd.Series, arrow_type: pa.DataType, label: str):
+    """Raise if a value of column would not survive the cast to the integer arrow_type."""
+    values = column.dropna()
+    if pd.api.types.is_bool_dtype(values):
+        return
+
+    info = np.iinfo(arrow_type.to_pandas_dtype())
+    bad = values[(values < info.min) | (values > info.max) | (values % 1 != 0)]
+    if len(bad):
+        raise ValueError(
+            f"{label}: {len(bad)} values are not whole numbers within {arrow_type}, e.g. {bad.unique()[:5].tolist()}"
+        )
+
+
+def apply_dtypes(df: pd.DataFrame, dataset: str) -> pd.DataFrame:
+    """Cast the columns of df declared for dataset to their compact dtypes."""
+    for name, arrow_type in STAGING_SCHEMAS.get(dataset, {}).items():
+        if name not in df.columns:
+            continue
+
+        column = df[name]
+        if pa.types.is_date(arrow_type) or pa.types.is_timestamp(arrow_type):
+            if not pd.api.types.is_datetime64_any_dtype(column):
+                df[name] = pd.to_datetime(column)
+            continue
+
+        if pa.types.is_integer(arrow_type) and column.dtype == object:
+            parsed = pd.to_numeric(column, errors="coerce")
+            if name in KEY_COLUMNS:
+                malformed = parsed.isna() & column.notna() & (column.astype(str).str.strip() != "")
+                if malformed.any():
+                    examples = column[malformed].unique()[:5].tolist()
+                    raise ValueError(
+                        f"{dataset}.{name}: {int(malformed.sum())} values are not integer ids, e.g. {examples}"
+                    )
+            column = parsed
+
+        if pa.types.is_integer(arrow_type) and pd.api.types.is_numeric_dtype(column):
+            # astype to a narrower int wraps out-of-range values and truncates fractions
+            check_integer_values(column, arrow_type, f"{dataset}.{name}")
+
+        dtype = pandas_dtype(arrow_type, has_nulls=bool(column.isna().any()))
+        if dtype is not None and column.dtype != dtype:
+            df[name] = column.astype(dtype)
+
+    return df
+
+
+def write_staging(df, dataset: str, folder: str, fmt: str = None) -> str:
+    """Stage a DataFrame, or an Arrow table already cast with to_arrow."""
+    fmt = fmt or STAGING_FORMAT
+    ensure_dir(folder)
+    path = staging_path(folder, dataset, fmt)
+
+    if fmt == "parquet":
+        pq.write_table(
+            df if isinstance(df, pa.Table) else to_arrow(df, dataset),
+            path,
+            compression=PARQUET_COMPRESSION,
+            row_group_size=PARQUET_ROW_GROUP_SIZE,
+        )
+    elif fmt == "csv":
+        (to_pandas(df) if isinstance(df, pa.Table) else df).to_csv(path, index=False)
+    else:
+        raise ValueError(f"Unsupported staging format: {fmt}")
+
+    return path
+
+
+def write_staging_batches(batches, dataset: str, folder: str, fmt: str = None):
+    """Append an iterable of DataFrames to one staged file; returns (path, rows)."""
+    fmt = fmt or STAGING_FORMAT
+    ensure_dir(folder)
+    path = staging_path(folder, dataset, fmt)
+
+    rows = 0
+    writer = None
+    try:
+        for df in batches:
+            if fmt == "parquet":
+                table = to_arrow(df, dataset)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema, compression=PARQUET_COMPRESSION)
+                writer.write_table(table.cast(writer.schema), row_group_size=PARQUET_ROW_GROUP_SIZE)
+            elif fmt == "csv":
+                df.to_csv(path, index=False, mode="w" if rows == 0 else "a", header=rows == 0)
+            else:
+                raise ValueError(f"Unsupported staging format: {fmt}")
+            rows += len(df)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    return path, rows
+
+
+def _read_sources(folder: str) -> dict:
+    path = os.path.join(folder, SOURCES_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as fh:
+        return json.load(fh)
+
+
+@functools.lru_cache(maxsize=None)
+def transform_version(dataset: str) -> str:
+    """Hash of the code that cleans dataset; any edit to it restages unchanged raw batches."""
+    modules = SHARED_TRANSFORM_MODULES + ((TRANSFORM_MODULES[dataset],) if dataset in TRANSFORM_MODULES else ())
+    digest = hashlib.sha256()
+    for module in modules:
+        # read, not imported: the transform modules import this one
+        with open(importlib.util.find_spec(module).origin, "rb") as fh:
+            digest.update(fh.read())
+    return digest.hexdigest()[:16]
+
+
+def record_staged_source(folder: str, dataset: str, source_path: str, sha256: str):
+    sources = _read_sources(folder)
+    sources[dataset] = {"source": source_path, "sha256": sha256, "transform_version": transform_version(dataset)}
+
+    ensure_dir(folder)
+    with open(os.path.join(folder, SOURCES_FILE), "w") as fh:
+        json.dump(sources, fh, indent=2)
+
+
+def batch_fingerprint(dataset: str, folder: str) -> str:
+    # content hash of the raw batch the staging file was built from and the
+    # version of the code that cleaned it; staging written before
+    # _sources.json existed falls back to size and mtime
+    source = _read_sources(folder).get(dataset, {})
+    if source.get("sha256"):
+        return ":".join(filter(None, [source["sha256"], source.get("transform_version")]))
+
+    for fmt in ("parquet", "csv"):
+        path = staging_path(folder, dataset, fmt)
+        if os.path.exists(path):
+            stat = os.stat(path)
+            return f"{stat.st_size}-{int(stat.st_mtime)}"
+
+    raise FileNotFoundError(f"No staged {dataset} dataset in: {folder}")
+
+
+def is_staged_from(folder: str, dataset: str, sha256: str) -> bool:
+    """True when the folder already holds dataset built by the current code from content with this hash."""
+    if not sha256:
+        return False
+
+    staged = any(os.path.exists(staging_path(folder, dataset, fmt)) for fmt in ("parquet", "csv"))
+    source = _read_sources(folder).get(dataset, {})
+    return (
+        staged
+        and source.get("sha256") == sha256
+        and source.get("transform_version") == transform_version(dataset)
+    )
+
+
+def _apply_filters(df: pd.DataFrame, filters) -> pd.DataFrame:
+    # same (column, op, value) conjunction that pyarrow accepts for parquet
+    mask = pd.Series(True, index=df.index)
+    for col, op, value in filters:
+        # date32 columns come back as datetime64 from to_pandas
+        if isinstance(value, date) and pd.api.types.is_datetime64_any_dtype(df[col]):
+            value = pd.Timestamp(value)
+
+        if op == "in":
+            mask &= df[col].isin(value)
+        elif op == "not in":
+            mask &= ~df[col].isin(value)
+        elif op in _FILTER_OPS:
+            mask &= _FILTER_OPS[op](df[col], value)
+        else:
+            raise ValueError(f"Unsupported filter operator: {op}")
+
+    return df[mask]
+
+
+def read_staging_table(dataset: str, folder: str, columns=None, filters=None) -> pa.Table:
+    parquet_path = staging_path(folder, dataset, "parquet")
+    if os.path.exists(parquet_path):
+        return pq.read_table(parquet_path, columns=columns, filters=filters)
+
+    csv_path = staging_path(folder, dataset, "csv")
+    if not os.path.exists(csv_path):
+        raise FileNotFoundError(f"No staged {dataset} dataset in: {folder}")
+
+    df = pd.read_csv(csv_path, usecols=columns)
+    if columns:
+        df = df[columns]
+
+    table = to_arrow(df, dataset)
+    if filters:
+        table = to_arrow(_apply_filters(to_pandas(table), filters), dataset)
+
+    return table
+
+
+def read_staging(dataset: str, folder: str, columns=None, filters=None) -> pd.DataFrame:
+    return apply_dtypes(to_pandas(read_staging_table(dataset, folder, columns=columns, filters=filters)), dataset)
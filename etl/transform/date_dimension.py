@@ -0,0 +1,101 @@
+"""Generated calendar dimension shared by the transforms and the warehouse.
+
+One row per day, keyed by date_key (yyyymmdd). Transforms attach the calendar
+attributes a dataset needs by indexing the dimension with each row's day
+offset, so nothing is recomputed or formatted per row. The warehouse stores
+the same rows as dim_date and fact tables carry only the date_key.
+"""
+import os
+import threading
+import numpy as np
+import pandas as pd
+from pandas.tseries.holiday import USFederalHolidayCalendar
+
+# first month of the fiscal year; fiscal years are named after the calendar
+# year they end in
+FISCAL_YEAR_START_MONTH = int(os.environ.get("FISCAL_YEAR_START_MONTH", 1))
+
+HOLIDAY_CALENDAR = USFederalHolidayCalendar()
+
+WEEKDAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+MONTH_NAMES = [
+    "January", "February", "March", "April", "May", "June",
+    "July", "August", "September", "October", "November", "December",
+]
+
+# the cached dimension always covers whole calendar years
+_dimension = None
+_dimension_lock = threading.Lock()
+
+
+def build_date_dimension(start, end) -> pd.DataFrame:
+    """Calendar rows for every day from start to end inclusive."""
+    days = pd.date_range(start, end, freq="D", name="date")
+    iso = days.isocalendar()
+    holidays = HOLIDAY_CALENDAR.holidays(start=days[0], end=days[-1], return_name=True)
+
+    fiscal_period = (days.month - FISCAL_YEAR_START_MONTH) % 12 + 1
+    fiscal_year = days.year + (days.month >= FISCAL_YEAR_START_MONTH) * (FISCAL_YEAR_START_MONTH != 1)
+
+    dim = pd.DataFrame({
+        "date_key": (days.year * 10000 + days.month * 100 + days.day).astype("int32"),
+        "date": days,
+        "year": days.year.astype("int16"),
+        "quarter": days.quarter.astype("int8"),
+        "month": days.month.astype("int8"),
+        "month_name": pd.Categorical.from_codes(days.month - 1, categories=MONTH_NAMES),
+        "day": days.day.astype("int8"),
+        "day_of_week": (days.dayofweek + 1).astype("int8"),
+        "weekday": pd.Categorical.from_codes(days.dayofweek, categories=WEEKDAY_NAMES),
+        "iso_year": iso["year"].to_numpy().astype("int16"),
+        "iso_week": iso["week"].to_numpy().astype("int8"),
+        "is_weekend": days.dayofweek >= 5,
+        "is_holiday": days.isin(holidays.index),
+        "holiday_name": pd.Series(holidays).reindex(days).to_numpy(),
+        "fiscal_year": np.asarray(fiscal_year, dtype="int16"),
+        "fiscal_quarter": ((fiscal_period - 1) // 3 + 1).astype("int8"),
+        "fiscal_period": fiscal_period.astype("int8"),
+    })
+    dim["holiday_name"] = dim["holiday_name"].astype(pd.StringDtype("pyarrow"))
+    dim["is_business_day"] = ~(dim["is_weekend"] | dim["is_holiday"])
+    return dim
+
+
+def date_dimension(first, last) -> pd.DataFrame:
+    """The cached dimension, extended to whole years covering first..last."""
+    global _dimension
+    first, last = pd.Timestamp(first), pd.Timestamp(last)
+
+    with _dimension_lock:
+        if _dimension is None or first < _dimension["date"].iat[0] or last > _dimension["date"].iat[-1]:
+            if _dimension is not None:
+                first = min(first, _dimension["date"].iat[0])
+                last = max(last, _dimension["date"].iat[-1])
+            _dimension = build_date_dimension(f"{first.year}-01-01", f"{last.year}-12-31")
+        return _dimension
+
+
+def attach_date_attributes(df: pd.DataFrame, date_col: str, attributes: list = ()) -> pd.DataFrame:
+    """Add date_key and the given dim_date attributes of df[date_col] to df.
+
+    Each row's day offset from the start of the dimension indexes the
+    attribute arrays directly; rows without a date get nulls.
+    """
+    dates = df[date_col]
+    if dates.dt.tz is not None:
+        dates = dates.dt.tz_localize(None)
+
+    days = dates.to_numpy(dtype="datetime64[D]")
+    valid = ~np.isnat(days)
+    if not valid.any():
+        dim = date_dimension(pd.Timestamp.now(), pd.Timestamp.now())
+    else:
+        dim = date_dimension(days[valid].min(), days[valid].max())
+
+    offsets = np.full(len(days), -1, dtype=np.int64)
+    offsets[valid] = (days[valid] - dim["date"].to_numpy(dtype="datetime64[D]")[0]).astype(np.int64)
+
+    for name in ["date_key", *attributes]:
+        df[name] = pd.Series(pd.array(dim[name]).take(offsets, allow_fill=True), index=df.index)
+
+    return df
@@ -0,0 +1,111 @@
+import threading
+import pandas as pd
+
+# source -> raw column -> strptime format, for feeds whose layout is known up
+# front; other columns get a format inferred from a sample of their values
+DATETIME_FORMATS = {
+    "attendance": {"date": "%Y-%m-%d"},
+    "engagement": {"survey_date": "%Y-%m-%d"},
+    "performance": {"review_date": "%Y-%m-%d"},
+}
+
+# tried in order against the sample; the first one that parses every sampled
+# value is used for the whole column
+CANDIDATE_FORMATS = [
+    "%Y-%m-%d",
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%dT%H:%M:%S",
+    "%Y-%m-%d %H:%M:%S.%f",
+    "%Y-%m-%dT%H:%M:%S.%f",
+    "%Y-%m-%dT%H:%M:%S%z",
+    "%Y-%m-%d %H:%M",
+    "%Y/%m/%d",
+    "%m/%d/%Y",
+    "%m/%d/%Y %H:%M",
+    "%m/%d/%Y %H:%M:%S",
+]
+
+INFER_SAMPLE_ROWS = 200
+
+# (source, column) -> inferred format, or None when no candidate fits; a
+# batch is inferred once, and streaming chunks of it reuse the result
+_inferred_formats = {}
+_inferred_lock = threading.Lock()
+
+
+def infer_format(series: pd.Series):
+    sample = series.dropna().head(INFER_SAMPLE_ROWS).astype(str)
+    if sample.empty:
+        return None
+
+    for fmt in CANDIDATE_FORMATS:
+        try:
+            pd.to_datetime(sample, format=fmt)
+        except (ValueError, TypeError):
+            continue
+        return fmt
+
+    return None
+
+
+def datetime_format(series: pd.Series, source: str, column: str):
+    """Declared format of source's column, else the one inferred for it."""
+    declared = DATETIME_FORMATS.get(source, {})
+    if column in declared:
+        return declared[column]
+
+    key = (source, column)
+    with _inferred_lock:
+        if key not in _inferred_formats:
+            _inferred_formats[key] = infer_format(series)
+        return _inferred_formats[key]
+
+
+def inferred_formats() -> dict:
+    """Copy of the inferred formats, to hand to worker processes."""
+    with _inferred_lock:
+        return dict(_inferred_formats)
+
+
+def remember_inferred_formats(formats: dict):
+    """Adopt formats inferred elsewhere, e.g. by the parent of a worker process."""
+    with _inferred_lock:
+        _inferred_formats.update(formats)
+
+
+def forget_inferred_formats(source: str = None):
+    """Drop the inferred formats of source, or of every source."""
+    with _inferred_lock:
+        for key in [k for k in _inferred_formats if source is None or k[0] == source]:
+            del _inferred_formats[key]
+
+
+def parse_datetimes(series: pd.Series, source: str, column: str = None) -> pd.Series:
+    """Parse a raw date/time column in one pass with its explicit format.
+
+    Values the format does not fit (a feed changing layout mid-batch) are
+    parsed again without one, so nothing is silently turned into NaT.
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+
+    fmt = datetime_format(series, source, column or series.name)
+    if fmt is None:
+        return pd.to_datetime(series)
+
+    parsed = pd.to_datetime(series, format=fmt, errors="coerce")
+    missed = parsed.isna() & series.notna()
+    if missed.any():
+        parsed = parsed.astype(object)
+        parsed[missed] = pd.to_datetime(series[missed])
+        parsed = pd.to_datetime(parsed)
+
+    return parsed
+
+
+def calendar_date(timestamps: pd.Series) -> pd.Series:
+    """Midnight of each timestamp's local date, kept as datetime64."""
+    dates = timestamps.dt.normalize()
+    if dates.dt.tz is not None:
+        dates = dates.dt.tz_localize(None)
+    return dates
@@ -0,0 +1,141 @@
+import os
+import json
+import threading
+import numpy as np
+import pandas as pd
+
+from etl.catalog import ensure_dir
+
+LIKERT_SCALE = {
+    "strongly disagree": 1,
+    "disagree": 2,
+    "neutral": 3,
+    "agree": 4,
+    "strongly agree": 5,
+}
+
+RATING_SCALE = {
+    "needs improvement": 1,
+    "meets expectations": 2,
+    "exceeds expectations": 3,
+    "outstanding": 4,
+}
+
+# source -> answer columns, for feeds whose layout is known up front;
+# other sources are classified from a sample of their text columns
+DECLARED_ANSWER_COLUMNS = {
+    "engagement": ["q_work_life_balance", "q_manager_support", "q_growth_opportunity", "q_recognition"],
+}
+
+# Classification looks at this many non-null values per text column and
+# gives up on a column as soon as a value is longer than any scale label,
+# so free text such as comment_text costs the same however long it is.
+CLASSIFY_SAMPLE_ROWS = 200
+MAX_ANSWER_LENGTH = max(len(label) for label in {**LIKERT_SCALE, **RATING_SCALE})
+
+# Classifications are keyed by source and column layout and persisted, so
+# later batches of the same feed skip the sampling altogether. A wrong one
+# is dropped with forget_answer_columns (python -m etl.transform.encoders
+# [SOURCE]) and classified again from the next batch.
+CLASSIFICATION_FILE = "data/state/encoders/answer_columns.json"
+
+_classifications = None
+_classifications_lock = threading.Lock()
+
+
+def _load_classifications() -> dict:
+    global _classifications
+    if _classifications is None:
+        if os.path.exists(CLASSIFICATION_FILE):
+            with open(CLASSIFICATION_FILE) as fh:
+                _classifications = json.load(fh)
+        else:
+            _classifications = {}
+    return _classifications
+
+
+def _save_classifications():
+    # replaced in one step, so another process never reads it half-written
+    ensure_dir(os.path.dirname(CLASSIFICATION_FILE))
+    tmp_path = f"{CLASSIFICATION_FILE}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as fh:
+        json.dump(_classifications, fh, indent=2)
+    os.replace(tmp_path, CLASSIFICATION_FILE)
+
+
+def _layout_key(source: str, columns) -> str:
+    return f"{source}:{','.join(columns)}"
+
+
+def is_answer_column(series: pd.Series, scale: dict) -> bool:
+    if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_datetime64_any_dtype(series):
+        return False
+
+    sample = series.dropna().head(CLASSIFY_SAMPLE_ROWS)
+    if sample.empty:
+        return False
+
+    sample = sample.astype(str)
+    if sample.str.len().max() > MAX_ANSWER_LENGTH:
+        return False
+
+    return bool(sample.str.strip().str.lower().isin(scale).any())
+
+
+def answer_columns(df: pd.DataFrame, source: str, scale: dict) -> list:
+    """Columns of df holding scale answers as text, classified once per feed layout."""
+    if source in DECLARED_ANSWER_COLUMNS:
+        return [c for c in DECLARED_ANSWER_COLUMNS[source] if c in df.columns]
+
+    key = _layout_key(source, df.columns)
+    with _classifications_lock:
+        classifications = _load_classifications()
+        if key not in classifications:
+            classifications[key] = [c for c in df.columns if is_answer_column(df[c], scale)]
+            _save_classifications()
+        return classifications[key]
+
+
+def forget_answer_columns(source: str = None):
+    """Drop the persisted classifications of source, or of every source."""
+    global _classifications
+    with _classifications_lock:
+        # reread, so entries other processes saved since are kept
+        _classifications = None
+        classifications = _load_classifications()
+        for key in [k for k in classifications if source is None or k.split(":", 1)[0] == source]:
+            del classifications[key]
+        _save_classifications()
+
+
+def encode_ordinal(series: pd.Series, scale: dict, keep_unmapped: bool = False) -> pd.Series:
+    """Map text answers to scale values through the categorical codes.
+
+    Labels are normalised and looked up once per distinct value; rows only
+    index into that lookup. Values outside the scale become NaN, or are kept
+    as they are with keep_unmapped.
+    """
+    if pd.api.types.is_numeric_dtype(series):
+        return series
+
+    categorical = series.astype("category")
+    labels = categorical.cat.categories
+    scores = pd.Series(labels.astype(str)).str.strip().str.lower().map(scale).to_numpy()
+
+    if keep_unmapped:
+        scores = np.where(pd.isna(scores), np.asarray(labels, dtype=object), scores)
+
+    # code -1 (missing) picks the trailing NaN
+    lookup = np.append(scores, np.nan)
+    return pd.Series(lookup[categorical.cat.codes.to_numpy()], index=series.index, name=series.name)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Drop persisted answer-column classifications.")
+    parser.add_argument("source", nargs="?", default=None, help="source to forget (default: every source)")
+    args = parser.parse_args()
+
+    forget_answer_columns(args.source)
+    print(f"Forgot answer-column classifications of {args.source or 'every source'}")
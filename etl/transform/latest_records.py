@@ -0,0 +1,63 @@
+"""Latest and top-k records per key, as whole rows.
+
+Every selected row is a real input row: fields are never combined across
+records the way groupby().last() does when it skips nulls column by column.
+Rows without an order value rank as the oldest of their key, and ties on the
+order column go to the row that comes last in input order, so a later batch
+wins over an earlier one. Rows without a key are dropped.
+
+The pandas and DuckDB versions select the same rows.
+"""
+import pandas as pd
+
+from etl.sql import quote
+
+
+def latest_per_key(df: pd.DataFrame, key: str, order_by: str) -> pd.DataFrame:
+    """The most recent row of each key, ordered by key; linear in the rows, no sort."""
+    df = df[df[key].notna()]
+    order = df[order_by]
+
+    newest = order.groupby(df[key], sort=False, observed=True).transform("max")
+    # keys whose rows all lack an order value keep their last row
+    candidates = df[(order == newest) | newest.isna()]
+    latest = candidates[~candidates[key].duplicated(keep="last")]
+
+    return latest.sort_values(key).reset_index(drop=True)
+
+
+def top_k_per_key(df: pd.DataFrame, key: str, order_by: str, k: int,
+                  rank_column: str = None) -> pd.DataFrame:
+    """Up to k most recent rows of each key, newest first within the key.
+
+    rank_column, if given, numbers the rows of each key from 1 (newest).
+    """
+    if k == 1 and rank_column is None:
+        return latest_per_key(df, key, order_by)
+
+    df = df[df[key].notna()]
+    # stable, so equal order values keep input order and the later row ranks first
+    ordered = df.sort_values(order_by, kind="stable", na_position="first")
+    top = ordered.groupby(key, sort=False, observed=True).tail(k).iloc[::-1]
+    top = top.sort_values(key, kind="stable")
+
+    if rank_column:
+        top = top.assign(**{rank_column: top.groupby(key, sort=False, observed=True).cumcount() + 1})
+
+    return top.reset_index(drop=True)
+
+
+def latest_per_key_sql(relation: str, key: str, order_by: str, k: int = 1) -> str:
+    """SELECT of the k most recent rows per key of a DuckDB relation."""
+    return f"""
+        SELECT * EXCLUDE (_input_order)
+        FROM (
+            SELECT *, row_number() OVER () AS _input_order
+            FROM {relation}
+            WHERE {quote(key)} IS NOT NULL
+        )
+        QUALIFY row_number() OVER (
+            PARTITION BY {quote(key)}
+            ORDER BY {quote(order_by)} DESC NULLS LAST, _input_order DESC
+        ) <= {int(k)}
+    """
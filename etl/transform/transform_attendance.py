@@ -1,36 +1,41 @@
 import os
+import argparse
+import tempfile
 import pandas as pd
+import pyarrow.parquet as pq
 from datetime import datetime
 
+from etl.catalog import latest_batch_file, latest_batch_folder
+from etl.extract.extract import content_hash
+from etl.instrumentation import count, instrumented, set_status, step
+from etl.staging import apply_dtypes, is_staged_from, record_staged_source, to_arrow, write_staging, write_staging_batches
+from etl.transform.date_dimension import attach_date_attributes
+from etl.transform.datetimes import calendar_date, forget_inferred_formats, parse_datetimes
 
-def get_latest_batch_folder(base_path: str) -> str:
-    folders = [
-        f for f in os.listdir(base_path)
-        if os.path.isdir(os.path.join(base_path, f))
-    ]
-
-    if not folders:
-        raise FileNotFoundError(f"No dated folders in {base_path}")
-
-    folders.sort(reverse=True)
-    return os.path.join(base_path, folders[0])
+STATUS_CODES = {
+    "present": 1,
+    "absent": 0,
+    "late": 0.5,
+    "remote": 1,
+    "leave": 0,
+    "sick leave": 0
+}
 
+# status_label of raw statuses STATUS_CODES has no code for
+UNKNOWN_STATUS = "unknown"
 
-def get_latest_csv(path: str) -> str:
-    files = [f for f in os.listdir(path) if f.endswith(".csv")]
-    if not files:
-        raise FileNotFoundError(f"No CSV files in {path}")
+# Streaming mode holds roughly this many rows in memory at once: one raw chunk
+# while spilling sorted runs, and the merge buffers of all runs while merging.
+STREAM_CHUNK_ROWS = 500_000
 
-    files.sort(reverse=True)
-    return os.path.join(path, files[0])
+# Most sorted runs merged at once; more runs are merged in several passes.
+MERGE_FAN_IN = 16
 
+# Raw files above this size are cleaned in streaming mode unless told otherwise.
+STREAMING_THRESHOLD_BYTES = 1024 * 1024 * 1024
 
-def ensure_dir(path: str):
-    if not os.path.exists(path):
-        os.makedirs(path)
 
-
-def clean_attendance(df: pd.DataFrame) -> pd.DataFrame:
+def clean_attendance_rows(df: pd.DataFrame) -> pd.DataFrame:
     df.columns = (
         df.columns
         .str.strip()
@@ -40,15 +45,12 @@ def clean_attendance(df: pd.DataFrame) -> pd.DataFrame:
     )
 
     if "status" in df.columns:
-        df["status"] = df["status"].astype(str).str.strip().str.lower()
+        labels = df["status"].astype(str).str.strip().str.lower()
 
-        df["status"] = df["status"].replace({
-            "present": 1,
-            "absent": 0,
-            "late": 0.5,
-            "remote": 1,
-            "leave": 0
-        })
+        # the code feeds the aggregates, which count remote as present; the
+        # label keeps remote, leave and sick leave apart for the warehouse
+        df["status_label"] = labels.where(labels.isin(list(STATUS_CODES)), UNKNOWN_STATUS).where(df["status"].notna())
+        df["status"] = labels.map(STATUS_CODES)
 
     timestamp_candidates = ["timestamp", "timestamp_local", "check_in"]
 
@@ -59,12 +61,12 @@ def clean_attendance(df: pd.DataFrame) -> pd.DataFrame:
             break
 
     if timestamp_col:
-        df[timestamp_col] = pd.to_datetime(df[timestamp_col])
+        df[timestamp_col] = parse_datetimes(df[timestamp_col], "attendance")
         df = df.rename(columns={timestamp_col: "timestamp"})
-        df["date"] = df["timestamp"].dt.date
+        df["date"] = calendar_date(df["timestamp"])
 
     elif "date" in df.columns:
-        df["date"] = pd.to_datetime(df["date"]).dt.date
+        df["date"] = calendar_date(parse_datetimes(df["date"], "attendance"))
 
     else:
         raise KeyError(
@@ -72,47 +74,234 @@ def clean_attendance(df: pd.DataFrame) -> pd.DataFrame:
             "timestamp, timestamp_local, check_in, date"
         )
 
-    date_series = pd.to_datetime(df["date"])
-    df["year"] = date_series.dt.year
-    df["month"] = date_series.dt.month
-    df["weekday"] = date_series.dt.day_name()
+    df = attach_date_attributes(df, "date", ["year", "month", "weekday"])
 
-    df["employee_id"] = df["employee_id"].astype(str)
+    return apply_dtypes(df, "attendance")
 
-    sort_cols = ["employee_id"]
-    if "timestamp" in df.columns:
-        sort_cols.append("timestamp")
-    else:
-        sort_cols.append("date")
 
-    df = df.sort_values(sort_cols)
+def attendance_sort_columns(df: pd.DataFrame) -> list:
+    if "timestamp" in df.columns:
+        return ["employee_id", "timestamp"]
+    return ["employee_id", "date"]
 
-    return df
 
+def clean_attendance(df: pd.DataFrame) -> pd.DataFrame:
+    df = clean_attendance_rows(df)
+    return df.sort_values(attendance_sort_columns(df))
+
+
+def _sorted_prefix_le(df: pd.DataFrame, sort_cols: list, bound: tuple) -> int:
+    # rows of a sorted frame with key <= bound form a prefix; narrow the range
+    # of rows equal to bound column by column with binary searches
+    lo, hi = 0, len(df)
+    for col, value in zip(sort_cols, bound):
+        values = df[col].iloc[lo:hi]
+        lo, hi = lo + values.searchsorted(value, side="left"), lo + values.searchsorted(value, side="right")
+    return int(hi)
+
+
+def merge_sorted_runs(run_paths: list, sort_cols: list, buffer_rows: int = STREAM_CHUNK_ROWS):
+    """Yield DataFrames in global sort order from individually sorted Parquet runs.
+
+    Each run keeps one buffer of about buffer_rows / len(run_paths) rows. Rows
+    up to the smallest "last buffered key" among unfinished runs can no longer
+    be undercut by unread rows, so they are emitted and the rest stays buffered.
+    Emitted rows are gathered into frames of about buffer_rows. Callers keep
+    len(run_paths) to at most MERGE_FAN_IN (see merge_runs).
+    """
+    batch_rows = max(buffer_rows // max(len(run_paths), 1), 1)
+    readers = [
+        pq.ParquetFile(path).iter_batches(batch_size=batch_rows)
+        for path in run_paths
+    ]
+    buffers = [None] * len(readers)
+    last_keys = [None] * len(readers)
+    exhausted = [False] * len(readers)
+    merged, merged_rows = [], 0
+
+    while True:
+        for i, reader in enumerate(readers):
+            if not exhausted[i] and (buffers[i] is None or buffers[i].empty):
+                try:
+                    buffers[i] = next(reader).to_pandas(date_as_object=False)
+                    last_keys[i] = tuple(buffers[i][col].iloc[-1] for col in sort_cols)
+                except StopIteration:
+                    exhausted[i] = True
+
+        live = [b for b in buffers if b is not None and not b.empty]
+        if not live:
+            break
 
-def run_attendance_transform():
+        pending_last_keys = [
+            last_keys[i]
+            for i in range(len(readers))
+            if not exhausted[i] and buffers[i] is not None and not buffers[i].empty
+        ]
+
+        if not pending_last_keys:
+            ready = live
+            buffers = [None] * len(readers)
+        else:
+            bound = min(pending_last_keys)
+            ready = []
+            for i, buffer in enumerate(buffers):
+                if buffer is None or buffer.empty:
+                    continue
+                # a buffer whose last key is within the bound is ready whole
+                cut = len(buffer) if last_keys[i] <= bound else _sorted_prefix_le(buffer, sort_cols, bound)
+                ready.append(buffer.iloc[:cut])
+                buffers[i] = buffer.iloc[cut:]
+
+        ready = [r for r in ready if not r.empty]
+        if len(ready) > 1:
+            merged.append(pd.concat(ready, ignore_index=True).sort_values(sort_cols, kind="mergesort"))
+        else:
+            merged.extend(ready)
+        merged_rows += sum(len(r) for r in ready)
+
+        if merged_rows >= buffer_rows:
+            yield pd.concat(merged, ignore_index=True)
+            merged, merged_rows = [], 0
+
+    if merged:
+        yield pd.concat(merged, ignore_index=True)
+
+
+def write_run(batches, path: str):
+    writer = None
+    try:
+        for df in batches:
+            table = to_arrow(df, "attendance")
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table.cast(writer.schema))
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def merge_runs(run_paths: list, sort_cols: list, run_dir: str, buffer_rows: int = STREAM_CHUNK_ROWS):
+    """Merge sorted runs in passes of at most MERGE_FAN_IN runs; yields the final pass.
+
+    Bounding the fan-in keeps every run's buffer at buffer_rows / MERGE_FAN_IN
+    rows however many runs were spilled, so each pass costs about one read and
+    one write of the data instead of degrading with the number of runs.
+    """
+    merge_pass = 0
+    while len(run_paths) > MERGE_FAN_IN:
+        merged = []
+        for group_start in range(0, len(run_paths), MERGE_FAN_IN):
+            group = run_paths[group_start:group_start + MERGE_FAN_IN]
+            if len(group) == 1:
+                merged.extend(group)
+                continue
+
+            path = os.path.join(run_dir, f"merge_{merge_pass:02d}_{len(merged):05d}.parquet")
+            write_run(merge_sorted_runs(group, sort_cols, buffer_rows), path)
+            for run_path in group:
+                os.remove(run_path)
+            merged.append(path)
+
+        run_paths = merged
+        merge_pass += 1
+
+    return merge_sorted_runs(run_paths, sort_cols, buffer_rows)
+
+
+def stream_clean_attendance(input_path: str, staging_output: str, chunk_rows: int = STREAM_CHUNK_ROWS,
+                            spill_dir: str = None):
+    """Clean a raw attendance CSV chunk by chunk and stage it in global sort order.
+
+    Sorted chunks are spilled as Parquet runs under spill_dir (system temp dir
+    by default) and k-way merged, so memory is bounded by chunk_rows rather
+    than by the size of the input.
+    """
+    with tempfile.TemporaryDirectory(prefix="attendance_runs_", dir=spill_dir) as run_dir:
+        run_paths = []
+        sort_cols = None
+
+        for i, chunk in enumerate(pd.read_csv(input_path, chunksize=chunk_rows)):
+            count(rows_in=len(chunk))
+            with step("clean"):
+                cleaned = clean_attendance_rows(chunk)
+            if sort_cols is None:
+                sort_cols = attendance_sort_columns(cleaned)
+
+            with step("sort"):
+                run = to_arrow(cleaned.sort_values(sort_cols), "attendance")
+
+            run_path = os.path.join(run_dir, f"run_{i:05d}.parquet")
+            with step("spill"):
+                pq.write_table(run, run_path)
+            run_paths.append(run_path)
+
+        print(f"Spilled {len(run_paths)} sorted runs, merging...")
+
+        with step("merge_write"):
+            return write_staging_batches(
+                merge_runs(run_paths, sort_cols or ["employee_id", "date"], run_dir, chunk_rows),
+                "attendance",
+                staging_output,
+            )
+
+
+@instrumented("transform_attendance")
+def run_attendance_transform(streaming: bool = None, chunk_rows: int = STREAM_CHUNK_ROWS):
     print("\nRunning attendance transform...\n")
 
     raw_path = "data/raw/attendance"
-    latest_folder = get_latest_batch_folder(raw_path)
-    latest_file = get_latest_csv(latest_folder)
+    latest_folder = latest_batch_folder(raw_path)
+    latest_file = latest_batch_file(latest_folder)
 
     print(f"Latest folder: {latest_folder}")
     print(f"Latest CSV: {latest_file}")
 
-    df = pd.read_csv(latest_file)
-    cleaned = clean_attendance(df)
-
     extract_date = os.path.basename(latest_folder)
     staging_output = f"data/staging/attendance/{extract_date}"
-    ensure_dir(staging_output)
+    with step("hash"):
+        source_hash = content_hash(latest_file)
+
+    if is_staged_from(staging_output, "attendance", source_hash):
+        print(f"Source batch unchanged since last transform, skipping: {latest_file}")
+        set_status("skipped")
+        return
+
+    # formats are inferred once per raw batch
+    forget_inferred_formats("attendance")
+
+    if streaming is None:
+        streaming = os.path.getsize(latest_file) > STREAMING_THRESHOLD_BYTES
+
+    if streaming:
+        print(f"Streaming mode, {chunk_rows} rows per chunk")
+        output_file, rows = stream_clean_attendance(latest_file, staging_output, chunk_rows)
+    else:
+        with step("read"):
+            df = pd.read_csv(latest_file)
+        count(rows_in=len(df))
+
+        with step("clean"):
+            cleaned = clean_attendance_rows(df)
+        with step("sort"):
+            cleaned = cleaned.sort_values(attendance_sort_columns(cleaned))
+
+        with step("write"):
+            output_file = write_staging(cleaned, "attendance", staging_output)
+        rows = len(cleaned)
 
-    output_file = os.path.join(staging_output, "attendance_cleaned.csv")
-    cleaned.to_csv(output_file, index=False)
+    count(rows_out=rows, bytes_read=os.path.getsize(latest_file), bytes_written=os.path.getsize(output_file))
+
+    record_staged_source(staging_output, "attendance", latest_file, source_hash)
 
     print(f"Saved cleaned attendance dataset to: {output_file}")
     print("Attendance transform is done.\n")
 
 
 if __name__ == "__main__":
-    run_attendance_transform()
+    parser = argparse.ArgumentParser(description="Clean the latest raw attendance batch.")
+    parser.add_argument("--streaming", action="store_true", default=None,
+                        help="clean in bounded chunks with an external merge sort")
+    parser.add_argument("--chunk-rows", type=int, default=STREAM_CHUNK_ROWS)
+    args = parser.parse_args()
+
+    run_attendance_transform(streaming=args.streaming, chunk_rows=args.chunk_rows)
@@ -1,37 +1,13 @@
 import os
 import pandas as pd
 
-def get_latest_batch_folder(base_path: str) -> str:
-    if not os.path.exists(base_path):
-        raise FileNotFoundError(f"Raw path does not exist: {base_path}")
-
-    folders = [
-        f for f in os.listdir(base_path)
-        if os.path.isdir(os.path.join(base_path, f))
-    ]
-
-    if not folders:
-        raise FileNotFoundError(f"No dated folder found in: {base_path}")
-
-    folders.sort(reverse=True)
-    return os.path.join(base_path, folders[0])
-
-def get_latest_csv(path: str) -> str:
-    files = [
-        f for f in os.listdir(path)
-        if f.endswith(".csv")
-    ]
-
-    if not files:
-        raise FileNotFoundError(f"No csv files inside: {path}")
-
-    files.sort(reverse=True)
-    return os.path.join(path, files[0])
-
-
-def ensure_dir(path: str):
-    os.makedirs(path, exist_ok=True)
+from etl.catalog import latest_batch_file, latest_batch_folder
+from etl.extract.extract import content_hash
+from etl.instrumentation import count, instrumented, set_status, step
+from etl.staging import apply_dtypes, is_staged_from, record_staged_source, write_staging
 
+# raw primary key column names, after normalisation, tried when employee_id is absent
+EMPLOYEE_ID_CANDIDATES = ["id", "employee_number", "emp_id", "employeeid"]
 
 def clean_employee(df: pd.DataFrame) -> pd.DataFrame:
     df.columns = (
@@ -43,7 +19,7 @@ def clean_employee(df: pd.DataFrame) -> pd.DataFrame:
     )
 
     if "employee_id" not in df.columns:
-        for candidate in ["id", "employee_number", "emp_id", "employeeid"]:
+        for candidate in EMPLOYEE_ID_CANDIDATES:
             if candidate in df.columns:
                 df = df.rename(columns={candidate: "employee_id"})
                 break
@@ -54,8 +30,6 @@ def clean_employee(df: pd.DataFrame) -> pd.DataFrame:
             "(employee_id / employee_number / id / emp_id)"
         )
 
-    df["employee_id"] = df["employee_id"].astype(str)
-
     if "department" in df.columns:
         df["department"] = df["department"].astype(str).str.strip().str.title()
 
@@ -76,27 +50,40 @@ def clean_employee(df: pd.DataFrame) -> pd.DataFrame:
                 .map({"yes": 1, "no": 0})
             )
 
-    return df
+    return apply_dtypes(df, "employee")
 
+@instrumented("transform_employee")
 def run_employee_transform():
     print("\nRunning employee transform...\n")
 
     raw_path = "data/raw/ibm_hr"
-    latest_folder = get_latest_batch_folder(raw_path)
-    latest_file = get_latest_csv(latest_folder)
+    latest_folder = latest_batch_folder(raw_path)
+    latest_file = latest_batch_file(latest_folder)
 
     print(f"Latest batch folder: {latest_folder}")
     print(f"Latest CSV file: {latest_file}")
 
-    df = pd.read_csv(latest_file)
-    cleaned = clean_employee(df)
-
     extract_date = os.path.basename(latest_folder)
     staging_output = f"data/staging/employee/{extract_date}"
-    ensure_dir(staging_output)
+    with step("hash"):
+        source_hash = content_hash(latest_file)
+
+    if is_staged_from(staging_output, "employee", source_hash):
+        print(f"Source batch unchanged since last transform, skipping: {latest_file}")
+        set_status("skipped")
+        return
+
+    with step("read"):
+        df = pd.read_csv(latest_file)
+    count(rows_in=len(df), bytes_read=os.path.getsize(latest_file))
+
+    with step("clean"):
+        cleaned = clean_employee(df)
 
-    output_file = os.path.join(staging_output, "employee_cleaned.csv")
-    cleaned.to_csv(output_file, index=False)
+    with step("write"):
+        output_file = write_staging(cleaned, "employee", staging_output)
+    count(rows_out=len(cleaned), bytes_written=os.path.getsize(output_file))
+    record_staged_source(staging_output, "employee", latest_file, source_hash)
 
     print(f"\nEmployee dataset saved to: {output_file}")
     print("Employee transform is done.")
@@ -1,34 +1,13 @@
 import os 
 import pandas as pd
-from datetime import datetime, timezone
 
-def get_latest_batch_folder(base_path: str) -> str:
-    folders = [
-        f for f in os.listdir(base_path)
-        if os.path.isdir(os.path.join(base_path, f))
-    ]
-
-    if not folders:
-        raise FileNotFoundError(f"No dated folder found in: {base_path}")
-
-    folders.sort(reverse=True)
-    latest = folders[0]
-    return os.path.join(base_path, latest)
-
-def get_latest_csv(path: str) -> str:
-    files = [f for f in os.listdir(path) if f.endswith(".csv")]
-
-    if not files:
-        raise FileNotFoundError(f"No csv files inside: {path}")
-    
-    files.sort(reverse=True)
-    latest_csv = files[0]
-
-    return os.path.join(path, latest_csv)
-
-def ensure_dir(path: str):
-    if not os.path.exists(path):
-        os.makedirs(path)
+from etl.catalog import latest_batch_file, latest_batch_folder
+from etl.extract.extract import content_hash
+from etl.instrumentation import count, instrumented, set_status, step
+from etl.staging import apply_dtypes, is_staged_from, record_staged_source, write_staging
+from etl.transform.date_dimension import attach_date_attributes
+from etl.transform.datetimes import forget_inferred_formats, parse_datetimes
+from etl.transform.encoders import LIKERT_SCALE, answer_columns, encode_ordinal
 
 def clean_engagement(df: pd.DataFrame) -> pd.DataFrame:
     df.columns = (df.columns
@@ -37,9 +16,6 @@ def clean_engagement(df: pd.DataFrame) -> pd.DataFrame:
     .str.replace(" ", "_")
     .str.replace("-", "_"))
 
-    if "employee_id" in df.columns:
-        df["employee_id"] = df["employee_id"].astype(str)
-
     date_col = None
     for col in ["survey_date", "date", "timestamp"]:
         if col in df.columns:
@@ -49,47 +25,51 @@ def clean_engagement(df: pd.DataFrame) -> pd.DataFrame:
     if date_col is None:
         raise KeyError("Survey date column not found in engagement dataset.")
 
-    df[date_col] = pd.to_datetime(df[date_col])
+    df[date_col] = parse_datetimes(df[date_col], "engagement")
     df = df.rename(columns={date_col: "survey_date"})
 
-    df["year"] = df["survey_date"].dt.year
-    df["month"] = df["survey_date"].dt.month
+    df = attach_date_attributes(df, "survey_date", ["year", "month"])
 
-    likert_map = {
-        "strongly disagree": 1,
-        "disagree": 2,
-        "neutral": 3,
-        "agree": 4,
-        "strongly agree": 5
-    }
+    for col in answer_columns(df, "engagement", LIKERT_SCALE):
+        df[col] = encode_ordinal(df[col], LIKERT_SCALE)
 
-    for col in df.columns:
-        if df[col].dtype == "object":
-            lower = df[col].str.lower()
-            if lower.isin(likert_map).any():
-                df[col] = lower.map(likert_map)
-
-    return df
+    return apply_dtypes(df, "engagement")
 
+@instrumented("transform_engagement")
 def run_engagement_transform():
     print("\nRunning engagement transform...\n")
 
     raw_path = "data/raw/engagement"
-    latest_folder = get_latest_batch_folder(raw_path)
-    latest_file = get_latest_csv(latest_folder)
+    latest_folder = latest_batch_folder(raw_path)
+    latest_file = latest_batch_file(latest_folder)
 
     print(f"Latest batch folder is: {latest_folder}")
     print(f"Latest CSV file is: {latest_file}")
 
-    df = pd.read_csv(latest_file)
-    cleaned = clean_engagement(df)
-
     extract_date = os.path.basename(latest_folder)
     staging_output = f"data/staging/engagement/{extract_date}"
-    ensure_dir(staging_output)
-    
-    output_file = os.path.join(staging_output, "engagement_cleaned.csv")
-    cleaned.to_csv(output_file, index=False)
+    with step("hash"):
+        source_hash = content_hash(latest_file)
+
+    if is_staged_from(staging_output, "engagement", source_hash):
+        print(f"Source batch unchanged since last transform, skipping: {latest_file}")
+        set_status("skipped")
+        return
+
+    # formats are inferred once per raw batch
+    forget_inferred_formats("engagement")
+
+    with step("read"):
+        df = pd.read_csv(latest_file)
+    count(rows_in=len(df), bytes_read=os.path.getsize(latest_file))
+
+    with step("clean"):
+        cleaned = clean_engagement(df)
+
+    with step("write"):
+        output_file = write_staging(cleaned, "engagement", staging_output)
+    count(rows_out=len(cleaned), bytes_written=os.path.getsize(output_file))
+    record_staged_source(staging_output, "engagement", latest_file, source_hash)
 
     print(f"Engagement dataset cleaned and saved to: {output_file}")
     print("Engagement transform is done.")
@@ -0,0 +1,278 @@
+"""Rolling per-employee features for the attrition models, as of a date.
+
+Attendance rows sorted by (employee_id, date) are addressed through one int64
+composite key, employee_id * KEY_STRIDE + day, so every window bound of every
+employee is a single np.searchsorted over the whole array and window sums are
+differences of cumulative sums: one vectorized pass, no per-employee loop.
+
+Runs are incremental. The state keeps the attendance and engagement rows
+still inside the longest window (plus the last two surveys per employee);
+each run appends the staging batches not applied yet, recomputes the windows
+as of the new date and trims the state again.
+
+    python -m etl.transform.transform_features [--as-of 2022-12-30] [--full-refresh]
+"""
+import os
+import json
+import argparse
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from etl.catalog import batch_folders, staging_root
+from etl.instrumentation import count, instrumented, set_status, step
+from etl.staging import ensure_dir, read_staging, to_arrow, to_pandas, write_staging
+from etl.transform.latest_records import top_k_per_key
+
+WINDOWS_DAYS = (30, 90, 365)
+STREAK_WINDOW_DAYS = 90
+ENGAGEMENT_WINDOW_DAYS = 365
+
+# wider than any day offset the key has to hold (~2,800 years)
+KEY_STRIDE = 1 << 20
+
+ATTENDANCE_FEATURE_COLUMNS = ["employee_id", "date", "status", "is_late"]
+ENGAGEMENT_SCORE_PREFIX = "q_"
+
+STATE_DIR = "data/state/features"
+STATE_FILE = "state.json"
+
+# state table -> staging dataset whose declared column types it is written with
+STATE_TABLES = {
+    "attendance_tail": "attendance",
+    "engagement_tail": "engagement",
+}
+
+
+def day_numbers(dates: pd.Series) -> np.ndarray:
+    if dates.dt.tz is not None:
+        dates = dates.dt.tz_localize(None)
+    return dates.to_numpy(dtype="datetime64[D]").astype(np.int64)
+
+
+def composite_keys(employee_ids: np.ndarray, days: np.ndarray, base_day: int) -> np.ndarray:
+    return employee_ids.astype(np.int64) * KEY_STRIDE + (days - base_day)
+
+
+def late_streaks(late: np.ndarray, segment_starts: np.ndarray) -> np.ndarray:
+    """Length of the run of late days ending at each row, restarting per employee."""
+    index = np.arange(len(late))
+    breaks = np.where(late, -1, index)
+    # a run cannot reach back into the previous employee's rows
+    breaks[segment_starts] = np.where(late[segment_starts], segment_starts - 1, segment_starts)
+    last_break = np.maximum.accumulate(breaks)
+    return np.where(late, index - last_break, 0)
+
+
+def window_max(values: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+    """max(values[lo:hi]) per window, 0 for empty windows."""
+    result = np.zeros(len(lo), dtype=values.dtype)
+    nonempty = hi > lo
+    if nonempty.any():
+        starts, lengths = lo[nonempty], hi[nonempty] - lo[nonempty]
+        # the windows laid end to end, so one reduceat covers all of them
+        offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+        rows = np.repeat(starts - offsets, lengths) + np.arange(lengths.sum())
+        result[nonempty] = np.maximum.reduceat(values[rows], offsets)
+    return result
+
+
+def attendance_features(df_att: pd.DataFrame, as_of) -> pd.DataFrame:
+    """Absence and lateness windows per employee over the days up to as_of."""
+    df = df_att[df_att["employee_id"].notna() & df_att["date"].notna()]
+    as_of_day = int(np.datetime64(pd.Timestamp(as_of).date(), "D").astype(np.int64))
+
+    employee_ids = df["employee_id"].to_numpy(dtype=np.int64)
+    days = day_numbers(df["date"])
+    base_day = min(int(days.min()) if len(days) else as_of_day, as_of_day - max(WINDOWS_DAYS))
+    keys = composite_keys(employee_ids, days, base_day)
+
+    if len(keys) > 1 and (np.diff(keys) < 0).any():
+        order = np.argsort(keys, kind="stable")
+        df, employee_ids, days, keys = df.iloc[order], employee_ids[order], days[order], keys[order]
+
+    absent = (df["status"] == 0).to_numpy()
+    late = (df["is_late"] == 1).to_numpy()
+    absent_sums = np.concatenate([[0], np.cumsum(absent)])
+    late_sums = np.concatenate([[0], np.cumsum(late)])
+
+    segment_starts = np.flatnonzero(np.concatenate([[True], employee_ids[1:] != employee_ids[:-1]]))
+    ids = employee_ids[segment_starts]
+    hi = np.searchsorted(keys, composite_keys(ids, as_of_day, base_day), side="right")
+
+    features = {"employee_id": ids}
+    for window in WINDOWS_DAYS:
+        lo = np.searchsorted(keys, composite_keys(ids, as_of_day - window, base_day), side="right")
+        recorded = hi - lo
+        with np.errstate(divide="ignore", invalid="ignore"):
+            features[f"days_recorded_{window}d"] = recorded
+            features[f"absence_rate_{window}d"] = (absent_sums[hi] - absent_sums[lo]) / recorded
+            features[f"late_rate_{window}d"] = (late_sums[hi] - late_sums[lo]) / recorded
+
+    streaks = late_streaks(late, segment_starts)
+    has_rows = hi > segment_starts
+    features["late_streak_current"] = np.where(has_rows, streaks[np.maximum(hi - 1, 0)], 0)
+
+    # a run that started before the window only counts its days inside it
+    lo = np.searchsorted(keys, composite_keys(ids, as_of_day - STREAK_WINDOW_DAYS, base_day), side="right")
+    row_lo = np.repeat(lo, np.diff(np.concatenate([segment_starts, [len(keys)]])))
+    clipped = np.minimum(streaks, np.arange(len(keys)) - row_lo + 1)
+    features[f"late_streak_max_{STREAK_WINDOW_DAYS}d"] = window_max(clipped, lo, hi)
+
+    return pd.DataFrame(features)
+
+
+def engagement_score_columns(df_eng: pd.DataFrame) -> list:
+    return [c for c in df_eng.columns if c.startswith(ENGAGEMENT_SCORE_PREFIX)]
+
+
+def engagement_features(df_eng: pd.DataFrame, as_of) -> pd.DataFrame:
+    """Latest survey score, change since the previous survey and survey recency."""
+    as_of = pd.Timestamp(as_of).normalize()
+    surveyed = df_eng["survey_date"].dt.normalize()
+    df = df_eng[surveyed <= as_of]
+
+    scores = pd.DataFrame({
+        "employee_id": df["employee_id"],
+        "survey_date": df["survey_date"],
+        "score": df[engagement_score_columns(df)].mean(axis=1),
+    })
+
+    last_two = top_k_per_key(scores, "employee_id", "survey_date", 2, rank_column="rank")
+    last = last_two[last_two["rank"] == 1].set_index("employee_id")
+    previous = last_two[last_two["rank"] == 2].set_index("employee_id")
+
+    recent = scores[scores["survey_date"].dt.normalize() > as_of - pd.Timedelta(days=ENGAGEMENT_WINDOW_DAYS)]
+
+    features = pd.DataFrame(index=last.index)
+    features["eng_score_last"] = last["score"]
+    features["eng_score_previous"] = previous["score"].reindex(last.index)
+    features["eng_score_delta"] = features["eng_score_last"] - features["eng_score_previous"]
+    features["eng_days_since_survey"] = (as_of - last["survey_date"].dt.normalize()).dt.days
+    features[f"eng_surveys_{ENGAGEMENT_WINDOW_DAYS}d"] = (
+        recent.groupby("employee_id").size().reindex(last.index, fill_value=0)
+    )
+    return features.reset_index()
+
+
+def build_features(df_att: pd.DataFrame, df_eng: pd.DataFrame, as_of) -> pd.DataFrame:
+    features = attendance_features(df_att, as_of).merge(
+        engagement_features(df_eng, as_of), on="employee_id", how="outer"
+    )
+    features.insert(1, "as_of_date", pd.Timestamp(as_of).normalize())
+    return features.sort_values("employee_id").reset_index(drop=True)
+
+
+def trim_attendance(df_att: pd.DataFrame, as_of) -> pd.DataFrame:
+    cutoff = pd.Timestamp(as_of).normalize() - pd.Timedelta(days=max(WINDOWS_DAYS))
+    return df_att[df_att["date"] > cutoff].reset_index(drop=True)
+
+
+def trim_engagement(df_eng: pd.DataFrame, as_of) -> pd.DataFrame:
+    # the window's surveys, plus the two latest per employee for the deltas
+    cutoff = pd.Timestamp(as_of).normalize() - pd.Timedelta(days=ENGAGEMENT_WINDOW_DAYS)
+    recent = df_eng["survey_date"] > cutoff
+    latest = df_eng["survey_id"].isin(top_k_per_key(df_eng, "employee_id", "survey_date", 2)["survey_id"])
+    return df_eng[recent | latest].reset_index(drop=True)
+
+
+def state_path(name: str, state_dir: str = STATE_DIR) -> str:
+    return os.path.join(state_dir, f"{name}.parquet")
+
+
+def load_state(state_dir: str = STATE_DIR) -> dict:
+    meta_path = os.path.join(state_dir, STATE_FILE)
+    if not os.path.exists(meta_path):
+        return {"applied": {}, "as_of": None, "tables": {}}
+
+    with open(meta_path) as fh:
+        meta = json.load(fh)
+
+    tables = {
+        name: to_pandas(pq.read_table(state_path(name, state_dir)))
+        for name in STATE_TABLES
+        if os.path.exists(state_path(name, state_dir))
+    }
+    return {"applied": meta["applied"], "as_of": meta["as_of"], "tables": tables}
+
+
+def save_state(state: dict, state_dir: str = STATE_DIR):
+    ensure_dir(state_dir)
+    for name, df in state["tables"].items():
+        pq.write_table(to_arrow(df, STATE_TABLES[name]), state_path(name, state_dir))
+
+    # written last: a crash before this point replays the same batches next run
+    with open(os.path.join(state_dir, STATE_FILE), "w") as fh:
+        json.dump({"applied": state["applied"], "as_of": state["as_of"]}, fh, indent=2)
+
+
+def append_batches(tail: pd.DataFrame, dataset: str, folders: list, columns=None) -> pd.DataFrame:
+    frames = [tail] if tail is not None else []
+    frames += [read_staging(dataset, folder, columns=columns) for folder in folders]
+    return pd.concat(frames, ignore_index=True)
+
+
+@instrumented("transform_features")
+def run_features_transform(as_of: str = None, full_refresh: bool = False, state_dir: str = STATE_DIR):
+    """Compute the rolling features as of as_of (default: latest attendance day).
+
+    Staging folders not applied yet are folded into the state; full_refresh
+    rebuilds the state from every staging folder. The state only holds rows
+    needed from its own as_of on, so an earlier as_of needs full_refresh.
+    """
+    print("\nRunning features transform...\n")
+
+    state = {"applied": {}, "as_of": None, "tables": {}} if full_refresh else load_state(state_dir)
+    tables = state["tables"]
+
+    pending = {
+        dataset: [f for f in batch_folders(staging_root(dataset)) if f not in state["applied"].get(dataset, [])]
+        for dataset in ("attendance", "engagement")
+    }
+
+    with step("read"):
+        attendance = append_batches(tables.get("attendance_tail"), "attendance", pending["attendance"],
+                                    columns=ATTENDANCE_FEATURE_COLUMNS)
+        engagement = append_batches(tables.get("engagement_tail"), "engagement", pending["engagement"])
+    count(rows_in=len(attendance) + len(engagement))
+
+    # a later batch replaces the rows it repeats
+    attendance = attendance.drop_duplicates(["employee_id", "date"], keep="last")
+    engagement = engagement.drop_duplicates("survey_id", keep="last")
+
+    as_of = pd.Timestamp(as_of or attendance["date"].max()).normalize()
+    if state["as_of"] and as_of < pd.Timestamp(state["as_of"]):
+        raise ValueError(
+            f"Features state is as of {state['as_of']}; rows needed for {as_of.date()} were trimmed, "
+            "rerun with full_refresh (--full-refresh)"
+        )
+    if not any(pending.values()) and state["as_of"] == str(as_of.date()):
+        print(f"No new staging batches, features as of {as_of.date()} are up to date.")
+        set_status("skipped")
+        return
+
+    with step("features"):
+        features = build_features(attendance, engagement, as_of)
+
+    with step("write"):
+        output_file = write_staging(features, "features", os.path.join(staging_root("features"), str(as_of.date())))
+    count(rows_out=len(features), bytes_written=os.path.getsize(output_file))
+
+    for dataset, folders in pending.items():
+        state["applied"][dataset] = state["applied"].get(dataset, []) + folders
+    state["as_of"] = str(as_of.date())
+    tables["attendance_tail"] = trim_attendance(attendance, as_of)
+    tables["engagement_tail"] = trim_engagement(engagement, as_of)
+    save_state(state, state_dir)
+
+    print(f"Features as of {as_of.date()} saved to: {output_file}")
+    print("Features transform is done.\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compute rolling attendance and engagement features.")
+    parser.add_argument("--as-of", default=None, help="feature date, YYYY-MM-DD (default: latest attendance day)")
+    parser.add_argument("--full-refresh", action="store_true", help="rebuild the state from every staging batch")
+    args = parser.parse_args()
+
+    run_features_transform(as_of=args.as_of, full_refresh=args.full_refresh)
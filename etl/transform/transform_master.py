@@ -1,43 +1,32 @@
 import os
+import argparse
 import pandas as pd
 
-def get_latest_staging_folder(base_path: str) -> str:
-    if not os.path.exists(base_path):
-        raise FileNotFoundError(f"Staging path does not exist: {base_path}")
+from etl.catalog import latest_staging_folders
+from etl.instrumentation import count, instrumented, step
+from etl.staging import read_staging, write_staging
+from etl.transform.latest_records import latest_per_key
+from etl.transform.transform_attendance import STATUS_CODES
 
-    folders = [
-        f for f in os.listdir(base_path)
-        if os.path.isdir(os.path.join(base_path, f))
-    ]
+ATTENDANCE_COLUMNS = ["employee_id", "status", "hours_worked", "is_late", "is_overtime"]
 
-    if not folders:
-        raise FileNotFoundError(f"No staging folders found in {base_path}")
+# numeric engagement columns that are keys, not scores to average
+ENGAGEMENT_KEY_COLUMNS = ["employee_id", "date_key"]
 
-    folders.sort(reverse=True)
-    return os.path.join(base_path, folders[0])
+# "pandas" or "duckdb"; both produce the same master_dataset
+MASTER_ENGINE = os.environ.get("MASTER_ENGINE", "pandas")
 
-def ensure_dir(path: str):
-    os.makedirs(path, exist_ok=True)
+def summarise_attendance(df_att: pd.DataFrame) -> pd.DataFrame:
+    if "status" not in df_att.columns:
+        raise ValueError("attendance staging dataset must contain 'status' column")
 
-def run_master_transform():
-    print("\nRunning Master Transform\n")
-
-    emp_folder = get_latest_staging_folder("data/staging/employee")
-    att_folder = get_latest_staging_folder("data/staging/attendance")
-    eng_folder = get_latest_staging_folder("data/staging/engagement")
-    perf_folder = get_latest_staging_folder("data/staging/performance")
-
-    df_emp = pd.read_csv(os.path.join(emp_folder, "employee_cleaned.csv"))
-    df_att = pd.read_csv(os.path.join(att_folder, "attendance_cleaned.csv"))
-    df_eng = pd.read_csv(os.path.join(eng_folder, "engagement_cleaned.csv"))
-    df_perf = pd.read_csv(os.path.join(perf_folder, "performance_cleaned.csv"))
-
-    if "status" in df_att.columns:
-        df_att["presence_flag"] = (df_att["status"] == "Present").astype(int)
-    else:
-        raise ValueError("attendance_cleaned.csv must contain 'status' column")
+    # hours are staged as float32; summed in float64, as DuckDB sums them
+    df_att = df_att.assign(
+        presence_flag=(df_att["status"] == STATUS_CODES["present"]).astype(int),
+        hours_worked=df_att["hours_worked"].astype("float64"),
+    )
 
-    attendance_summary = (
+    return (
         df_att
         .groupby("employee_id", as_index=False)
         .agg(
@@ -48,54 +37,109 @@ def run_master_transform():
         )
     )
 
+
+def engagement_numeric_columns(df_eng: pd.DataFrame) -> pd.Index:
     eng_numeric_cols = (
         df_eng
         .select_dtypes(include="number")
         .columns
-        .drop("employee_id", errors="ignore")
+        .drop(ENGAGEMENT_KEY_COLUMNS, errors="ignore")
     )
 
     if len(eng_numeric_cols) == 0:
         raise ValueError("No numeric engagement columns found to aggregate")
 
-    engagement_summary = (
+    return eng_numeric_cols
+
+
+def summarise_engagement(df_eng: pd.DataFrame) -> pd.DataFrame:
+    return (
         df_eng
-        .groupby("employee_id")[eng_numeric_cols]
+        .groupby("employee_id")[engagement_numeric_columns(df_eng)]
         .mean()
         .reset_index()
         .rename(columns=lambda c: f"eng_{c}" if c != "employee_id" else c)
     )
 
+
+def latest_performance(df_perf: pd.DataFrame) -> pd.DataFrame:
     if "review_date" not in df_perf.columns:
-        raise ValueError("performance_cleaned.csv must contain 'review_date' column")
+        raise ValueError("performance staging dataset must contain 'review_date' column")
 
-    performance_latest = (
-        df_perf
-        .sort_values("review_date")
-        .groupby("employee_id", as_index=False)
-        .last()
+    return (
+        latest_per_key(df_perf, "employee_id", "review_date")
         .rename(columns=lambda c: f"perf_{c}" if c != "employee_id" else c)
     )
 
+
+def join_master(df_emp: pd.DataFrame, attendance_summary: pd.DataFrame,
+                engagement_summary: pd.DataFrame, performance_latest: pd.DataFrame) -> pd.DataFrame:
+    """One row per employee row, in df_emp order, with the summaries joined on."""
     master = df_emp.copy()
 
     master = master.merge(attendance_summary, on="employee_id", how="left")
     master = master.merge(engagement_summary, on="employee_id", how="left")
     master = master.merge(performance_latest, on="employee_id", how="left")
 
+    return master
+
+
+def fill_numeric_gaps(master: pd.DataFrame) -> pd.DataFrame:
     numeric_cols = master.select_dtypes(include="number").columns
     master[numeric_cols] = master[numeric_cols].fillna(0)
 
+    return master
+
+
+def build_master(df_emp: pd.DataFrame, attendance_summary: pd.DataFrame,
+                 engagement_summary: pd.DataFrame, performance_latest: pd.DataFrame) -> pd.DataFrame:
+    return fill_numeric_gaps(join_master(df_emp, attendance_summary, engagement_summary, performance_latest))
+
+
+def master_output_folder(emp_folder: str) -> str:
     extract_date = os.path.basename(emp_folder)
-    output_folder = f"data/staging/master/{extract_date}"
-    ensure_dir(output_folder)
+    return f"data/staging/master/{extract_date}"
+
 
-    output_path = os.path.join(output_folder, "master_dataset.csv")
-    master.to_csv(output_path, index=False)
+@instrumented("transform_master")
+def run_master_transform(engine: str = None):
+    engine = engine or MASTER_ENGINE
+    if engine == "duckdb":
+        from etl.transform.transform_master_duckdb import run_master_transform_duckdb
+        return run_master_transform_duckdb()
+    if engine != "pandas":
+        raise ValueError(f"Unknown master transform engine: {engine}")
+
+    print("\nRunning Master Transform\n")
+
+    folders = latest_staging_folders()
+
+    with step("read"):
+        df_emp = read_staging("employee", folders["employee"])
+        df_att = read_staging("attendance", folders["attendance"], columns=ATTENDANCE_COLUMNS)
+        df_eng = read_staging("engagement", folders["engagement"])
+        df_perf = read_staging("performance", folders["performance"])
+    count(rows_in=len(df_emp) + len(df_att) + len(df_eng) + len(df_perf))
+
+    with step("aggregate"):
+        master = build_master(
+            df_emp,
+            summarise_attendance(df_att),
+            summarise_engagement(df_eng),
+            latest_performance(df_perf),
+        )
+
+    with step("write"):
+        output_path = write_staging(master, "master", master_output_folder(folders["employee"]))
+    count(rows_out=len(master), bytes_written=os.path.getsize(output_path))
 
     print(f"Master dataset saved to: {output_path}")
     print("\nMaster Transformation Complete\n")
 
 
 if __name__ == "__main__":
-    run_master_transform()
+    parser = argparse.ArgumentParser(description="Build the master dataset from the latest staging folders.")
+    parser.add_argument("--engine", choices=["pandas", "duckdb"], default=None)
+    args = parser.parse_args()
+
+    run_master_transform(engine=args.engine)
@@ -0,0 +1,172 @@
+import os
+import duckdb
+
+from etl.catalog import latest_staging_folders
+from etl.instrumentation import count, instrumented, step
+from etl.sql import quote
+from etl.staging import STAGING_FORMAT, PARQUET_ROW_GROUP_SIZE, ensure_dir, staging_path
+from etl.transform.latest_records import latest_per_key_sql
+from etl.transform.transform_attendance import STATUS_CODES
+from etl.transform.transform_master import ENGAGEMENT_KEY_COLUMNS, master_output_folder
+
+# DuckDB execution settings; None keeps DuckDB's own default
+DUCKDB_THREADS = os.environ.get("DUCKDB_THREADS")
+DUCKDB_MEMORY_LIMIT = os.environ.get("DUCKDB_MEMORY_LIMIT")
+DUCKDB_TEMP_DIRECTORY = os.environ.get("DUCKDB_TEMP_DIRECTORY", "data/tmp/duckdb")
+
+NUMERIC_TYPES = (
+    "TINYINT", "SMALLINT", "INTEGER", "BIGINT", "HUGEINT",
+    "UTINYINT", "USMALLINT", "UINTEGER", "UBIGINT", "UHUGEINT",
+    "FLOAT", "DOUBLE", "DECIMAL",
+)
+
+
+def staging_scan(dataset: str, folder: str) -> str:
+    parquet_path = staging_path(folder, dataset, "parquet")
+    if os.path.exists(parquet_path):
+        return f"read_parquet('{parquet_path}')"
+
+    csv_path = staging_path(folder, dataset, "csv")
+    if os.path.exists(csv_path):
+        return f"read_csv_auto('{csv_path}', header = true)"
+
+    raise FileNotFoundError(f"No staged {dataset} dataset in: {folder}")
+
+
+def connect(threads=DUCKDB_THREADS, memory_limit=DUCKDB_MEMORY_LIMIT,
+            temp_directory=DUCKDB_TEMP_DIRECTORY) -> duckdb.DuckDBPyConnection:
+    con = duckdb.connect()
+    if threads:
+        con.execute(f"SET threads = {int(threads)}")
+    if memory_limit:
+        con.execute(f"SET memory_limit = '{memory_limit}'")
+    if temp_directory:
+        # larger-than-memory joins and aggregates spill here
+        ensure_dir(temp_directory)
+        con.execute(f"SET temp_directory = '{temp_directory}'")
+    return con
+
+
+def column_types(con, relation: str) -> list:
+    return [(row[0], row[1]) for row in con.execute(f"DESCRIBE {relation}").fetchall()]
+
+
+def is_numeric(column_type: str) -> bool:
+    return column_type.upper().startswith(NUMERIC_TYPES)
+
+
+def register_staging_views(con, folders: dict):
+    # employee_id is staged as INTEGER; CSV fallbacks written before that hold
+    # text ids, so cast everywhere to keep the join keys consistent
+    for dataset, folder in folders.items():
+        con.execute(f"""
+            CREATE OR REPLACE VIEW {dataset} AS
+            SELECT * REPLACE (CAST(employee_id AS INTEGER) AS employee_id)
+            FROM {staging_scan(dataset, folder)}
+        """)
+
+
+def master_query(con) -> str:
+    emp_cols = [name for name, _ in column_types(con, "employee")]
+    eng_cols = [
+        name for name, col_type in column_types(con, "engagement")
+        if is_numeric(col_type) and name not in ENGAGEMENT_KEY_COLUMNS
+    ]
+    perf_cols = [name for name, _ in column_types(con, "performance") if name != "employee_id"]
+
+    if not eng_cols:
+        raise ValueError("No numeric engagement columns found to aggregate")
+    if "review_date" not in perf_cols:
+        raise ValueError("performance staging dataset must contain 'review_date' column")
+
+    eng_aggs = ",\n".join(f"avg({quote(c)}) AS {quote('eng_' + c)}" for c in eng_cols)
+
+    perf_cols_sql = ", ".join(f"{quote(c)} AS {quote('perf_' + c)}" for c in perf_cols)
+
+    return f"""
+        WITH emp AS (
+            SELECT *, row_number() OVER () AS _row_order FROM employee
+        ),
+        attendance_summary AS (
+            SELECT
+                employee_id,
+                sum(CASE WHEN status = {STATUS_CODES["present"]} THEN 1 ELSE 0 END) AS presence_score,
+                sum(hours_worked) AS total_hours,
+                sum(is_late) AS late_count,
+                sum(is_overtime) AS overtime_count
+            FROM attendance
+            GROUP BY employee_id
+        ),
+        engagement_summary AS (
+            SELECT employee_id, {eng_aggs}
+            FROM engagement
+            GROUP BY employee_id
+        ),
+        performance_latest AS (
+            SELECT employee_id, {perf_cols_sql}
+            FROM ({latest_per_key_sql("performance", "employee_id", "review_date")})
+        )
+        SELECT
+            emp._row_order,
+            {", ".join("emp." + quote(c) for c in emp_cols)},
+            a.* EXCLUDE (employee_id),
+            e.* EXCLUDE (employee_id),
+            p.* EXCLUDE (employee_id)
+        FROM emp
+        LEFT JOIN attendance_summary a USING (employee_id)
+        LEFT JOIN engagement_summary e USING (employee_id)
+        LEFT JOIN performance_latest p USING (employee_id)
+    """
+
+
+def fill_numeric_nulls(con, relation: str) -> str:
+    # mirrors master[numeric_cols].fillna(0), keeping the employee file order
+    projections = [
+        f"coalesce({quote(name)}, 0) AS {quote(name)}" if is_numeric(col_type) else quote(name)
+        for name, col_type in column_types(con, relation)
+        if name != "_row_order"
+    ]
+    return f"SELECT {', '.join(projections)} FROM {relation} ORDER BY _row_order"
+
+
+def build_master_duckdb(con, folders: dict, output_path: str, fmt: str = None) -> int:
+    """Write master_dataset to output_path; returns the rows written."""
+    fmt = fmt or STAGING_FORMAT
+
+    register_staging_views(con, folders)
+    con.execute(f"CREATE OR REPLACE VIEW master_joined AS {master_query(con)}")
+
+    if fmt == "parquet":
+        options = f"FORMAT PARQUET, COMPRESSION ZSTD, ROW_GROUP_SIZE {PARQUET_ROW_GROUP_SIZE}"
+    elif fmt == "csv":
+        options = "FORMAT CSV, HEADER"
+    else:
+        raise ValueError(f"Unsupported staging format: {fmt}")
+
+    return con.execute(f"COPY ({fill_numeric_nulls(con, 'master_joined')}) TO '{output_path}' ({options})").fetchone()[0]
+
+
+@instrumented("transform_master_duckdb")
+def run_master_transform_duckdb():
+    print("\nRunning Master Transform (duckdb)\n")
+
+    folders = latest_staging_folders()
+    output_folder = master_output_folder(folders["employee"])
+    ensure_dir(output_folder)
+    output_path = staging_path(output_folder, "master")
+
+    con = connect()
+    try:
+        with step("build"):
+            rows = build_master_duckdb(con, folders, output_path)
+    finally:
+        con.close()
+
+    count(rows_out=rows, bytes_written=os.path.getsize(output_path))
+
+    print(f"Master dataset saved to: {output_path}")
+    print("\nMaster Transformation Complete\n")
+
+
+if __name__ == "__main__":
+    run_master_transform_duckdb()
@@ -0,0 +1,268 @@
+import os
+import json
+import pandas as pd
+import pyarrow.parquet as pq
+
+from etl.catalog import latest_staging_folder, parse_batch_date, staging_root
+from etl.instrumentation import count, instrumented, set_status, step
+from etl.staging import batch_fingerprint, ensure_dir, read_staging, to_arrow, to_pandas, write_staging
+from etl.transform.transform_master import (
+    ATTENDANCE_COLUMNS,
+    build_master,
+    engagement_numeric_columns,
+    latest_performance,
+    master_output_folder,
+    summarise_attendance,
+)
+
+# Per-employee partial aggregates live outside data/staging so they are never
+# mistaken for a dated staging folder.
+STATE_DIR = "data/state/master"
+STATE_FILE = "state.json"
+
+# bumped when the meaning of the state tables changes; older state is rebuilt
+STATE_VERSION = 2
+
+DATASETS = ("employee", "attendance", "engagement", "performance")
+
+# dataset -> state table its snapshots are summarised into
+SNAPSHOT_TABLES = {
+    "employee": "employee",
+    "attendance": "attendance_agg",
+    "engagement": "engagement_agg",
+    "performance": "performance_latest",
+}
+
+# state table -> staging dataset whose declared column types it is written with
+STATE_TABLES = {
+    "employee": "employee",
+    "attendance_agg": "attendance",
+    "engagement_agg": "engagement",
+    "performance_latest": "performance",
+    "master": "master",
+}
+
+
+def state_path(name: str, state_dir: str = STATE_DIR) -> str:
+    return os.path.join(state_dir, f"{name}.parquet")
+
+
+def load_state(state_dir: str = STATE_DIR) -> dict:
+    meta_path = os.path.join(state_dir, STATE_FILE)
+    if not os.path.exists(meta_path):
+        return {"applied": {}, "tables": {}}
+
+    with open(meta_path) as fh:
+        meta = json.load(fh)
+
+    if meta.get("version") != STATE_VERSION:
+        print(f"Master state in {state_dir} was written by an older version, rebuilding it")
+        return {"applied": {}, "tables": {}}
+
+    tables = {
+        name: to_pandas(pq.read_table(state_path(name, state_dir)))
+        for name in STATE_TABLES
+        if os.path.exists(state_path(name, state_dir))
+    }
+    return {"applied": meta["applied"], "tables": tables}
+
+
+def save_state(state: dict, state_dir: str = STATE_DIR):
+    ensure_dir(state_dir)
+    for name, df in state["tables"].items():
+        pq.write_table(to_arrow(df, STATE_TABLES[name]), state_path(name, state_dir))
+
+    # written last: a crash before this point replays the same batches next run
+    with open(os.path.join(state_dir, STATE_FILE), "w") as fh:
+        json.dump({"version": STATE_VERSION, "applied": state["applied"]}, fh, indent=2)
+
+
+def pending_snapshot(dataset: str, applied: list) -> tuple:
+    """(last applied staging folder, latest staging folder if it is still to be applied).
+
+    Every staging folder is a full snapshot of its feed, so only the latest
+    one matters and it is diffed against the last applied one. The previous
+    folder is None when there is nothing to diff against: no state yet, or
+    the last applied folder was re-staged with other content or removed.
+    """
+    latest = latest_staging_folder(dataset)
+    if not applied:
+        return None, latest
+
+    name, fingerprint = applied[-1]
+    previous = os.path.join(staging_root(dataset), name)
+    if not os.path.isdir(previous) or batch_fingerprint(dataset, previous) != fingerprint:
+        return None, latest
+    if parse_batch_date(os.path.basename(latest)) <= parse_batch_date(name):
+        return previous, None
+    return previous, latest
+
+
+def read_snapshot(dataset: str, folder: str) -> pd.DataFrame:
+    columns = ATTENDANCE_COLUMNS if dataset == "attendance" else None
+    return read_staging(dataset, folder, columns=columns)
+
+
+def changed_ids(previous: pd.DataFrame, current: pd.DataFrame) -> pd.Index:
+    """employee_ids with rows added, removed or changed between two snapshots of a feed."""
+    counts = [
+        pd.DataFrame({
+            "employee_id": df["employee_id"].to_numpy(),
+            "row": pd.util.hash_pandas_object(df[sorted(df.columns)], index=False).to_numpy(),
+        }).value_counts()
+        for df in (previous, current)
+    ]
+    # multisets of rows per employee, so a duplicated or dropped copy counts too
+    difference = counts[0].sub(counts[1], fill_value=0)
+    return difference[difference != 0].index.get_level_values("employee_id").unique()
+
+
+def engagement_partials(df_eng: pd.DataFrame) -> pd.DataFrame:
+    # sum and non-null count per column, so means can be recombined exactly
+    cols = engagement_numeric_columns(df_eng)
+    grouped = df_eng.groupby("employee_id")[cols]
+    return pd.concat(
+        [grouped.sum().add_suffix("__sum"), grouped.count().add_suffix("__count")],
+        axis=1,
+    ).reset_index()
+
+
+def summarise_snapshot(dataset: str, df: pd.DataFrame) -> pd.DataFrame:
+    """The state table rows of dataset for the employees in df."""
+    if dataset == "employee":
+        return df.reset_index(drop=True)
+    if dataset == "attendance":
+        return summarise_attendance(df)
+    if dataset == "engagement":
+        return engagement_partials(df)
+    return latest_performance(df).rename(columns=lambda c: c[len("perf_"):] if c.startswith("perf_") else c)
+
+
+def apply_snapshot(tables: dict, dataset: str, folder: str, previous: str = None) -> tuple:
+    """Bring dataset's state table to the snapshot in folder; returns (snapshot, employee_ids touched).
+
+    Against a previous snapshot only the employees whose rows differ are
+    summarised again, replacing their state rows; without one the whole
+    table is rebuilt from folder.
+    """
+    table = SNAPSHOT_TABLES[dataset]
+    snapshot = read_snapshot(dataset, folder)
+    if previous is None or table not in tables:
+        tables[table] = summarise_snapshot(dataset, snapshot)
+        return snapshot, snapshot["employee_id"].dropna().unique()
+
+    ids = changed_ids(read_snapshot(dataset, previous), snapshot)
+    if dataset == "employee":
+        # small, and its row order is the master's
+        tables[table] = summarise_snapshot(dataset, snapshot)
+    else:
+        kept = tables[table][~tables[table]["employee_id"].isin(ids)]
+        replaced = summarise_snapshot(dataset, snapshot[snapshot["employee_id"].isin(ids)])
+        tables[table] = pd.concat([kept, replaced], ignore_index=True)
+    return snapshot, ids
+
+
+def engagement_means(state_agg: pd.DataFrame) -> pd.DataFrame:
+    sum_cols = [c for c in state_agg.columns if c.endswith("__sum")]
+    means = pd.DataFrame({"employee_id": state_agg["employee_id"]})
+    for sum_col in sum_cols:
+        col = sum_col[:-len("__sum")]
+        count = state_agg[f"{col}__count"].where(state_agg[f"{col}__count"] > 0)
+        means[f"eng_{col}"] = state_agg[sum_col] / count
+    return means
+
+
+def _subset(df: pd.DataFrame, ids) -> pd.DataFrame:
+    if df is None:
+        return pd.DataFrame({"employee_id": pd.Series(dtype="object")})
+    return df[df["employee_id"].isin(ids)]
+
+
+def rebuild_master_rows(tables: dict, ids) -> pd.DataFrame:
+    performance = _subset(tables.get("performance_latest"), ids)
+    return build_master(
+        _subset(tables.get("employee"), ids),
+        _subset(tables.get("attendance_agg"), ids),
+        engagement_means(_subset(tables.get("engagement_agg"), ids)),
+        performance.rename(columns=lambda c: f"perf_{c}" if c != "employee_id" else c),
+    )
+
+
+@instrumented("transform_master_incremental")
+def run_master_incremental(state_dir: str = STATE_DIR):
+    """Fold the latest staging snapshot of every feed into master_dataset.
+
+    Each extract stages the full source file, so a new staging folder is
+    diffed against the last applied one: only the employees whose rows
+    differ have their aggregates in state_dir recomputed from the new
+    snapshot and their master rows rebuilt. Applied folders are recorded
+    with a content fingerprint; if the last one was re-staged with other
+    content or removed, its feed is rebuilt from the latest folder. The first
+    run (no state) bootstraps from the latest folder of each feed.
+    """
+    print("\nRunning incremental Master Transform\n")
+
+    state = load_state(state_dir)
+    tables = state["tables"]
+
+    affected = set()
+    applied_any = rebuild_all = False
+    for dataset in DATASETS:
+        applied = state["applied"].get(dataset, [])
+        previous, folder = pending_snapshot(dataset, applied)
+        if folder is None:
+            continue
+        if previous is None and applied:
+            print(f"The applied {dataset} batch changed since it was applied, rebuilding from {folder}")
+            rebuild_all = True
+
+        with step(f"apply_{dataset}"):
+            snapshot, touched = apply_snapshot(tables, dataset, folder, previous)
+        count(rows_in=len(snapshot))
+
+        affected.update(touched)
+        applied_any = True
+        name = os.path.basename(folder)
+        applied = [entry for entry in applied if entry[0] != name]
+        applied.append([name, batch_fingerprint(dataset, folder)])
+        state["applied"][dataset] = applied
+        print(f"Applied {dataset} batch {folder}: {len(snapshot)} rows, {len(touched)} employees changed")
+
+    if rebuild_all:
+        affected.update(tables["employee"]["employee_id"])
+
+    if not applied_any and "master" in tables:
+        print("No new staging batches, master dataset is up to date.")
+        set_status("skipped")
+        return
+
+    print(f"Recomputing master rows for {len(affected)} employees")
+
+    master = tables.get("master")
+    if affected or master is None:
+        with step("rebuild"):
+            rows = rebuild_master_rows(tables, affected)
+        if master is not None:
+            master = pd.concat([master[~master["employee_id"].isin(affected)], rows], ignore_index=True)
+        else:
+            master = rows
+
+    # keep the employee dimension's order, as the full rebuild does
+    order = tables["employee"]["employee_id"]
+    master = master.set_index("employee_id").loc[order[order.isin(master["employee_id"])]].reset_index()
+
+    numeric_cols = master.select_dtypes(include="number").columns
+    master[numeric_cols] = master[numeric_cols].fillna(0)
+
+    tables["master"] = master
+    with step("write"):
+        output_path = write_staging(master, "master", master_output_folder(latest_staging_folder("employee")))
+        save_state(state, state_dir)
+    count(rows_out=len(master), bytes_written=os.path.getsize(output_path))
+
+    print(f"Master dataset saved to: {output_path}")
+    print("\nIncremental Master Transformation Complete\n")
+
+
+if __name__ == "__main__":
+    run_master_incremental()
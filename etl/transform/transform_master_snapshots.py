@@ -0,0 +1,215 @@
+"""Point-in-time master rows for many cut-off dates in one pass.
+
+Each snapshot row is the master row of one employee built only from what was
+known at the end of snapshot_date: attendance days and surveys up to that
+day and the latest review dated on or before it. Instead of rerunning the
+master transform per date, every source is sorted once, turned into running
+per-employee totals, and matched to all (employee, snapshot_date) pairs with
+one merge_asof per source.
+
+Employee attributes come from the current employee record, which has no
+history; employees hired after a snapshot date are left out of it. The
+record's status and attrition label only hold from the record's own date on,
+so snapshots before it get them as nulls rather than leaking the outcome the
+models are trained to predict. Reviews without a review date cannot be placed
+in time and never enter a snapshot.
+
+Snapshots are staged one folder per snapshot date:
+
+    python -m etl.transform.transform_master_snapshots --start 2021-01-31 --end 2022-12-31
+    python -m etl.transform.transform_master_snapshots --dates 2022-06-30 2022-12-31
+"""
+import os
+import argparse
+import numpy as np
+import pandas as pd
+
+from etl.catalog import latest_staging_folders, parse_batch_date, staging_root
+from etl.instrumentation import count, instrumented, step
+from etl.staging import read_staging, write_staging
+from etl.transform.datetimes import calendar_date
+from etl.transform.transform_attendance import STATUS_CODES
+from etl.transform.transform_master import ATTENDANCE_COLUMNS, engagement_numeric_columns
+
+ATTENDANCE_TOTALS = {
+    "presence_score": "presence_flag",
+    "total_hours": "hours_worked",
+    "late_count": "is_late",
+    "overtime_count": "is_overtime",
+}
+
+# employee columns describing the employee's current state, the attrition
+# label among them; unknown in snapshots dated before the employee record
+CURRENT_STATUS_COLUMNS = ["employmentstatus", "attrition"]
+
+# default cut-offs: the last day of every month in the requested range
+SNAPSHOT_FREQUENCY = pd.offsets.MonthEnd()
+
+
+def monthly_snapshot_dates(start, end) -> pd.DatetimeIndex:
+    return pd.date_range(pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize(), freq=SNAPSHOT_FREQUENCY)
+
+
+def snapshot_day(timestamps: pd.Series) -> pd.Series:
+    # merge_asof needs both sides in the same datetime unit
+    return calendar_date(timestamps).astype("datetime64[ns]")
+
+
+def snapshot_pairs(df_emp: pd.DataFrame, snapshot_dates) -> pd.DataFrame:
+    """Every (employee_id, snapshot_date) of employees hired by the date, ordered by date."""
+    dates = pd.DatetimeIndex(snapshot_dates).normalize().unique().sort_values().astype("datetime64[ns]")
+    ids = df_emp["employee_id"].to_numpy()
+    pairs = pd.DataFrame({
+        "employee_id": np.repeat(ids, len(dates)),
+        "snapshot_date": np.tile(dates.to_numpy(), len(ids)),
+    })
+
+    if "hiredate" in df_emp.columns:
+        hired = pd.Series(np.repeat(df_emp["hiredate"].to_numpy(), len(dates)))
+        pairs = pairs[(hired.isna() | (hired <= pairs["snapshot_date"])).to_numpy()]
+
+    return pairs.sort_values(["snapshot_date", "employee_id"], kind="stable").reset_index(drop=True)
+
+
+def running_totals(df: pd.DataFrame, date_col: str, columns: dict) -> pd.DataFrame:
+    """Per-employee cumulative sums of columns (output -> input), one row per employee and day."""
+    df = df[df["employee_id"].notna() & df[date_col].notna()]
+    day = snapshot_day(df[date_col])
+
+    values = pd.DataFrame({out: df[col].astype("float64").fillna(0).to_numpy() for out, col in columns.items()})
+    values.insert(0, "employee_id", df["employee_id"].to_numpy())
+    values.insert(1, "as_of", day.to_numpy())
+    values = values.sort_values(["employee_id", "as_of"], kind="stable")
+
+    totals = values.groupby("employee_id", sort=False)[list(columns)].cumsum()
+    totals.insert(0, "employee_id", values["employee_id"])
+    totals.insert(1, "as_of", values["as_of"])
+
+    # the running total at the end of each day is what a snapshot of that day sees
+    totals = totals[~totals.duplicated(["employee_id", "as_of"], keep="last")]
+    return totals.sort_values("as_of", kind="stable").reset_index(drop=True)
+
+
+def as_of(pairs: pd.DataFrame, right: pd.DataFrame, right_on: str) -> pd.DataFrame:
+    """The last row of right per employee on or before each snapshot date."""
+    matched = pd.merge_asof(
+        pairs, right, left_on="snapshot_date", right_on=right_on, by="employee_id", direction="backward"
+    )
+    return matched.drop(columns=right_on)
+
+
+def attendance_snapshots(pairs: pd.DataFrame, df_att: pd.DataFrame) -> pd.DataFrame:
+    df_att = df_att.assign(presence_flag=(df_att["status"] == STATUS_CODES["present"]).astype(int))
+    return as_of(pairs, running_totals(df_att, "date", ATTENDANCE_TOTALS), "as_of")
+
+
+def engagement_snapshots(pairs: pd.DataFrame, df_eng: pd.DataFrame) -> pd.DataFrame:
+    columns = list(engagement_numeric_columns(df_eng))
+
+    # running means as running sums over running counts of answered questions
+    sums = {f"sum_{c}": c for c in columns}
+    answered = {f"n_{c}": f"answered_{c}" for c in columns}
+    df_eng = df_eng.assign(**{f"answered_{c}": df_eng[c].notna() for c in columns})
+
+    matched = as_of(pairs, running_totals(df_eng, "survey_date", {**sums, **answered}), "as_of")
+    for c in columns:
+        matched[f"eng_{c}"] = matched[f"sum_{c}"] / matched[f"n_{c}"].where(matched[f"n_{c}"] > 0)
+
+    return matched.drop(columns=list(sums) + list(answered))
+
+
+def performance_snapshots(pairs: pd.DataFrame, df_perf: pd.DataFrame) -> pd.DataFrame:
+    reviews = df_perf[df_perf["employee_id"].notna() & df_perf["review_date"].notna()]
+    reviewed = snapshot_day(reviews["review_date"])
+
+    # stable, so of two reviews on the same day the later row wins, as in latest_performance
+    reviews = (
+        reviews
+        .assign(_reviewed=reviewed.to_numpy())
+        .sort_values("_reviewed", kind="stable")
+        .rename(columns=lambda c: f"perf_{c}" if c not in ("employee_id", "_reviewed") else c)
+    )
+    return as_of(pairs, reviews, "_reviewed")
+
+
+def build_master_snapshots(df_emp: pd.DataFrame, df_att: pd.DataFrame, df_eng: pd.DataFrame,
+                           df_perf: pd.DataFrame, snapshot_dates, record_date=None) -> pd.DataFrame:
+    """Master rows per (employee_id, snapshot_date), with the master dataset's columns.
+
+    CURRENT_STATUS_COLUMNS are null in snapshots before record_date, the date
+    of the employee record; without one they are null in every snapshot.
+    """
+    pairs = snapshot_pairs(df_emp, snapshot_dates)
+
+    snapshots = pairs.merge(df_emp, on="employee_id", how="left")
+    for source in (
+        attendance_snapshots(pairs, df_att),
+        engagement_snapshots(pairs, df_eng),
+        performance_snapshots(pairs, df_perf),
+    ):
+        # every frame holds the pairs in the same order
+        snapshots = pd.concat([snapshots, source.drop(columns=["employee_id", "snapshot_date"])], axis=1)
+
+    numeric_cols = snapshots.select_dtypes(include="number").columns
+    snapshots[numeric_cols] = snapshots[numeric_cols].fillna(0)
+
+    known_from = pd.Timestamp.max if record_date is None else pd.Timestamp(record_date)
+    historical = snapshots["snapshot_date"] < known_from
+    for col in CURRENT_STATUS_COLUMNS:
+        if col in snapshots.columns:
+            snapshots[col] = snapshots[col].mask(historical)
+
+    return snapshots
+
+
+def snapshot_folder(snapshot_date) -> str:
+    return os.path.join(staging_root("master_snapshots"), str(pd.Timestamp(snapshot_date).date()))
+
+
+@instrumented("transform_master_snapshots")
+def run_master_snapshots(snapshot_dates=None, start: str = None, end: str = None) -> list:
+    """Stage master snapshots for snapshot_dates, or for the month ends from start to end.
+
+    start and end default to the first and last attendance day.
+    """
+    print("\nRunning master snapshots\n")
+
+    folders = latest_staging_folders()
+
+    with step("read"):
+        df_emp = read_staging("employee", folders["employee"])
+        df_att = read_staging("attendance", folders["attendance"], columns=ATTENDANCE_COLUMNS + ["date"])
+        df_eng = read_staging("engagement", folders["engagement"])
+        df_perf = read_staging("performance", folders["performance"])
+    count(rows_in=len(df_emp) + len(df_att) + len(df_eng) + len(df_perf))
+
+    if snapshot_dates is None:
+        snapshot_dates = monthly_snapshot_dates(start or df_att["date"].min(), end or df_att["date"].max())
+    if len(snapshot_dates) == 0:
+        raise ValueError("No snapshot dates to build")
+
+    with step("aggregate"):
+        snapshots = build_master_snapshots(
+            df_emp, df_att, df_eng, df_perf, snapshot_dates,
+            record_date=parse_batch_date(os.path.basename(folders["employee"])),
+        )
+
+    output_paths = []
+    with step("write"):
+        for snapshot_date, rows in snapshots.groupby("snapshot_date", sort=True):
+            output_paths.append(write_staging(rows, "master_snapshots", snapshot_folder(snapshot_date)))
+    count(rows_out=len(snapshots), bytes_written=sum(os.path.getsize(p) for p in output_paths))
+
+    print(f"Master snapshots for {len(output_paths)} dates saved under: {staging_root('master_snapshots')}")
+    print("\nMaster snapshots complete\n")
+    return output_paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build point-in-time master rows for many snapshot dates.")
+    parser.add_argument("--dates", nargs="+", default=None, help="snapshot dates, YYYY-MM-DD")
+    parser.add_argument("--start", default=None, help="first month end to snapshot (default: first attendance day)")
+    parser.add_argument("--end", default=None, help="last month end to snapshot (default: last attendance day)")
+    args = parser.parse_args()
+
+    run_master_snapshots(snapshot_dates=args.dates, start=args.start, end=args.end)
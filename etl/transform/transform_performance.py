@@ -1,34 +1,13 @@
 import os
 import pandas as pd
-from datetime import datetime, timezone
 
-
-def get_latest_batch_folder(base_path: str) -> str:
-    folders = [
-        f for f in os.listdir(base_path)
-        if os.path.isdir(os.path.join(base_path, f))
-    ]
-
-    if not folders:
-        raise FileNotFoundError(f"No dated folder found in: {base_path}")
-
-    folders.sort(reverse=True)
-    return os.path.join(base_path, folders[0])
-
-
-def get_latest_csv(path: str) -> str:
-    files = [f for f in os.listdir(path) if f.endswith(".csv")]
-
-    if not files:
-        raise FileNotFoundError(f"No CSV files inside: {path}")
-
-    files.sort(reverse=True)
-    return os.path.join(path, files[0])
-
-
-def ensure_dir(path: str):
-    if not os.path.exists(path):
-        os.makedirs(path)
+from etl.catalog import latest_batch_file, latest_batch_folder
+from etl.extract.extract import content_hash
+from etl.instrumentation import count, instrumented, set_status, step
+from etl.staging import apply_dtypes, is_staged_from, record_staged_source, write_staging
+from etl.transform.date_dimension import attach_date_attributes
+from etl.transform.datetimes import forget_inferred_formats, parse_datetimes
+from etl.transform.encoders import RATING_SCALE, encode_ordinal
 
 
 def clean_performance(df: pd.DataFrame) -> pd.DataFrame:
@@ -41,9 +20,6 @@ def clean_performance(df: pd.DataFrame) -> pd.DataFrame:
         .str.replace("-", "_")
     )
 
-    if "employee_id" in df.columns:
-        df["employee_id"] = df["employee_id"].astype(str)
-
     date_col = None
     for c in ["review_date", "date", "timestamp"]:
         if c in df.columns:
@@ -53,51 +29,54 @@ def clean_performance(df: pd.DataFrame) -> pd.DataFrame:
     if date_col is None:
         raise KeyError("No review date column found in performance dataset.")
 
-    df[date_col] = pd.to_datetime(df[date_col])
+    df[date_col] = parse_datetimes(df[date_col], "performance")
     df = df.rename(columns={date_col: "review_date"})
 
-    df["year"] = df["review_date"].dt.year
-    df["quarter"] = df["review_date"].dt.quarter
+    df = attach_date_attributes(df, "review_date", ["year", "quarter"])
 
-    rating_map = {
-        "needs improvement": 1,
-        "meets expectations": 2,
-        "exceeds expectations": 3,
-        "outstanding": 4
-    }
-
-    if "rating" in df.columns and df["rating"].dtype == "object":
-        df["rating"] = (
-            df["rating"]
-            .str.lower()
-            .map(rating_map)
-            .fillna(df["rating"])
-        )
+    if "rating" in df.columns:
+        df["rating"] = encode_ordinal(df["rating"], RATING_SCALE, keep_unmapped=True)
 
     if "score" in df.columns:
         df["score"] = pd.to_numeric(df["score"], errors="coerce")
 
-    return df
+    return apply_dtypes(df, "performance")
 
+@instrumented("transform_performance")
 def run_performance_transform():
     print("Running performance transform...\n")
 
     raw_path = "data/raw/performance"
-    latest_folder = get_latest_batch_folder(raw_path)
-    latest_file = get_latest_csv(latest_folder)
+    latest_folder = latest_batch_folder(raw_path)
+    latest_file = latest_batch_file(latest_folder)
 
     print(f"Latest batch folder: {latest_folder}")
     print(f"Latest CSV: {latest_file}")
 
-    df = pd.read_csv(latest_file)
-    cleaned = clean_performance(df)
-
     extract_date = os.path.basename(latest_folder)
     staging_output = f"data/staging/performance/{extract_date}"
-    ensure_dir(staging_output)
+    with step("hash"):
+        source_hash = content_hash(latest_file)
+
+    if is_staged_from(staging_output, "performance", source_hash):
+        print(f"Source batch unchanged since last transform, skipping: {latest_file}")
+        set_status("skipped")
+        return
+
+    # formats are inferred once per raw batch
+    forget_inferred_formats("performance")
+
+    with step("read"):
+        df = pd.read_csv(latest_file)
+    count(rows_in=len(df), bytes_read=os.path.getsize(latest_file))
+
+    with step("clean"):
+        cleaned = clean_performance(df)
 
-    output_file = os.path.join(staging_output, "performance_cleaned.csv")
-    cleaned.to_csv(output_file, index=False)
+    with step("write"):
+        output_file = write_staging(cleaned, "performance", staging_output)
+    count(rows_out=len(cleaned), bytes_written=os.path.getsize(output_file))
+    record_staged_source(staging_output, "performance", latest_file, source_hash)
 
     print(f"Performance dataset cleaned and saved to: {output_file}")
     print("Performance transform is done.")
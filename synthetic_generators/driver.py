@@ -0,0 +1,140 @@
+"""Sharded, parallel driver for the synthetic generators.
+
+The employee ID space 1..n is cut into fixed-size shards. Every shard gets its
+own RNG spawned from a SeedSequence and is written to its own part file, so the
+output only depends on (seed, n, shard size) and never on the worker count.
+
+    python -m synthetic_generators.driver --employees 100000 --workers 8 --seed 42
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from synthetic_generators.generate_attendance import write_attendance
+from synthetic_generators.generate_engagement import (
+    MAX_SURVEYS_PER_EMPLOYEE,
+    SURVEY_ID_START,
+    generate_engagement_surveys,
+)
+from synthetic_generators.generate_ibm_hr import generate_ibm_hr_dataset
+from synthetic_generators.generate_performance import generate_performance
+
+DATASETS = ["ibm_hr", "attendance", "engagement", "performance"]
+DEFAULT_SHARD_SIZE = 10000
+DEFAULT_OUTPUT_DIR = "data/synthetic"
+
+
+def ensure_dir(path: str):
+    os.makedirs(path, exist_ok=True)
+
+
+def plan_shards(n_employees: int, shard_size: int = DEFAULT_SHARD_SIZE):
+    """Return (shard_index, first_id, last_id_exclusive) tuples covering 1..n_employees."""
+    return [
+        (i, start, min(start + shard_size, n_employees + 1))
+        for i, start in enumerate(range(1, n_employees + 1, shard_size))
+    ]
+
+
+def shard_seeds(seed, dataset: str, n_shards: int):
+    # one independent stream per (dataset, shard), so attendance and performance
+    # shards never share a stream
+    dataset_seed = np.random.SeedSequence(seed).spawn(len(DATASETS))[DATASETS.index(dataset)]
+    return dataset_seed.spawn(n_shards)
+
+
+def _run_shard(dataset: str, shard_index: int, first_id: int, stop_id: int, seed_seq,
+               output_path: str, n_employees: int, start_date: str, end_date: str):
+    rng = np.random.default_rng(seed_seq)
+    employee_ids = np.arange(first_id, stop_id)
+    started = time.perf_counter()
+
+    if dataset == "attendance":
+        rows = write_attendance(employee_ids, output_path, start_date, end_date, rng=rng)
+    else:
+        if dataset == "ibm_hr":
+            df = generate_ibm_hr_dataset(n=n_employees, employee_ids=employee_ids, rng=rng)
+        elif dataset == "engagement":
+            survey_id_start = SURVEY_ID_START + (first_id - 1) * MAX_SURVEYS_PER_EMPLOYEE
+            df = generate_engagement_surveys(employee_ids, rng=rng, survey_id_start=survey_id_start)
+        elif dataset == "performance":
+            df = generate_performance(employee_ids, rng=rng)
+        else:
+            raise ValueError(f"Unknown dataset: {dataset}")
+
+        df.to_csv(output_path, index=False)
+        rows = len(df)
+
+    return {
+        "dataset": dataset,
+        "shard": shard_index,
+        "path": output_path,
+        "rows": rows,
+        "bytes": os.path.getsize(output_path),
+        "seconds": time.perf_counter() - started,
+    }
+
+
+def generate_all(n_employees: int, output_dir: str = DEFAULT_OUTPUT_DIR, datasets=None, seed=None,
+                 workers=None, shard_size: int = DEFAULT_SHARD_SIZE,
+                 start_date="2022-01-01", end_date="2022-12-31"):
+    datasets = datasets or DATASETS
+    shards = plan_shards(n_employees, shard_size)
+
+    tasks = []
+    for dataset in datasets:
+        dataset_dir = os.path.join(output_dir, dataset)
+        ensure_dir(dataset_dir)
+
+        for (shard_index, first_id, stop_id), seed_seq in zip(shards, shard_seeds(seed, dataset, len(shards))):
+            output_path = os.path.join(dataset_dir, f"part-{shard_index:05d}.csv")
+            tasks.append((dataset, shard_index, first_id, stop_id, seed_seq,
+                          output_path, n_employees, start_date, end_date))
+
+    print(f"Generating {len(datasets)} datasets for {n_employees} employees "
+          f"in {len(shards)} shards (workers={workers or os.cpu_count()})...")
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_run_shard, *task) for task in tasks]
+        results = [f.result() for f in futures]
+
+    for dataset in datasets:
+        parts = [r for r in results if r["dataset"] == dataset]
+        rows = sum(r["rows"] for r in parts)
+        size_mb = sum(r["bytes"] for r in parts) / 1e6
+        print(f"{dataset}: {rows} rows, {size_mb:.1f} MB in {len(parts)} part files")
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate sharded synthetic people-analytics data.")
+    parser.add_argument("--employees", type=int, default=1470)
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR)
+    parser.add_argument("--datasets", nargs="+", choices=DATASETS, default=DATASETS)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--shard-size", type=int, default=DEFAULT_SHARD_SIZE)
+    parser.add_argument("--start-date", default="2022-01-01")
+    parser.add_argument("--end-date", default="2022-12-31")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    generate_all(
+        args.employees,
+        output_dir=args.output_dir,
+        datasets=args.datasets,
+        seed=args.seed,
+        workers=args.workers,
+        shard_size=args.shard_size,
+        start_date=args.start_date,
+        end_date=args.end_date,
+    )
+    print(f"Done in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
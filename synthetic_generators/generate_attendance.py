@@ -1,56 +1,97 @@
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
 import os
 
-def generate_attendance(employee_ids, start_date="2022-01-01", end_date="2022-12-31"):
-    start = pd.to_datetime(start_date)
-    end = pd.to_datetime(end_date)
+STATUSES = np.array(["Present", "Absent", "Remote", "Sick Leave"])
+STATUS_PROBS = [0.94, 0.03, 0.02, 0.01]
 
-    dates = pd.date_range(start, end, freq="B")  # Business days
+# (low, high) hours drawn uniformly per status; statuses not listed work 0 hours
+HOURS_RANGE = {
+    "Present": (7, 10),
+    "Remote": (6, 9),
+}
+WORKING_STATUSES = ["Present", "Remote"]
+LATE_PROB = 0.1
+OVERTIME_THRESHOLD = 8.5
 
-    logs = []
+# employees generated per chunk; one chunk holds CHUNK_EMPLOYEES x business days rows
+CHUNK_EMPLOYEES = 5000
 
-    for emp in employee_ids:
-        for d in dates:
-            status = np.random.choice(
-                ["Present", "Absent", "Remote", "Sick Leave"],
-                p=[0.94, 0.03, 0.02, 0.01]
-            )
+COLUMNS = [
+    "employee_id",
+    "date",
+    "status",
+    "hours_worked",
+    "is_late",
+    "is_overtime"
+]
 
-            if status == "Present":
-                hours = np.random.uniform(7, 10)
-            elif status == "Remote":
-                hours = np.random.uniform(6, 9)
-            else:
-                hours = 0.0
+_HOURS_LOW = np.array([HOURS_RANGE.get(s, (0, 0))[0] for s in STATUSES], dtype=float)
+_HOURS_HIGH = np.array([HOURS_RANGE.get(s, (0, 0))[1] for s in STATUSES], dtype=float)
+_IS_WORKING = np.isin(STATUSES, WORKING_STATUSES)
 
-            if status in ["Present", "Remote"]:
-                is_late = np.random.choice([0, 1], p=[0.9, 0.1])
-            else:
-                is_late = 0
 
-            is_overtime = 1 if hours > 8.5 else 0
+def business_days(start_date="2022-01-01", end_date="2022-12-31") -> pd.DatetimeIndex:
+    return pd.date_range(pd.to_datetime(start_date), pd.to_datetime(end_date), freq="B")
 
-            logs.append([
-                int(emp),
-                d.date(),
-                status,
-                round(hours, 2),
-                is_late,
-                is_overtime
-            ])
 
-    df = pd.DataFrame(logs, columns=[
-        "employee_id",
-        "date",
-        "status",
-        "hours_worked",
-        "is_late",
-        "is_overtime"
-    ])
+def _generate_grid(employee_ids: np.ndarray, dates: pd.DatetimeIndex, rng: np.random.Generator) -> pd.DataFrame:
+    n_rows = len(employee_ids) * len(dates)
 
-    return df
+    status_idx = rng.choice(len(STATUSES), size=n_rows, p=STATUS_PROBS)
+
+    # uniform(low, high) per row; low == high == 0 for non-working statuses
+    low = _HOURS_LOW[status_idx]
+    hours = low + rng.random(n_rows) * (_HOURS_HIGH[status_idx] - low)
+
+    working = _IS_WORKING[status_idx]
+    is_late = ((rng.random(n_rows) < LATE_PROB) & working).astype(np.int8)
+    is_overtime = (hours > OVERTIME_THRESHOLD).astype(np.int8)
+
+    return pd.DataFrame({
+        "employee_id": np.repeat(employee_ids.astype(np.int64), len(dates)),
+        "date": np.tile(dates.values, len(employee_ids)),
+        "status": pd.Categorical.from_codes(status_idx, categories=STATUSES),
+        "hours_worked": hours.round(2),
+        "is_late": is_late,
+        "is_overtime": is_overtime,
+    }, columns=COLUMNS)
+
+
+def iter_attendance_chunks(employee_ids, start_date="2022-01-01", end_date="2022-12-31",
+                           seed=None, rng=None, chunk_employees=CHUNK_EMPLOYEES):
+    """Yield attendance DataFrames covering chunk_employees employees at a time."""
+    if rng is None:
+        rng = np.random.default_rng(seed)
+
+    employee_ids = np.asarray(employee_ids)
+    dates = business_days(start_date, end_date)
+
+    for start in range(0, len(employee_ids), chunk_employees):
+        yield _generate_grid(employee_ids[start:start + chunk_employees], dates, rng)
+
+
+def generate_attendance(employee_ids, start_date="2022-01-01", end_date="2022-12-31", seed=None, rng=None):
+    chunks = list(iter_attendance_chunks(employee_ids, start_date, end_date, seed=seed, rng=rng))
+    if not chunks:
+        return pd.DataFrame(columns=COLUMNS)
+
+    return pd.concat(chunks, ignore_index=True)
+
+
+def write_attendance(employee_ids, output_path: str, start_date="2022-01-01", end_date="2022-12-31",
+                     seed=None, rng=None, chunk_employees=CHUNK_EMPLOYEES) -> int:
+    rows = 0
+    header = True
+
+    with open(output_path, "w", newline="") as fh:
+        for chunk in iter_attendance_chunks(employee_ids, start_date, end_date,
+                                            seed=seed, rng=rng, chunk_employees=chunk_employees):
+            chunk.to_csv(fh, index=False, header=header, date_format="%Y-%m-%d")
+            header = False
+            rows += len(chunk)
+
+    return rows
 
 
 if __name__ == "__main__":
@@ -59,12 +100,10 @@ if __name__ == "__main__":
 
     employee_ids = df_emp["EmployeeNumber"].unique()
 
-    attendance_df = generate_attendance(employee_ids)
-
     output_folder = "data/raw/attendance/"
     os.makedirs(output_folder, exist_ok=True)
 
     output_path = os.path.join(output_folder, "attendance_logs.csv")
-    attendance_df.to_csv(output_path, index=False)
+    rows = write_attendance(employee_ids, output_path)
 
-    print(f"Attendance dataset created: {output_path}")
+    print(f"Attendance dataset created: {output_path} ({rows} rows)")
@@ -1,46 +1,61 @@
 import pandas as pd
 import numpy as np
 from faker import Faker
-from datetime import datetime, timedelta
+from datetime import datetime
 
 fake = Faker()
 
-N_EMPLOYEES = 1470  
+N_EMPLOYEES = 1470
 SURVEYS_PER_EMPLOYEE = 3
 START_DATE = datetime(2021, 1, 1)
 END_DATE = datetime(2023, 12, 31)
 
-def likert():
-    return np.random.randint(1, 6)
+SURVEY_ID_START = 10000
+# upper bound on surveys per employee, so sharded runs can reserve disjoint survey_id blocks
+MAX_SURVEYS_PER_EMPLOYEE = 20
 
-def generate_engagement_surveys():
-    rows = []
-    survey_id = 10000
+# comments are sampled from a pool of Faker sentences; Faker is far too slow per row
+COMMENT_POOL_SIZE = 2048
 
-    for emp_id in range(1, N_EMPLOYEES + 1):
+LIKERT_QUESTIONS = [
+    "q_work_life_balance",
+    "q_manager_support",
+    "q_growth_opportunity",
+    "q_recognition",
+]
 
-        n_surveys = np.random.poisson(SURVEYS_PER_EMPLOYEE)
-        if n_surveys < 1:
-            n_surveys = 1
 
-        for _ in range(n_surveys):
-            survey_id += 1
-            survey_date = fake.date_between_dates(START_DATE, END_DATE)
+def comment_pool(rng: np.random.Generator, size: int) -> np.ndarray:
+    fake.seed_instance(int(rng.integers(0, 2**31)))
+    return np.array([fake.sentence(nb_words=12) for _ in range(size)], dtype=object)
 
-            row = {
-                "survey_id": survey_id,
-                "employee_id": emp_id,
-                "survey_date": survey_date,
-                "q_work_life_balance": likert(),
-                "q_manager_support": likert(),
-                "q_growth_opportunity": likert(),
-                "q_recognition": likert(),
-                "comment_text": fake.sentence(nb_words=12)
-            }
 
-            rows.append(row)
+def generate_engagement_surveys(employee_ids=None, seed=None, rng=None, survey_id_start=SURVEY_ID_START):
+    if rng is None:
+        rng = np.random.default_rng(seed)
+
+    if employee_ids is None:
+        employee_ids = np.arange(1, N_EMPLOYEES + 1)
+    employee_ids = np.asarray(employee_ids, dtype=np.int64)
+
+    n_surveys = np.clip(rng.poisson(SURVEYS_PER_EMPLOYEE, size=len(employee_ids)), 1, MAX_SURVEYS_PER_EMPLOYEE)
+    n_rows = int(n_surveys.sum())
+
+    day_offsets = rng.integers(0, (END_DATE - START_DATE).days + 1, size=n_rows)
+    survey_dates = pd.Timestamp(START_DATE) + pd.to_timedelta(day_offsets, unit="D")
+
+    df = pd.DataFrame({
+        "survey_id": np.arange(survey_id_start + 1, survey_id_start + n_rows + 1),
+        "employee_id": np.repeat(employee_ids, n_surveys),
+        "survey_date": survey_dates.strftime("%Y-%m-%d"),
+    })
+
+    for question in LIKERT_QUESTIONS:
+        df[question] = rng.integers(1, 6, size=n_rows)
+
+    pool = comment_pool(rng, min(COMMENT_POOL_SIZE, max(n_rows, 1)))
+    df["comment_text"] = pool[rng.integers(0, len(pool), size=n_rows)]
 
-    df = pd.DataFrame(rows)
     return df
 
 if __name__ == "__main__":
@@ -1,74 +1,88 @@
 import os
-import random
+import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime
 
 def ensure_dir(path: str):
     if not os.path.exists(path):
         os.makedirs(path)
 
-def random_date(start, end):
-    """Return a random datetime between start and end (inclusive)."""
-    delta = end - start
-    return start + timedelta(days=random.randint(0, delta.days))
-
-def generate_ibm_hr_dataset(n=1470):
-    departments = [
-        "Sales", "Human Resources", "R&D", "Engineering", "Finance",
-        "Marketing", "Customer Success", "IT", "Operations"
-    ]
-
-    job_roles = {
-        "Sales": ["Sales Representative", "Account Manager", "Sales Executive"],
-        "Human Resources": ["HR Specialist", "Recruiter", "HR Manager"],
-        "R&D": ["Research Scientist", "Lab Technician", "Principal Researcher"],
-        "Engineering": ["Software Engineer", "DevOps Engineer", "Data Engineer"],
-        "Finance": ["Financial Analyst", "Accountant", "Finance Manager"],
-        "Marketing": ["Marketing Analyst", "SEO Specialist", "Brand Manager"],
-        "Customer Success": ["Support Associate", "Customer Success Manager"],
-        "IT": ["Systems Admin", "IT Support", "Network Engineer"],
-        "Operations": ["Operations Analyst", "Logistics Coordinator"]
-    }
-
-    education_levels = ["High School", "Associate's", "Bachelor's", "Master's", "PhD"]
-    genders = ["Male", "Female", "Nonbinary"]
-    marital_statuses = ["Single", "Married", "Divorced"]
-    employment_statuses = ["Active", "Terminated", "Leave of Absence"]
-
-    data = []
-
-    start_date = datetime(2005, 1, 1)
-    end_date = datetime(2022, 12, 31)
-
-    for i in range(1, n + 1):
-        dept = random.choice(departments)
-        role = random.choice(job_roles[dept])
-
-        hire_date = random_date(start_date, end_date)
-
-        monthly_income = random.randint(3000, 20000)
-
-        employee = {
-            "EmployeeID": i,
-            "FirstName": f"Emp{i}",
-            "LastName": f"LN{i}",
-            "Age": random.randint(20, 60),
-            "Gender": random.choice(genders),
-            "MaritalStatus": random.choice(marital_statuses),
-            "Department": dept,
-            "JobRole": role,
-            "MonthlyIncome": monthly_income,
-            "EducationLevel": random.choice(education_levels),
-            "HireDate": hire_date.strftime("%Y-%m-%d"),
-            "EmploymentStatus": random.choice(employment_statuses),
-            "ManagerID": random.randint(1, n//10) if i > 10 else None,
-            "BusinessTravel": random.choice(["Travel_Rarely", "Travel_Frequently", "Non-Travel"]),
-            "OverTime": random.choice(["Yes", "No"])
-        }
-
-        data.append(employee)
-
-    df = pd.DataFrame(data)
+DEPARTMENTS = [
+    "Sales", "Human Resources", "R&D", "Engineering", "Finance",
+    "Marketing", "Customer Success", "IT", "Operations"
+]
+
+JOB_ROLES = {
+    "Sales": ["Sales Representative", "Account Manager", "Sales Executive"],
+    "Human Resources": ["HR Specialist", "Recruiter", "HR Manager"],
+    "R&D": ["Research Scientist", "Lab Technician", "Principal Researcher"],
+    "Engineering": ["Software Engineer", "DevOps Engineer", "Data Engineer"],
+    "Finance": ["Financial Analyst", "Accountant", "Finance Manager"],
+    "Marketing": ["Marketing Analyst", "SEO Specialist", "Brand Manager"],
+    "Customer Success": ["Support Associate", "Customer Success Manager"],
+    "IT": ["Systems Admin", "IT Support", "Network Engineer"],
+    "Operations": ["Operations Analyst", "Logistics Coordinator"]
+}
+
+EDUCATION_LEVELS = ["High School", "Associate's", "Bachelor's", "Master's", "PhD"]
+GENDERS = ["Male", "Female", "Nonbinary"]
+MARITAL_STATUSES = ["Single", "Married", "Divorced"]
+EMPLOYMENT_STATUSES = ["Active", "Terminated", "Leave of Absence"]
+BUSINESS_TRAVEL = ["Travel_Rarely", "Travel_Frequently", "Non-Travel"]
+
+HIRE_START_DATE = datetime(2005, 1, 1)
+HIRE_END_DATE = datetime(2022, 12, 31)
+
+
+def random_dates(rng: np.random.Generator, start, end, size: int) -> pd.DatetimeIndex:
+    """Return size random dates between start and end (inclusive)."""
+    offsets = rng.integers(0, (end - start).days + 1, size=size)
+    return pd.Timestamp(start) + pd.to_timedelta(offsets, unit="D")
+
+
+def generate_ibm_hr_dataset(n=1470, employee_ids=None, seed=None, rng=None):
+    if rng is None:
+        rng = np.random.default_rng(seed)
+
+    if employee_ids is None:
+        employee_ids = np.arange(1, n + 1)
+    employee_ids = np.asarray(employee_ids, dtype=np.int64)
+    size = len(employee_ids)
+
+    dept_idx = rng.integers(0, len(DEPARTMENTS), size=size)
+    departments = np.array(DEPARTMENTS, dtype=object)[dept_idx]
+
+    # pick a role within each row's department: scale a uniform draw by the role count
+    role_counts = np.array([len(JOB_ROLES[d]) for d in DEPARTMENTS])
+    role_offsets = np.concatenate([[0], np.cumsum(role_counts)[:-1]])
+    all_roles = np.array([r for d in DEPARTMENTS for r in JOB_ROLES[d]], dtype=object)
+    role_idx = (rng.random(size) * role_counts[dept_idx]).astype(np.int64)
+    roles = all_roles[role_offsets[dept_idx] + role_idx]
+
+    hire_dates = random_dates(rng, HIRE_START_DATE, HIRE_END_DATE, size)
+
+    # the first ten employees have no manager; n is the full population size
+    manager_ids = rng.integers(1, max(n // 10, 1) + 1, size=size).astype(float)
+    manager_ids[employee_ids <= 10] = np.nan
+
+    df = pd.DataFrame({
+        "EmployeeID": employee_ids,
+        "FirstName": [f"Emp{i}" for i in employee_ids],
+        "LastName": [f"LN{i}" for i in employee_ids],
+        "Age": rng.integers(20, 61, size=size),
+        "Gender": rng.choice(GENDERS, size=size),
+        "MaritalStatus": rng.choice(MARITAL_STATUSES, size=size),
+        "Department": departments,
+        "JobRole": roles,
+        "MonthlyIncome": rng.integers(3000, 20001, size=size),
+        "EducationLevel": rng.choice(EDUCATION_LEVELS, size=size),
+        "HireDate": hire_dates.strftime("%Y-%m-%d"),
+        "EmploymentStatus": rng.choice(EMPLOYMENT_STATUSES, size=size),
+        "ManagerID": manager_ids,
+        "BusinessTravel": rng.choice(BUSINESS_TRAVEL, size=size),
+        "OverTime": rng.choice(["Yes", "No"], size=size)
+    })
+
     return df
 
 
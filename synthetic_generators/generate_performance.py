@@ -2,77 +2,65 @@ import pandas as pd
 import numpy as np
 import os
 
-def generate_performance(employee_ids):
-    review_cycles = [
-        ("2021-12-15", "Annual"),
-        ("2022-06-15", "Mid-Year"),
-        ("2022-12-15", "Annual"),
-        ("2023-06-15", "Mid-Year"),
-    ]
-
-    performance_rows = []
-
-    for emp in employee_ids:
-        for date, cycle in review_cycles:
-
-            # overall rating distribution
-            overall_rating = np.random.choice(
-                [1, 2, 3, 4, 5],
-                p=[0.05, 0.15, 0.55, 0.20, 0.05]
-            )
-
-            # goals score ~ correlated with rating
-            goals_score = round(np.random.normal(overall_rating * 0.8, 0.4), 2)
-            goals_score = min(max(goals_score, 1), 5)
-
-            # manager score ~ slightly noisy
-            manager_score = round(np.random.normal(overall_rating * 0.85, 0.5), 2)
-            manager_score = min(max(manager_score, 1), 5)
-
-            # potential rating (low/medium/high)
-            potential = np.random.choice(
-                ["Low", "Medium", "High"],
-                p=[0.2, 0.6, 0.2]
-            )
-
-            # bonus % based on performance
-            bonus_pct = {
-                1: 0,
-                2: 3,
-                3: 6,
-                4: 10,
-                5: 15
-            }[overall_rating]
-
-            # promotion recommendation
-            promotion = np.random.choice(
-                ["Yes", "No"],
-                p=[0.12, 0.88]
-            )
-
-            performance_rows.append([
-                emp,
-                date,
-                cycle,
-                overall_rating,
-                goals_score,
-                manager_score,
-                potential,
-                bonus_pct,
-                promotion
-            ])
-
-    df = pd.DataFrame(performance_rows, columns=[
-        "employee_id",
-        "review_date",
-        "review_cycle",
-        "overall_rating",
-        "goals_score",
-        "manager_score",
-        "potential_rating",
-        "bonus_percentage",
-        "promotion_recommendation"
-    ])
+REVIEW_CYCLES = [
+    ("2021-12-15", "Annual"),
+    ("2022-06-15", "Mid-Year"),
+    ("2022-12-15", "Annual"),
+    ("2023-06-15", "Mid-Year"),
+]
+
+RATINGS = np.array([1, 2, 3, 4, 5])
+RATING_PROBS = [0.05, 0.15, 0.55, 0.20, 0.05]
+
+# bonus % by overall rating (index = rating)
+BONUS_PCT = np.array([0, 0, 3, 6, 10, 15])
+
+POTENTIALS = ["Low", "Medium", "High"]
+POTENTIAL_PROBS = [0.2, 0.6, 0.2]
+
+PROMOTION_PROB = 0.12
+
+COLUMNS = [
+    "employee_id",
+    "review_date",
+    "review_cycle",
+    "overall_rating",
+    "goals_score",
+    "manager_score",
+    "potential_rating",
+    "bonus_percentage",
+    "promotion_recommendation"
+]
+
+
+def generate_performance(employee_ids, seed=None, rng=None):
+    if rng is None:
+        rng = np.random.default_rng(seed)
+
+    employee_ids = np.asarray(employee_ids)
+    n_cycles = len(REVIEW_CYCLES)
+    n_rows = len(employee_ids) * n_cycles
+
+    # overall rating distribution
+    overall_rating = rng.choice(RATINGS, size=n_rows, p=RATING_PROBS)
+
+    # goals score ~ correlated with rating
+    goals_score = np.clip(rng.normal(overall_rating * 0.8, 0.4).round(2), 1, 5)
+
+    # manager score ~ slightly noisy
+    manager_score = np.clip(rng.normal(overall_rating * 0.85, 0.5).round(2), 1, 5)
+
+    df = pd.DataFrame({
+        "employee_id": np.repeat(employee_ids, n_cycles),
+        "review_date": np.tile([date for date, _ in REVIEW_CYCLES], len(employee_ids)),
+        "review_cycle": np.tile([cycle for _, cycle in REVIEW_CYCLES], len(employee_ids)),
+        "overall_rating": overall_rating,
+        "goals_score": goals_score,
+        "manager_score": manager_score,
+        "potential_rating": rng.choice(POTENTIALS, size=n_rows, p=POTENTIAL_PROBS),
+        "bonus_percentage": BONUS_PCT[overall_rating],
+        "promotion_recommendation": np.where(rng.random(n_rows) < PROMOTION_PROB, "Yes", "No"),
+    }, columns=COLUMNS)
 
     return df
 
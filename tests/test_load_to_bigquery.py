@@ -0,0 +1,153 @@
+"""run_load_bigquery against a stub client on a throwaway staging tree."""
+import io
+import threading
+from datetime import date
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+pytest.importorskip("google.cloud.bigquery")
+
+from etl import catalog
+from etl.load import load_to_bigquery as loader
+from etl.staging import write_staging
+
+PROJECT = "test-project"
+DATASET = "test_dataset"
+
+
+class StubJob:
+    def __init__(self, error=None):
+        self.error = error
+
+    def result(self):
+        if self.error:
+            raise self.error
+
+
+class StubClient:
+    """Records every load; jobs of tables in failing raise from result()."""
+
+    def __init__(self, failing=(), barrier=None):
+        self.failing = set(failing)
+        self.barrier = barrier
+        self.loads = {}
+        self.lock = threading.Lock()
+
+    def load_table_from_file(self, file_obj, table_id, job_config=None):
+        if self.barrier is not None:
+            # only returns once every table is being submitted at the same time
+            self.barrier.wait()
+        table = table_id.rsplit(".", 1)[1]
+        with self.lock:
+            self.loads[table] = {
+                "rows": pq.read_table(io.BytesIO(file_obj.read())),
+                "write_disposition": job_config.write_disposition,
+                "clustering": job_config.clustering_fields,
+            }
+        return StubJob(RuntimeError(f"{table} rejected") if table in self.failing else None)
+
+
+def stage_batch(folder: str, days: list, reviews: list):
+    ids = [1, 2]
+    write_staging(pd.DataFrame({
+        "employee_id": ids,
+        "firstname": ["Ada", "Alan"],
+        "employmentstatus": ["Active", "Active"],
+    }), "employee", f"data/staging/employee/{folder}")
+    write_staging(pd.DataFrame({
+        "employee_id": [i for _ in days for i in ids],
+        "date": pd.to_datetime([d for d in days for _ in ids]),
+        "status": [1.0, 0.5] * len(days),
+        "hours_worked": [8.0, 7.5] * len(days),
+    }), "attendance", f"data/staging/attendance/{folder}")
+    write_staging(pd.DataFrame({
+        "survey_id": [10, 11],
+        "employee_id": ids,
+        "survey_date": pd.to_datetime(["2024-01-15", "2024-01-15"]),
+        "q_recognition": [3, 4],
+    }), "engagement", f"data/staging/engagement/{folder}")
+    write_staging(pd.DataFrame({
+        "employee_id": [i for _ in reviews for i in ids],
+        "review_date": pd.to_datetime([r for r in reviews for _ in ids]),
+        "overall_rating": [4, 3] * len(reviews),
+    }), "performance", f"data/staging/performance/{folder}")
+    write_staging(pd.DataFrame({
+        "employee_id": ids,
+        "total_hours": [16.0, 15.0],
+    }), "master", f"data/staging/master/{folder}")
+
+
+@pytest.fixture
+def staging_tree(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr("etl.instrumentation.METRICS_LOG", "")
+    catalog.invalidate()
+    stage_batch("2024-01-31", ["2024-01-30", "2024-01-31"], ["2024-01-10"])
+    yield tmp_path
+    catalog.invalidate()
+
+
+def run(client, **kwargs):
+    return loader.run_load_bigquery(
+        client=client, project=PROJECT, dataset=DATASET,
+        state_path="data/state/bigquery/load_state.json", **kwargs,
+    )
+
+
+def test_first_load_submits_every_table_concurrently(staging_tree):
+    client = StubClient(barrier=threading.Barrier(len(loader.BIGQUERY_TABLES), timeout=10))
+
+    state = run(client)
+
+    assert set(client.loads) == set(loader.BIGQUERY_TABLES)
+    assert all(load["write_disposition"] == "WRITE_TRUNCATE" for load in client.loads.values())
+    assert client.loads["fact_attendance"]["clustering"] == ["employee_id"]
+    assert state == {"fact_attendance": "2024-01-31", "fact_performance": "2024-01-10T00:00:00"}
+    assert loader.read_load_state("data/state/bigquery/load_state.json") == state
+
+
+def test_later_load_appends_rows_past_the_watermark(staging_tree):
+    run(StubClient())
+    stage_batch("2024-02-01", ["2024-01-31", "2024-02-01"], ["2024-01-10"])
+
+    client = StubClient()
+    state = run(client)
+
+    attendance = client.loads["fact_attendance"]
+    assert attendance["write_disposition"] == "WRITE_APPEND"
+    assert attendance["rows"].column("date").to_pylist() == [date(2024, 2, 1)] * 2
+    # no review past the watermark: nothing to append, the table is skipped
+    assert "fact_performance" not in client.loads
+    assert client.loads["dim_employee"]["write_disposition"] == "WRITE_TRUNCATE"
+    assert state["fact_attendance"] == "2024-02-01"
+    assert state["fact_performance"] == "2024-01-10T00:00:00"
+
+
+def test_full_refresh_ignores_the_watermark(staging_tree):
+    run(StubClient())
+
+    client = StubClient()
+    run(client, full_refresh=True)
+
+    attendance = client.loads["fact_attendance"]
+    assert attendance["write_disposition"] == "WRITE_TRUNCATE"
+    assert attendance["rows"].num_rows == 4
+
+
+def test_failed_jobs_are_reported_together(staging_tree):
+    client = StubClient(failing={"fact_attendance", "master_dataset"})
+
+    with pytest.raises(RuntimeError) as excinfo:
+        run(client)
+
+    message = str(excinfo.value)
+    assert "fact_attendance: fact_attendance rejected" in message
+    assert "master_dataset: master_dataset rejected" in message
+    # every job was still submitted and waited on
+    assert set(client.loads) == set(loader.BIGQUERY_TABLES)
+    # only the jobs that succeeded move their watermark
+    assert loader.read_load_state("data/state/bigquery/load_state.json") == {
+        "fact_performance": "2024-01-10T00:00:00",
+    }
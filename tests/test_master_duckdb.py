@@ -0,0 +1,101 @@
+"""The DuckDB master engine builds the same master dataset as the pandas one."""
+import os
+
+import pandas as pd
+import pytest
+
+from etl.staging import read_staging, staging_path, write_staging
+from etl.transform.transform_master import (
+    ATTENDANCE_COLUMNS,
+    build_master,
+    latest_performance,
+    summarise_attendance,
+    summarise_engagement,
+)
+from etl.transform.transform_master_duckdb import build_master_duckdb, connect
+
+
+def fixture_frames() -> dict:
+    # employee 3 has no attendance, 4 no surveys and 2 no reviews; staging order is not id order
+    return {
+        "employee": pd.DataFrame({
+            "employee_id": [3, 1, 4, 2],
+            "firstname": ["Cleo", "Ada", "Dan", "Ben"],
+            "department": ["Sales", "IT", "IT", "HR"],
+            "age": [41, 29, 35, 52],
+            "monthlyincome": [5200, 6100, 4800, 7300],
+            "employmentstatus": ["Active", "Active", "Terminated", "Active"],
+            "managerid": [None, 3, 3, 1],
+            "hiredate": pd.to_datetime(["2015-03-01", "2019-06-15", "2020-01-06", "2011-09-30"]),
+        }),
+        "attendance": pd.DataFrame({
+            "employee_id": [1, 1, 1, 2, 2, 4, 4, 4],
+            "date": pd.to_datetime(["2024-01-01", "2024-01-02", "2024-01-03"] * 2 + ["2024-01-01", "2024-01-02"]),
+            "status": [1.0, 0.5, 0.0, 1.0, 1.0, 0.5, 1.0, 0.0],
+            "hours_worked": [8.25, 7.5, 0.0, 9.1, 8.0, 6.75, 8.4, 0.0],
+            "is_late": [0, 1, 0, 0, 0, 1, 0, 0],
+            "is_overtime": [0, 0, 0, 1, 0, 0, 1, 0],
+        }),
+        "engagement": pd.DataFrame({
+            "survey_id": [100, 101, 102, 103, 104],
+            "employee_id": [1, 1, 2, 3, 3],
+            "survey_date": pd.to_datetime(["2023-06-01", "2024-01-01", "2024-01-01", "2023-06-01", "2024-01-01"]),
+            "date_key": [20230601, 20240101, 20240101, 20230601, 20240101],
+            "q_work_life_balance": [3, 4, 2, None, 5],
+            "q_recognition": [1, 2, 5, 4, None],
+            "comment_text": ["ok", None, "great", "fine", "busy"],
+        }),
+        "performance": pd.DataFrame({
+            "employee_id": [1, 1, 3, 4, 4],
+            "review_date": pd.to_datetime(["2023-06-30", "2023-12-31", "2023-12-31", "2023-12-31", "2023-06-30"]),
+            "review_cycle": ["H1", "H2", "H2", "H2", "H1"],
+            "overall_rating": [3, 4, 5, 2, 3],
+            "goals_score": [3.5, 4.25, 4.9, 2.1, 3.0],
+        }),
+    }
+
+
+@pytest.fixture
+def staged(tmp_path):
+    folders = {}
+    for dataset, df in fixture_frames().items():
+        folders[dataset] = str(tmp_path / dataset / "2024-01-31")
+        write_staging(df, dataset, folders[dataset])
+    return folders
+
+
+def pandas_master(folders: dict) -> pd.DataFrame:
+    # what run_master_transform builds with the pandas engine
+    return build_master(
+        read_staging("employee", folders["employee"]),
+        summarise_attendance(read_staging("attendance", folders["attendance"], columns=ATTENDANCE_COLUMNS)),
+        summarise_engagement(read_staging("engagement", folders["engagement"])),
+        latest_performance(read_staging("performance", folders["performance"])),
+    )
+
+
+def duckdb_master(folders: dict, output_folder: str) -> pd.DataFrame:
+    os.makedirs(output_folder)
+    con = connect(temp_directory=None)
+    try:
+        build_master_duckdb(con, folders, staging_path(output_folder, "master", "parquet"), fmt="parquet")
+    finally:
+        con.close()
+    return read_staging("master", output_folder)
+
+
+def plain(df: pd.DataFrame) -> pd.DataFrame:
+    # categories and string dtypes as Python objects, with None for every missing label
+    text = df.select_dtypes(exclude=["number", "datetime"]).columns
+    return df.assign(**{c: df[c].astype(object).where(df[c].notna(), None) for c in text})
+
+
+def test_duckdb_master_matches_pandas_master(staged, tmp_path):
+    expected = pandas_master(staged)
+    actual = duckdb_master(staged, str(tmp_path / "master" / "2024-01-31"))
+
+    assert list(actual.columns) == list(expected.columns)
+    assert actual["employee_id"].tolist() == [3, 1, 4, 2]
+
+    # DuckDB returns DOUBLE and plain strings where pandas keeps small ints and categories
+    pd.testing.assert_frame_equal(plain(actual), plain(expected), check_dtype=False, check_exact=False, rtol=1e-6)
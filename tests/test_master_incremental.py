@@ -0,0 +1,139 @@
+"""The incremental master treats every staging folder as a full snapshot of its feed."""
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+from etl import catalog
+from etl.staging import read_staging, staging_path, write_staging
+from etl.transform.transform_master import (
+    ATTENDANCE_COLUMNS,
+    build_master,
+    latest_performance,
+    summarise_attendance,
+    summarise_engagement,
+)
+from etl.transform.transform_master_incremental import run_master_incremental
+
+DATASETS = ("employee", "attendance", "engagement", "performance")
+STATE_DIR = "data/state/master"
+
+
+def snapshot_frames() -> dict:
+    return {
+        "employee": pd.DataFrame({
+            "employee_id": [3, 1, 4, 2],
+            "firstname": ["Cleo", "Ada", "Dan", "Ben"],
+            "department": ["Sales", "IT", "IT", "HR"],
+            "monthlyincome": [5200, 6100, 4800, 7300],
+        }),
+        "attendance": pd.DataFrame({
+            "employee_id": [1, 1, 2, 2, 4, 4],
+            "date": pd.to_datetime(["2024-01-01", "2024-01-02"] * 3),
+            "status": [1.0, 0.5, 1.0, 0.0, 1.0, 1.0],
+            "hours_worked": [8.25, 7.5, 9.1, 0.0, 8.4, 8.0],
+            "is_late": [0, 1, 0, 0, 0, 0],
+            "is_overtime": [0, 0, 1, 0, 1, 0],
+        }),
+        "engagement": pd.DataFrame({
+            "survey_id": [100, 101, 102],
+            "employee_id": [1, 2, 3],
+            "survey_date": pd.to_datetime(["2024-01-01"] * 3),
+            "q_recognition": [3, 4, 5],
+        }),
+        "performance": pd.DataFrame({
+            "employee_id": [1, 3, 4],
+            "review_date": pd.to_datetime(["2023-12-31"] * 3),
+            "overall_rating": [4, 5, 2],
+        }),
+    }
+
+
+def stage(frames: dict, folder: str):
+    for dataset, df in frames.items():
+        write_staging(df, dataset, os.path.join("data/staging", dataset, folder))
+
+
+def staged_master(folder: str) -> pd.DataFrame:
+    return read_staging("master", os.path.join("data/staging/master", folder))
+
+
+def full_master(folder: str) -> pd.DataFrame:
+    # what the full pandas transform builds from the snapshots in folder
+    path = {dataset: os.path.join("data/staging", dataset, folder) for dataset in DATASETS}
+    return build_master(
+        read_staging("employee", path["employee"]),
+        summarise_attendance(read_staging("attendance", path["attendance"], columns=ATTENDANCE_COLUMNS)),
+        summarise_engagement(read_staging("engagement", path["engagement"])),
+        latest_performance(read_staging("performance", path["performance"])),
+    )
+
+
+def assert_same_master(actual: pd.DataFrame, expected: pd.DataFrame):
+    pd.testing.assert_frame_equal(
+        actual.reset_index(drop=True),
+        expected.reset_index(drop=True),
+        check_dtype=False,
+        check_categorical=False,
+    )
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr("etl.instrumentation.METRICS_LOG", "")
+    catalog.invalidate()
+    stage(snapshot_frames(), "2024-01-02")
+    run_master_incremental(STATE_DIR)
+    yield tmp_path
+    catalog.invalidate()
+
+
+def test_consecutive_full_snapshots_leave_the_master_unchanged(workdir):
+    first = staged_master("2024-01-02")
+
+    for dataset in DATASETS:
+        shutil.copytree(f"data/staging/{dataset}/2024-01-02", f"data/staging/{dataset}/2024-01-03")
+    run_master_incremental(STATE_DIR)
+
+    assert_same_master(staged_master("2024-01-03"), first)
+    assert_same_master(first, full_master("2024-01-02"))
+
+
+def test_restaged_snapshot_with_the_same_rows_leaves_the_master_unchanged(workdir):
+    first = staged_master("2024-01-02")
+
+    # same content written again by a later extract: new fingerprint, no row differs
+    stage(snapshot_frames(), "2024-01-03")
+    run_master_incremental(STATE_DIR)
+
+    assert_same_master(staged_master("2024-01-03"), first)
+
+
+def test_changed_snapshot_matches_a_full_rebuild(workdir):
+    frames = snapshot_frames()
+    attendance = frames["attendance"]
+    # a corrected day for employee 2, a new day for employee 1, employee 4's days withdrawn
+    attendance.loc[3, ["status", "hours_worked"]] = [1.0, 7.0]
+    attendance = attendance[attendance["employee_id"] != 4]
+    frames["attendance"] = pd.concat([attendance, pd.DataFrame({
+        "employee_id": [1], "date": pd.to_datetime(["2024-01-03"]), "status": [1.0],
+        "hours_worked": [8.0], "is_late": [0], "is_overtime": [1],
+    })], ignore_index=True)
+    frames["employee"] = frames["employee"][frames["employee"]["employee_id"] != 3]
+    stage(frames, "2024-01-03")
+
+    run_master_incremental(STATE_DIR)
+
+    assert_same_master(staged_master("2024-01-03"), full_master("2024-01-03"))
+
+
+def test_state_from_an_older_version_is_rebuilt(workdir):
+    with open(os.path.join(STATE_DIR, "state.json"), "w") as fh:
+        fh.write('{"applied": {}}')
+    os.remove(staging_path("data/staging/master/2024-01-02", "master"))
+
+    run_master_incremental(STATE_DIR)
+
+    assert_same_master(staged_master("2024-01-02"), full_master("2024-01-02"))
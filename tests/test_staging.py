@@ -0,0 +1,49 @@
+"""Declared staging types and the record of what each staging folder was built from."""
+import pandas as pd
+import pytest
+
+from etl import staging
+from etl.staging import apply_dtypes, batch_fingerprint, is_staged_from, record_staged_source, write_staging
+
+
+def test_integer_columns_are_narrowed():
+    df = apply_dtypes(pd.DataFrame({"employee_id": ["1", "2", None], "age": [29.0, 41.0, 35.0]}), "employee")
+
+    assert str(df["employee_id"].dtype) == "Int32"
+    assert str(df["age"].dtype) == "int16"
+    assert df["employee_id"].tolist()[:2] == [1, 2]
+
+
+def test_malformed_key_ids_raise():
+    with pytest.raises(ValueError, match="employee.employee_id: 1 values are not integer ids"):
+        apply_dtypes(pd.DataFrame({"employee_id": ["1", "E2", " "]}), "employee")
+
+
+@pytest.mark.parametrize("name, values", [
+    ("employee_id", [1, 3_000_000_000]),
+    ("monthlyincome", [5200, -2_200_000_000]),
+    ("age", [29, 40_000]),
+    ("age", [29.5, 41.0]),
+])
+def test_values_outside_the_declared_integer_type_raise(name, values):
+    with pytest.raises(ValueError, match=f"employee.{name}: 1 values are not whole numbers"):
+        apply_dtypes(pd.DataFrame({name: values}), "employee")
+
+
+def test_unchanged_batch_is_restaged_when_the_cleaning_code_changes(tmp_path, monkeypatch):
+    folder = str(tmp_path / "2024-01-31")
+    write_staging(pd.DataFrame({"employee_id": [1]}), "attendance", folder)
+    monkeypatch.setattr(staging, "transform_version", lambda dataset: "v1")
+    record_staged_source(folder, "attendance", "raw.csv", "abc")
+
+    assert is_staged_from(folder, "attendance", "abc")
+    assert not is_staged_from(folder, "attendance", "def")
+    assert batch_fingerprint("attendance", folder) == "abc:v1"
+
+    monkeypatch.setattr(staging, "transform_version", lambda dataset: "v2")
+    assert not is_staged_from(folder, "attendance", "abc")
+
+
+def test_transform_version_covers_the_dataset_module():
+    staging.transform_version.cache_clear()
+    assert staging.transform_version("attendance") != staging.transform_version("employee")
@@ -0,0 +1,30 @@
+-- Shared types, key sequences and bookkeeping for the people analytics
+-- warehouse. Applied before schema/*.sql by etl/load/warehouse_schema.py.
+
+CREATE TYPE IF NOT EXISTS attendance_status AS ENUM ('absent', 'late', 'present', 'remote', 'leave', 'sick leave', 'unknown');
+CREATE TYPE IF NOT EXISTS review_cycle AS ENUM ('Annual', 'Mid-Year');
+CREATE TYPE IF NOT EXISTS potential_rating AS ENUM ('Low', 'Medium', 'High');
+CREATE TYPE IF NOT EXISTS employment_status AS ENUM ('Active', 'Terminated', 'Leave of Absence');
+CREATE TYPE IF NOT EXISTS business_travel AS ENUM ('Non-Travel', 'Travel_Rarely', 'Travel_Frequently');
+CREATE TYPE IF NOT EXISTS gender AS ENUM ('Male', 'Female', 'Nonbinary');
+CREATE TYPE IF NOT EXISTS marital_status AS ENUM ('Single', 'Married', 'Divorced');
+CREATE TYPE IF NOT EXISTS education_level AS ENUM ('High School', 'Associate''s', 'Bachelor''s', 'Master''s', 'PhD');
+
+-- surrogate keys; never reused, so fact rows keep pointing at the same member
+CREATE SEQUENCE IF NOT EXISTS employee_key_seq START 1;
+CREATE SEQUENCE IF NOT EXISTS department_key_seq START 1;
+
+-- one row per (table, staging batch) applied by the incremental loads
+CREATE TABLE IF NOT EXISTS etl_load_state (
+    table_name VARCHAR NOT NULL,
+    batch VARCHAR NOT NULL,
+    fingerprint VARCHAR NOT NULL,
+    row_count BIGINT,
+    loaded_at TIMESTAMP
+);
+
+-- files under warehouse/migrations/ already applied, in name order
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    name VARCHAR PRIMARY KEY,
+    applied_at TIMESTAMP
+);
@@ -0,0 +1,13 @@
+-- Key range each load touched, so summaries can refresh only those periods.
+ALTER TABLE etl_load_state ADD COLUMN IF NOT EXISTS range_low VARCHAR;
+ALTER TABLE etl_load_state ADD COLUMN IF NOT EXISTS range_high VARCHAR;
+
+-- One row per summary table built by etl/load/materialize_summaries.py.
+-- source_loaded_at is the newest etl_load_state row the summary includes.
+CREATE TABLE IF NOT EXISTS summary_freshness (
+    summary_name VARCHAR PRIMARY KEY,
+    refresh_mode VARCHAR,
+    refreshed_at TIMESTAMP,
+    source_loaded_at TIMESTAMP,
+    row_count BIGINT
+);
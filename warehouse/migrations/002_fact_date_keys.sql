@@ -0,0 +1,10 @@
+-- Facts join dim_date on date_key (yyyymmdd); backfill rows loaded before it.
+ALTER TABLE fact_attendance ADD COLUMN IF NOT EXISTS date_key INTEGER;
+ALTER TABLE fact_attrition ADD COLUMN IF NOT EXISTS date_key INTEGER;
+ALTER TABLE fact_engagement ADD COLUMN IF NOT EXISTS date_key INTEGER;
+ALTER TABLE fact_performance ADD COLUMN IF NOT EXISTS date_key INTEGER;
+
+UPDATE fact_attendance SET date_key = CAST(strftime(date, '%Y%m%d') AS INTEGER) WHERE date_key IS NULL;
+UPDATE fact_attrition SET date_key = CAST(strftime(snapshot_date, '%Y%m%d') AS INTEGER) WHERE date_key IS NULL;
+UPDATE fact_engagement SET date_key = CAST(strftime(survey_date, '%Y%m%d') AS INTEGER) WHERE date_key IS NULL;
+UPDATE fact_performance SET date_key = CAST(strftime(review_date, '%Y%m%d') AS INTEGER) WHERE date_key IS NULL;
@@ -0,0 +1,36 @@
+-- Attendance keeps the raw status label (remote, leave, sick leave) instead of
+-- the presence code, and labels outside the known set load as 'unknown'.
+-- DuckDB cannot add ENUM members in place, so the column goes through VARCHAR.
+ALTER TABLE fact_attendance ALTER status TYPE VARCHAR;
+DROP TYPE attendance_status;
+CREATE TYPE attendance_status AS ENUM ('absent', 'late', 'present', 'remote', 'leave', 'sick leave', 'unknown');
+ALTER TABLE fact_attendance ALTER status TYPE attendance_status;
+
+-- employee_id is the integer id staging declares. A UNIQUE column cannot
+-- change type, so dim_employee is rebuilt; surrogate keys are kept.
+ALTER TABLE dim_employee RENAME TO dim_employee_varchar_id;
+
+CREATE TABLE dim_employee (
+    employee_key INTEGER PRIMARY KEY,
+    employee_id INTEGER NOT NULL UNIQUE,
+    firstname VARCHAR,
+    lastname VARCHAR,
+    age UTINYINT,
+    gender gender,
+    maritalstatus marital_status,
+    department_key USMALLINT,
+    jobrole VARCHAR,
+    monthlyincome INTEGER,
+    educationlevel education_level,
+    hiredate DATE,
+    employmentstatus employment_status,
+    managerid INTEGER,
+    businesstravel business_travel,
+    overtime BOOLEAN
+);
+
+INSERT INTO dim_employee BY NAME
+SELECT * REPLACE (CAST(employee_id AS INTEGER) AS employee_id)
+FROM dim_employee_varchar_id;
+
+DROP TABLE dim_employee_varchar_id;
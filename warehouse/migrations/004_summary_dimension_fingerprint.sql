@@ -0,0 +1,3 @@
+-- Hash of the dimension columns each summary joins, so a dimension reload
+-- only rebuilds the summaries whose inputs actually changed.
+ALTER TABLE summary_freshness ADD COLUMN IF NOT EXISTS dimension_fingerprint VARCHAR;
@@ -0,0 +1,23 @@
+-- One row per day, generated by etl/transform/date_dimension.py and
+-- extended by whole years as facts arrive. date_key is yyyymmdd; facts
+-- carry it instead of their own calendar attributes.
+CREATE TABLE IF NOT EXISTS dim_date (
+    date_key INTEGER PRIMARY KEY,
+    date DATE NOT NULL UNIQUE,
+    year SMALLINT,
+    quarter UTINYINT,
+    month UTINYINT,
+    month_name VARCHAR,
+    day UTINYINT,
+    day_of_week UTINYINT,
+    weekday VARCHAR,
+    iso_year SMALLINT,
+    iso_week UTINYINT,
+    is_weekend BOOLEAN,
+    is_holiday BOOLEAN,
+    holiday_name VARCHAR,
+    is_business_day BOOLEAN,
+    fiscal_year SMALLINT,
+    fiscal_quarter UTINYINT,
+    fiscal_period UTINYINT
+);
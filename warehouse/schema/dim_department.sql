@@ -0,0 +1,5 @@
+-- Populated from the distinct departments of each employee batch.
+CREATE TABLE IF NOT EXISTS dim_department (
+    department_key USMALLINT PRIMARY KEY,
+    department_name VARCHAR NOT NULL UNIQUE
+);
@@ -0,0 +1,21 @@
+-- One row per employee. employee_key is the surrogate every fact joins on;
+-- employee_id is the source system id. Ids seen in a fact before the
+-- employee batch arrives get a key and an otherwise empty row.
+CREATE TABLE IF NOT EXISTS dim_employee (
+    employee_key INTEGER PRIMARY KEY,
+    employee_id INTEGER NOT NULL UNIQUE,
+    firstname VARCHAR,
+    lastname VARCHAR,
+    age UTINYINT,
+    gender gender,
+    maritalstatus marital_status,
+    department_key USMALLINT,
+    jobrole VARCHAR,
+    monthlyincome INTEGER,
+    educationlevel education_level,
+    hiredate DATE,
+    employmentstatus employment_status,
+    managerid INTEGER,
+    businesstravel business_travel,
+    overtime BOOLEAN
+);
@@ -0,0 +1,12 @@
+-- Grain: employee x day. Rows are inserted ordered by (date, employee_key),
+-- so date range filters skip whole row groups.
+CREATE TABLE IF NOT EXISTS fact_attendance (
+    employee_key INTEGER NOT NULL,
+    date DATE NOT NULL,
+    date_key INTEGER,
+    "timestamp" TIMESTAMP,
+    status attendance_status,
+    hours_worked DECIMAL(4, 2),
+    is_late BOOLEAN,
+    is_overtime BOOLEAN
+);
@@ -0,0 +1,13 @@
+-- Grain: employee x employee batch. Each batch snapshots who is still
+-- employed, so attrition rates can be tracked across snapshots.
+-- Rows are inserted ordered by (snapshot_date, employee_key).
+CREATE TABLE IF NOT EXISTS fact_attrition (
+    employee_key INTEGER NOT NULL,
+    snapshot_date DATE NOT NULL,
+    date_key INTEGER,
+    department_key USMALLINT,
+    employmentstatus employment_status,
+    is_terminated BOOLEAN,
+    tenure_days INTEGER,
+    monthlyincome INTEGER
+);
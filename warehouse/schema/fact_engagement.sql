@@ -0,0 +1,13 @@
+-- Grain: one survey response. Rows are inserted ordered by
+-- (survey_id, employee_key).
+CREATE TABLE IF NOT EXISTS fact_engagement (
+    employee_key INTEGER NOT NULL,
+    survey_id INTEGER NOT NULL,
+    survey_date DATE,
+    date_key INTEGER,
+    q_work_life_balance UTINYINT,
+    q_manager_support UTINYINT,
+    q_growth_opportunity UTINYINT,
+    q_recognition UTINYINT,
+    comment_text VARCHAR
+);
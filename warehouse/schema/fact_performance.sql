@@ -0,0 +1,14 @@
+-- Grain: employee x review. Rows are inserted ordered by
+-- (review_date, employee_key).
+CREATE TABLE IF NOT EXISTS fact_performance (
+    employee_key INTEGER NOT NULL,
+    review_date DATE NOT NULL,
+    date_key INTEGER,
+    review_cycle review_cycle,
+    overall_rating UTINYINT,
+    goals_score FLOAT,
+    manager_score FLOAT,
+    potential_rating potential_rating,
+    bonus_percentage UTINYINT,
+    promotion_recommendation BOOLEAN
+);